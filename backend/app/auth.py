@@ -3,21 +3,29 @@ from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached, object_session
 import os
 from dotenv import load_dotenv
 
-from .database import get_db
+from .database import get_async_db, run_after_commit
 from .models import User
+from .services.principal_cache import PrincipalCache
 
 load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024"))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+principal_cache = PrincipalCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+
+PRINCIPAL_COLUMNS = ("id", "email", "username", "hashed_password", "is_admin", "created_at")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -39,8 +47,29 @@ def create_access_token(data: dict) -> str:
     return encoded_jwt
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    """Get the current authenticated user"""
+def _principal_values(user: User) -> dict:
+    """Snapshot the columns of a user for the principal cache"""
+    return {column: getattr(user, column) for column in PRINCIPAL_COLUMNS}
+
+
+async def _attach_principal(values: dict, db: AsyncSession) -> User:
+    """Attach a cached user to the request session without querying it"""
+    user = User(**values)
+    make_transient_to_detached(user)
+    return await db.merge(user, load=False)
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> User:
+    """
+    Get the current authenticated user
+
+    Principals are cached by token, so repeated requests from the same
+    session skip both the JWT decode and the user lookup.
+    """
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return await _attach_principal(cached, db)
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -55,10 +84,12 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalars().first()
     if user is None:
         raise credentials_exception
     
+    principal_cache.set(token, _principal_values(user), payload.get("exp"))
     return user
 
 
@@ -69,4 +100,14 @@ async def get_admin_user(current_user: User = Depends(get_current_user)) -> User
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_principal(mapper, connection, target: User):
+    """Drop cached principals of a changed or deleted user once the change commits"""
+    # A renamed user is still cached under the old username
+    usernames = {target.username, *inspect(target).attrs.username.history.deleted}
+    for username in usernames:
+        run_after_commit(object_session(target), principal_cache.invalidate_user, username)
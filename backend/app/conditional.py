@@ -0,0 +1,65 @@
+"""
+ETags and If-None-Match for per-user read endpoints
+
+The ETag is the user's data version (services/data_versions.py), so a
+request whose If-None-Match still matches is answered 304 from a cached
+version lookup, before the endpoint reads any rows.
+"""
+from datetime import date
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy.orm import Session
+
+from .auth import get_current_user
+from .database import get_db
+from .models import User
+from .services.data_versions import current_version
+
+# Browsers keep the response but revalidate it on every use
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(user_id: int, version: int, day: Optional[date] = None) -> str:
+    tag = f"{user_id}.{version}"
+    if day is not None:
+        tag += f".{day.isoformat()}"
+    return f'"{tag}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip() for candidate in if_none_match.split(",")}
+    if "*" in candidates:
+        return True
+    return etag in {c[2:] if c.startswith("W/") else c for c in candidates}
+
+
+def _conditional_get(request: Request, response: Response, user: User, db: Session, daily: bool):
+    etag = make_etag(user.id, current_version(db, user.id), date.today() if daily else None)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
+
+def user_etag(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Tag the response with the user's data version, or answer 304"""
+    _conditional_get(request, response, current_user, db, daily=False)
+
+
+def daily_user_etag(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """As user_etag, for responses that also change with the date (streaks)"""
+    _conditional_get(request, response, current_user, db, daily=True)
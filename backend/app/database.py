@@ -1,6 +1,8 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 import os
 from dotenv import load_dotenv
 
@@ -8,6 +10,31 @@ load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./workout_planner.db")
 
+# Async drivers for the same database: aiosqlite for SQLite, asyncpg for Postgres
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Swap the driver of a database URL for its asyncio counterpart"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend!r} databases")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def async_database_url(sync_url: str) -> str:
+    """ASYNC_DATABASE_URL when set, otherwise sync_url with its async driver"""
+    # Only derived when absent, so an explicit override works for databases
+    # ASYNC_DRIVERS does not know
+    return os.getenv("ASYNC_DATABASE_URL") or to_async_url(sync_url)
+
+
+ASYNC_DATABASE_URL = async_database_url(SQLALCHEMY_DATABASE_URL)
+
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, 
     connect_args={"check_same_thread": False} if "sqlite" in SQLALCHEMY_DATABASE_URL else {}
@@ -15,6 +42,12 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+
+# Objects stay readable after commit instead of triggering a lazy refresh,
+# which an AsyncSession cannot do implicitly
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # Dependency
@@ -23,4 +56,35 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# Async dependency for `async def` routes and dependencies
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+_AFTER_COMMIT = "after_commit_callbacks"
+
+
+def run_after_commit(session: Session, callback, *args):
+    """
+    Call callback(*args) once the session's transaction commits
+
+    For cache invalidation from flush-time hooks: invalidating at flush lets
+    a concurrent reader re-cache the still-committed old rows before the
+    commit lands. Callbacks are deduplicated and dropped on rollback.
+    """
+    session.info.setdefault(_AFTER_COMMIT, {})[(callback, args)] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session: Session):
+    for callback, args in session.info.pop(_AFTER_COMMIT, {}):
+        callback(*args)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_commit(session: Session):
+    session.info.pop(_AFTER_COMMIT, None)
@@ -1,17 +1,35 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from .database import engine, Base
+from .migrations import run_migrations
+from .pagination import NEXT_CURSOR_HEADER
 from .routers import auth_routes, user_routes, workout_routes, admin_routes, ai_routes
+from .services.ai_jobs import ai_job_queue
+from .telemetry import PROMETHEUS_CONTENT_TYPE, TelemetryMiddleware, registry
 
-# Create database tables
+# Create database tables and apply pending schema migrations
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the AI job workers for the lifetime of the app"""
+    await ai_job_queue.start()
+    yield
+    await ai_job_queue.stop()
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Smart Workout Planner API",
     description="AI-powered fitness management system with personalized recommendations",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -21,8 +39,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Per-route latency, status and SQL accounting (added last, so it runs first)
+app.add_middleware(TelemetryMiddleware)
+
 # Include routers
 app.include_router(auth_routes.router, prefix="/auth", tags=["Authentication"])
 app.include_router(user_routes.router, prefix="/users", tags=["Users"])
@@ -45,4 +67,10 @@ def root():
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Request, database and Gemini metrics in Prometheus text format"""
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,183 @@
+"""
+Versioned schema migrations
+
+``Base.metadata.create_all`` only creates missing tables; it never changes a
+table that already exists. Changes to existing tables (new indexes, columns,
+data backfills) are registered here as numbered migrations and applied in
+order by ``run_migrations``. Applied versions are recorded in the
+``schema_migrations`` table so each migration runs exactly once per database.
+"""
+from datetime import datetime
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select
+from sqlalchemy.engine import Connection, Engine
+
+migration_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String),
+    Column("applied_at", DateTime, default=datetime.utcnow),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, description: str):
+    """Register a migration function under the given version number"""
+    def decorator(upgrade: Callable[[Connection], None]):
+        if any(m.version == version for m in MIGRATIONS):
+            raise ValueError(f"Duplicate migration version: {version}")
+        MIGRATIONS.append(Migration(version, description, upgrade))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return upgrade
+    return decorator
+
+
+def applied_versions(engine: Engine) -> List[int]:
+    """Return the migration versions already applied to the database"""
+    migration_metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        return [row.version for row in conn.execute(select(schema_migrations.c.version))]
+
+
+def current_version(engine: Engine) -> int:
+    """Return the highest applied migration version (0 if none)"""
+    return max(applied_versions(engine), default=0)
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """
+    Apply all pending migrations in version order
+
+    Each migration runs in its own transaction together with the row that
+    records it, so a failed migration leaves the database at the previous
+    version.
+
+    Returns:
+        The versions applied by this call
+    """
+    done = set(applied_versions(engine))
+    applied = []
+
+    for m in MIGRATIONS:
+        if m.version in done:
+            continue
+        with engine.begin() as conn:
+            m.upgrade(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=m.version,
+                description=m.description,
+                applied_at=datetime.utcnow()
+            ))
+        applied.append(m.version)
+
+    return applied
+
+
+# ---------------------------------------------------------------------------
+# Migrations
+# ---------------------------------------------------------------------------
+
+@migration(1, "Composite (user_id, time) indexes for per-user history queries")
+def add_user_time_indexes(conn: Connection):
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_workouts_user_id_date ON workouts (user_id, date)"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_notifications_user_id_created_at "
+        "ON notifications (user_id, created_at)"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_rewards_user_id_earned_at ON rewards (user_id, earned_at)"
+    )
+
+
+@migration(2, "Partial index on unread notifications for unread counts")
+def add_unread_notifications_index(conn: Connection):
+    unread = "is_read = false" if conn.dialect.name == "postgresql" else "is_read = 0"
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_notifications_user_id_unread "
+        f"ON notifications (user_id) WHERE {unread}"
+    )
+
+
+@migration(3, "Seed metrics_history with each user's current metrics")
+def backfill_metrics_history(conn: Connection):
+    conn.exec_driver_sql(
+        "INSERT INTO metrics_history "
+        "(user_id, recorded_at, weight, bmi, body_fat_percentage, skeletal_muscle_mass) "
+        "SELECT user_id, updated_at, weight, bmi, body_fat_percentage, skeletal_muscle_mass "
+        "FROM user_metrics m "
+        "WHERE NOT EXISTS (SELECT 1 FROM metrics_history h WHERE h.user_id = m.user_id)"
+    )
+
+
+@migration(4, "Build per-day activity bitmaps from workout history")
+def build_activity_bitmaps(conn: Connection):
+    # Imported here: the service registers mapper hooks on the models
+    from .services.engagement import rebuild_activity
+    rebuild_activity(conn)
+
+
+@migration(5, "Structured sets/reps/load columns on workouts and personal records backfill")
+def add_workout_strength_columns(conn: Connection):
+    existing = {column["name"] for column in inspect(conn).get_columns("workouts")}
+    for name, sql_type in (("sets", "INTEGER"), ("reps", "INTEGER"), ("load_kg", "FLOAT")):
+        if name not in existing:
+            conn.exec_driver_sql(f"ALTER TABLE workouts ADD COLUMN {name} {sql_type}")
+    # Imported here: the service registers mapper hooks on the models
+    from .services.strength import backfill_strength
+    backfill_strength(conn)
+
+
+@migration(6, "Reward codes for idempotent awarding and reward counters backfill")
+def add_reward_codes(conn: Connection):
+    if "code" not in {column["name"] for column in inspect(conn).get_columns("rewards")}:
+        conn.exec_driver_sql("ALTER TABLE rewards ADD COLUMN code VARCHAR")
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_rewards_user_id_code ON rewards (user_id, code)"
+    )
+    # Imported here: the service imports the models
+    from .services.rewards import replay_rewards
+    replay_rewards(conn)
+
+
+@migration(7, "Per-user data version for ETags")
+def add_user_data_version(conn: Connection):
+    if "data_version" not in {column["name"] for column in inspect(conn).get_columns("users")}:
+        conn.exec_driver_sql("ALTER TABLE users ADD COLUMN data_version INTEGER NOT NULL DEFAULT 0")
+
+
+@migration(8, "AI job owners and heartbeats, and one active job per dedupe key")
+def add_ai_job_ownership(conn: Connection):
+    columns = {column["name"] for column in inspect(conn).get_columns("ai_jobs")}
+    for name, type_ in (("worker_id", "VARCHAR"), ("heartbeat_at", "TIMESTAMP")):
+        if name not in columns:
+            conn.exec_driver_sql(f"ALTER TABLE ai_jobs ADD COLUMN {name} {type_}")
+    # Earlier submits could race; keep the oldest of each set of duplicates
+    conn.exec_driver_sql("""
+        UPDATE ai_jobs SET status = 'failed', error = 'Duplicate of an active job'
+        WHERE status IN ('pending', 'running') AND EXISTS (
+            SELECT 1 FROM ai_jobs AS other
+            WHERE other.user_id = ai_jobs.user_id
+              AND other.dedupe_key = ai_jobs.dedupe_key
+              AND other.status IN ('pending', 'running')
+              AND (other.created_at < ai_jobs.created_at
+                   OR (other.created_at = ai_jobs.created_at AND other.id < ai_jobs.id))
+        )
+    """)
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_ai_jobs_user_id_dedupe_key_active "
+        "ON ai_jobs (user_id, dedupe_key) WHERE status IN ('pending', 'running')"
+    )
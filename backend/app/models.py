@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, Boolean, ForeignKey, Text, Index, LargeBinary, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -12,11 +12,18 @@ class User(Base):
     hashed_password = Column(String)
     is_admin = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Bumped by every write to the user's workouts, metrics, rewards and
+    # notifications (see services/data_versions.py)
+    data_version = Column(Integer, nullable=False, default=0, server_default=text("0"))
     
     metrics = relationship("UserMetrics", back_populates="user", uselist=False, cascade="all, delete-orphan")
     workouts = relationship("Workout", back_populates="user", cascade="all, delete-orphan")
     notifications = relationship("Notification", back_populates="user", cascade="all, delete-orphan")
     rewards = relationship("Reward", back_populates="user", cascade="all, delete-orphan")
+    streak = relationship("UserStreak", back_populates="user", uselist=False, cascade="all, delete-orphan")
+    reward_progress = relationship("RewardProgress", back_populates="user", uselist=False, cascade="all, delete-orphan")
+    ai_jobs = relationship("AIJob", back_populates="user", cascade="all, delete-orphan")
+    metrics_history = relationship("MetricsEntry", back_populates="user", cascade="all, delete-orphan")
 
 
 class UserMetrics(Base):
@@ -37,8 +44,29 @@ class UserMetrics(Base):
     user = relationship("User", back_populates="metrics")
 
 
+class MetricsEntry(Base):
+    """Append-only snapshot of the body metrics, one row per profile update"""
+    __tablename__ = "metrics_history"
+    __table_args__ = (
+        Index("ix_metrics_history_user_id_recorded_at", "user_id", "recorded_at"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    recorded_at = Column(DateTime, default=datetime.utcnow)
+    weight = Column(Float)  # kg
+    bmi = Column(Float)
+    body_fat_percentage = Column(Float)
+    skeletal_muscle_mass = Column(Float)
+    
+    user = relationship("User", back_populates="metrics_history")
+
+
 class Workout(Base):
     __tablename__ = "workouts"
+    __table_args__ = (
+        Index("ix_workouts_user_id_date", "user_id", "date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -48,12 +76,26 @@ class Workout(Base):
     calories_burned = Column(Integer)
     notes = Column(Text)
     date = Column(DateTime, default=datetime.utcnow)
+    # Parsed from notes like "3x10 @ 60kg" when the workout is written
+    sets = Column(Integer, nullable=True)
+    reps = Column(Integer, nullable=True)
+    load_kg = Column(Float, nullable=True)
     
     user = relationship("User", back_populates="workouts")
 
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_user_id_created_at", "user_id", "created_at"),
+        # Covers only unread rows, so unread counts stay cheap however much
+        # history a user has
+        Index(
+            "ix_notifications_user_id_unread", "user_id",
+            sqlite_where=text("is_read = 0"),
+            postgresql_where=text("is_read = false")
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -66,11 +108,148 @@ class Notification(Base):
 
 class Reward(Base):
     __tablename__ = "rewards"
+    __table_args__ = (
+        Index("ix_rewards_user_id_earned_at", "user_id", "earned_at"),
+        # Each rule outcome is awarded once, which makes replays idempotent
+        Index("ux_rewards_user_id_code", "user_id", "code", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
+    code = Column(String, nullable=True)  # e.g. "workouts:10", "weekly_minutes:2024-03-04"
     title = Column(String)
     description = Column(Text)
     earned_at = Column(DateTime, default=datetime.utcnow)
     
-    user = relationship("User", back_populates="rewards")
\ No newline at end of file
+    user = relationship("User", back_populates="rewards")
+
+
+class UserStreak(Base):
+    __tablename__ = "user_streaks"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    current_run = Column(Integer, default=0)  # consecutive days ending at last_active_day
+    longest_run = Column(Integer, default=0)
+    last_active_day = Column(Date, nullable=True)
+    
+    user = relationship("User", back_populates="streak")
+
+
+class RewardProgress(Base):
+    __tablename__ = "reward_progress"
+    
+    # Running counters the reward rules are evaluated against, see services/rewards.py
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    workouts = Column(Integer, default=0)
+    prs = Column(Integer, default=0)  # workouts that set or raised a personal record
+    last_day = Column(Date, nullable=True)
+    day_run = Column(Integer, default=0)  # consecutive days ending at last_day
+    week_start = Column(Date, nullable=True)  # Monday of the week being summed
+    week_minutes = Column(Integer, default=0)
+    week_volume = Column(Float, default=0.0)  # sets x reps x load_kg
+    
+    user = relationship("User", back_populates="reward_progress")
+
+
+class AIResponseCacheEntry(Base):
+    __tablename__ = "ai_response_cache"
+    
+    key = Column(String, primary_key=True)  # sha256 of normalized prompt + user data fingerprint
+    response = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, index=True)
+
+
+class AIJob(Base):
+    __tablename__ = "ai_jobs"
+    __table_args__ = (
+        Index("ix_ai_jobs_user_id_dedupe_key", "user_id", "dedupe_key"),
+        # One active job per request, so concurrent submits cannot both insert
+        Index(
+            "ux_ai_jobs_user_id_dedupe_key_active", "user_id", "dedupe_key", unique=True,
+            sqlite_where=text("status IN ('pending', 'running')"),
+            postgresql_where=text("status IN ('pending', 'running')")
+        ),
+    )
+    
+    id = Column(String, primary_key=True)  # uuid4 hex
+    user_id = Column(Integer, ForeignKey("users.id"))
+    mode = Column(String)
+    prompt = Column(Text)
+    dedupe_key = Column(String)  # content hash of the prompt and user data
+    cache_key = Column(String, nullable=True)  # set for cacheable auto recommendations
+    status = Column(String, default="pending", index=True)  # pending, running, done, failed
+    result = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    worker_id = Column(String, nullable=True)  # queue that claimed the job
+    heartbeat_at = Column(DateTime, nullable=True)  # refreshed by that queue while running
+    
+    user = relationship("User", back_populates="ai_jobs")
+
+
+class Broadcast(Base):
+    __tablename__ = "broadcasts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    message = Column(Text)
+    # Segment filters; unset filters match every non-admin user
+    inactive_days = Column(Integer, nullable=True)  # no workout in the last N days
+    activity_level = Column(String, nullable=True)  # UserMetrics.activity_level
+    status = Column(String, default="pending")  # pending, running, done, failed
+    total_recipients = Column(Integer, nullable=True)
+    sent = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class PlatformStats(Base):
+    __tablename__ = "platform_stats"
+    
+    id = Column(Integer, primary_key=True)  # single row, id 1
+    total_users = Column(Integer, default=0)  # non-admin users
+    total_workouts = Column(Integer, default=0)
+    active_users = Column(Integer, default=0)  # non-admin users with at least one workout
+    total_minutes = Column(Integer, default=0)
+    total_calories = Column(Integer, default=0)
+    rebuilt_at = Column(DateTime, default=datetime.utcnow)
+
+
+class DailyStats(Base):
+    __tablename__ = "daily_stats"
+    
+    day = Column(Date, primary_key=True)
+    new_users = Column(Integer, default=0)  # non-admin registrations
+    workouts = Column(Integer, default=0)
+    active_users = Column(Integer, default=0)  # non-admin users with a workout that day
+    minutes = Column(Integer, default=0)
+    calories = Column(Integer, default=0)
+
+
+class ActivityBitmap(Base):
+    __tablename__ = "activity_bitmaps"
+    
+    # Users who logged a workout on `day`, one bit per user id. Ids are split
+    # into fixed-size chunks so a write rewrites a few KB, not the whole day.
+    day = Column(Date, primary_key=True)
+    chunk = Column(Integer, primary_key=True)
+    bits = Column(LargeBinary, nullable=False)  # trailing zero bytes trimmed
+
+
+class PersonalRecord(Base):
+    __tablename__ = "personal_records"
+    
+    # Best set per user and exercise (workout_type), ranked by reps x load.
+    # Maintained by mapper hooks on Workout, see services/strength.py
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    exercise = Column(String, primary_key=True)
+    weight = Column(Float)  # kg, 0 for bodyweight sets
+    reps = Column(Integer)
+    volume = Column(Float)  # reps x weight
+    max_weight = Column(Float)  # heaviest load logged for the exercise, kg
+    workout_id = Column(Integer)
+    achieved_at = Column(DateTime)
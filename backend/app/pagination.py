@@ -0,0 +1,104 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import false, or_
+from sqlalchemy.orm import Query, Session
+
+from .models import Notification, Workout
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_key(when: datetime, row_id: int) -> str:
+    """Opaque cursor pointing just past the row with key (when, row_id)"""
+    payload = json.dumps({"d": when.isoformat(), "i": row_id})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def encode_cursor(workout: Workout) -> str:
+    """Opaque cursor pointing just past a workout in (date, id) descending order"""
+    return encode_key(workout.date, workout.id)
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor from encode_cursor, rejecting anything malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["d"]), int(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def keyset_page(
+    query: Query,
+    time_column,
+    id_column,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0
+) -> Tuple[list, Optional[str]]:
+    """
+    Fetch one page of `query` in (time_column, id_column) descending order
+
+    Pages are keyed on the last row seen rather than an offset, so every
+    page is a seek on a (user_id, time) index and rows inserted meanwhile
+    cannot shift later pages. `skip` is the legacy offset, only honoured
+    without a cursor; it still costs O(skip).
+
+    Returns:
+        The rows and the cursor of the next page (None on the last page)
+    """
+    if cursor is not None:
+        after_time, after_id = decode_cursor(cursor)
+        # The redundant `time <=` bound lets the database seek the index
+        # instead of filtering every older row through the OR
+        query = query.filter(
+            time_column <= after_time,
+            or_(time_column < after_time, id_column < after_id)
+        )
+
+    query = query.order_by(time_column.desc(), id_column.desc())
+    if cursor is None and skip:
+        query = query.offset(skip)
+
+    # One extra row tells whether another page follows
+    rows = query.limit(limit + 1).all()
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = page[-1]
+        next_cursor = encode_key(getattr(last, time_column.key), getattr(last, id_column.key))
+    return page, next_cursor
+
+
+def workout_page(
+    db: Session,
+    user_id: int,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0
+) -> Tuple[List[Workout], Optional[str]]:
+    """Fetch one page of a user's workouts, newest first; see keyset_page"""
+    query = db.query(Workout).filter(Workout.user_id == user_id)
+    return keyset_page(query, Workout.date, Workout.id, limit, cursor, skip)
+
+
+def notification_page(
+    db: Session,
+    user_id: int,
+    limit: int,
+    cursor: Optional[str] = None,
+    unread_only: bool = False
+) -> Tuple[List[Notification], Optional[str]]:
+    """Fetch one page of a user's notifications, newest first; see keyset_page"""
+    query = db.query(Notification).filter(Notification.user_id == user_id)
+    if unread_only:
+        query = query.filter(Notification.is_read == false())
+    return keyset_page(query, Notification.created_at, Notification.id, limit, cursor)
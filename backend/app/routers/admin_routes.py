@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import List
+from typing import List, Optional
+from datetime import date, datetime, timedelta
 
-from ..database import get_db
-from ..models import User, Workout, Notification
-from ..schemas import UserResponse, NotificationCreate
-from ..auth import get_admin_user, get_current_user
+from ..database import get_async_db, get_db
+from ..models import User, Workout, Notification, DailyStats, Broadcast
+from ..schemas import UserResponse, NotificationCreate, BroadcastCreate
+from ..auth import get_admin_user, get_current_user, principal_cache
+from ..pagination import NEXT_CURSOR_HEADER, workout_page
+from ..services import analytics, engagement, workout_export
+from ..services.body_composition import recompute_body_composition
+from ..services.ai_cache import ai_response_cache
+from ..services.broadcasts import broadcast_response, broadcast_sender
 
 router = APIRouter()
 
@@ -40,6 +47,7 @@ def delete_user(
             detail="Cannot delete admin users"
         )
     
+    # Cached principals of the user are dropped by the User after_delete hook
     db.delete(user)
     db.commit()
     
@@ -73,42 +81,160 @@ def send_notification(
     
     return {"message": "Notification sent successfully"}
 
+
+@router.post("/notifications/broadcast", status_code=status.HTTP_202_ACCEPTED)
+async def broadcast_notification(
+    broadcast: BroadcastCreate,
+    background_tasks: BackgroundTasks,
+    admin: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Send a notification to every user in a segment (admin only)
+
+    Without filters every non-admin user is targeted; `inactive_days` and
+    `activity_level` narrow the segment. The fan-out runs in the background;
+    poll GET /admin/notifications/broadcasts/{broadcast_id} for progress.
+    """
+    new_broadcast = Broadcast(
+        message=broadcast.message,
+        inactive_days=broadcast.inactive_days,
+        activity_level=broadcast.activity_level,
+        status="pending",
+        sent=0,
+        created_by=admin.id,
+        created_at=datetime.utcnow()
+    )
+    db.add(new_broadcast)
+    await db.commit()
+
+    background_tasks.add_task(broadcast_sender.run, new_broadcast.id)
+    return broadcast_response(new_broadcast)
+
+
+@router.get("/notifications/broadcasts/{broadcast_id}")
+async def get_broadcast(
+    broadcast_id: int,
+    admin: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the progress of a broadcast (admin only)"""
+    broadcast = await db.get(Broadcast, broadcast_id)
+    if broadcast is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Broadcast not found"
+        )
+    return broadcast_response(broadcast)
+
 @router.get("/users/{user_id}/workouts")
-def get_user_workouts(user_id:int,db: Session = Depends(get_db),current_user: User = Depends(get_current_user)):
+def get_user_workouts(
+    user_id: int,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get one page of a user's workouts, newest first; see X-Next-Cursor (admin only)"""
     if not current_user.is_admin:
         raise HTTPException(status_code=403,detail="Admin access required")
-    workouts = (
-        db.query(Workout).filter(Workout.user_id == user_id)
-        .order_by(Workout.date.desc())
-        .all()
-    )
+    workouts, next_cursor = workout_page(db, user_id, limit, cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return workouts
 
+@router.get("/users/{user_id}/workouts/export")
+async def export_user_workouts(
+    user_id: int,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    admin: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Download one user's full workout history as CSV or NDJSON (admin only)"""
+    return workout_export.export_response(db, format, f"user-{user_id}-workouts", user_id)
+
+@router.get("/workouts/export")
+async def export_all_workouts(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    admin: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Download every user's workouts, with a user_id column, as CSV or NDJSON (admin only)"""
+    return workout_export.export_response(db, format, "all-workouts")
+
 @router.get("/analytics")
 def get_analytics(admin: User = Depends(get_admin_user), db: Session = Depends(get_db)):
     """Get platform analytics (admin only)"""
-    # Total users (excluding admins)
-    total_users = db.query(User).filter(User.is_admin == False).count()
-    
-    # Total workouts
-    total_workouts = db.query(Workout).count()
-    
-    # Active users (users who have logged at least one workout)
-    active_users = db.query(User).join(Workout).filter(
-        User.is_admin == False
-    ).distinct().count()
-    
-    # Average workouts per user
-    avg_workouts = db.query(func.count(Workout.id)).scalar() / max(total_users, 1)
+    # Maintained incrementally by the write paths, see services/analytics.py
+    stats = analytics.get_platform_stats(db)
     
     return {
-        "total_users": total_users,
-        "total_workouts": total_workouts,
-        "active_users": active_users,
-        "average_workouts_per_user": round(avg_workouts, 2)
+        "total_users": stats.total_users,
+        "total_workouts": stats.total_workouts,
+        "active_users": stats.active_users,
+        "average_workouts_per_user": round(stats.total_workouts / max(stats.total_users, 1), 2),
+        "total_workout_minutes": stats.total_minutes,
+        "total_calories_burned": stats.total_calories
     }
 
 
+@router.get("/analytics/daily")
+def get_daily_analytics(
+    days: int = 30,
+    admin: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Get per-day new users, workouts, active users, minutes and calories (admin only)"""
+    analytics.ensure_rollups(db)
+    since = date.today() - timedelta(days=days - 1)
+    rows = db.query(DailyStats).filter(DailyStats.day >= since).order_by(DailyStats.day).all()
+    
+    return [
+        {
+            "day": row.day,
+            "new_users": row.new_users,
+            "workouts": row.workouts,
+            "active_users": row.active_users,
+            "minutes": row.minutes,
+            "calories": row.calories
+        }
+        for row in rows
+    ]
+
+
+@router.get("/analytics/engagement")
+def get_engagement(
+    days: int = Query(30, ge=1, le=365),
+    admin: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Get per-day DAU, WAU, MAU and stickiness from the activity bitmaps (admin only)"""
+    return engagement.engagement_series(db, days)
+
+
+@router.get("/analytics/retention")
+def get_retention(
+    weeks: int = Query(8, ge=1, le=52),
+    admin: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Get weekly retention cohorts by week of first workout (admin only)"""
+    return engagement.retention_cohorts(db, weeks)
+
+
+@router.post("/analytics/rebuild")
+def rebuild_analytics(admin: User = Depends(get_admin_user), db: Session = Depends(get_db)):
+    """Recompute the analytics rollups from scratch (admin only)"""
+    stats = analytics.rebuild_rollups(db)
+    return {"message": "Analytics rebuilt", "rebuilt_at": stats.rebuilt_at}
+
+
+@router.post("/metrics/recompute")
+def recompute_metrics(admin: User = Depends(get_admin_user), db: Session = Depends(get_db)):
+    """Recompute every user's derived body metrics with the current formulas (admin only)"""
+    return recompute_body_composition(db)
+
 @router.get("/users/{user_id}/stats")
 def get_user_stats(
     user_id: int,
@@ -124,23 +250,29 @@ def get_user_stats(
             detail="User not found"
         )
     
-    # Get workout count
-    workout_count = db.query(Workout).filter(Workout.user_id == user_id).count()
-    
-    # Get total calories burned
-    total_calories = db.query(func.sum(Workout.calories_burned)).filter(
-        Workout.user_id == user_id
-    ).scalar() or 0
-    
-    # Get total workout time
-    total_time = db.query(func.sum(Workout.duration)).filter(
-        Workout.user_id == user_id
-    ).scalar() or 0
+    # Count and totals in one pass over the user's workouts
+    workout_count, total_calories, total_time = db.query(
+        func.count(Workout.id),
+        func.sum(Workout.calories_burned),
+        func.sum(Workout.duration)
+    ).filter(Workout.user_id == user_id).one()
     
     return {
         "user_id": user_id,
         "username": user.username,
         "total_workouts": workout_count,
-        "total_calories_burned": total_calories,
-        "total_workout_minutes": total_time
-    }
\ No newline at end of file
+        "total_calories_burned": total_calories or 0,
+        "total_workout_minutes": total_time or 0
+    }
+
+
+@router.get("/auth-cache")
+def get_auth_cache_stats(admin: User = Depends(get_admin_user)):
+    """Get principal cache size and hit rates (admin only)"""
+    return principal_cache.stats()
+
+
+@router.get("/ai-cache")
+def get_ai_cache_stats(admin: User = Depends(get_admin_user)):
+    """Get AI response cache size and hit rates (admin only)"""
+    return ai_response_cache.stats()
@@ -1,48 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import json
 
-from ..database import get_db
-from ..models import User, UserMetrics, Workout
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import get_async_db
+from ..models import AIJob, User, UserMetrics, Workout
 from ..schemas import AIRequest
 from ..auth import get_current_user
 from ..services import generate_text
+from ..services.ai_cache import ai_response_cache, cache_key, user_fingerprint
+from ..services.ai_jobs import ai_job_queue
+from ..services.gemini_client import GeminiTimeoutError, stream_text
+from ..services.progress import progress_cache, progress_summary
 
 router = APIRouter()
 
 
-@router.post("/recommendations")
-async def get_ai_recommendations(
-    request: AIRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    try:
-        metrics = db.query(UserMetrics).filter(
-            UserMetrics.user_id == current_user.id
-        ).first()
+CUSTOM_PROMPT_EXCLUDED = [
+    "",
+    "Generate personalized workout and diet recommendations",
+]
 
-        recent_workouts = db.query(Workout).filter(
-            Workout.user_id == current_user.id
-        ).order_by(Workout.date.desc()).limit(5).all()
 
-        # -------------------------
-        # MODE 1: ASK ANYTHING
-        # -------------------------
-        if request.prompt and request.prompt.strip() not in [
-            "",
-            "Generate personalized workout and diet recommendations",
-        ]:
-            ai_response = generate_text(request.prompt)
+def is_custom_prompt(prompt: str) -> bool:
+    """True when the user asked their own question rather than for a plan"""
+    return bool(prompt) and prompt.strip() not in CUSTOM_PROMPT_EXCLUDED
 
-            return {
-                "ai_response": ai_response,
-                "mode": "ask_anything"
-            }
 
-        # -------------------------
-        # MODE 2: AUTO RECOMMENDATION
-        # -------------------------
-        auto_prompt = f"""
+async def load_recommendation_context(db: AsyncSession, user_id: int):
+    """Load the metrics and last five workouts a recommendation is based on"""
+    metrics = (await db.execute(
+        select(UserMetrics).where(UserMetrics.user_id == user_id)
+    )).scalars().first()
+
+    recent_workouts = (await db.execute(
+        select(Workout).where(
+            Workout.user_id == user_id
+        ).order_by(Workout.date.desc()).limit(5)
+    )).scalars().all()
+
+    return metrics, recent_workouts
+
+
+def build_recommendation_prompt(metrics, recent_workouts) -> str:
+    return f"""
 You are a professional fitness coach and nutritionist.
 
 USER PROFILE:
@@ -64,13 +67,51 @@ TASK:
 Use headings and bullet points.
 """
 
-        ai_response = generate_text(auto_prompt)
+
+@router.post("/recommendations")
+async def get_ai_recommendations(
+    request: AIRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        # -------------------------
+        # MODE 1: ASK ANYTHING
+        # -------------------------
+        if is_custom_prompt(request.prompt):
+            ai_response = await generate_text(request.prompt)
+
+            return {
+                "ai_response": ai_response,
+                "mode": "ask_anything"
+            }
+
+        # -------------------------
+        # MODE 2: AUTO RECOMMENDATION
+        # -------------------------
+        metrics, recent_workouts = await load_recommendation_context(db, current_user.id)
+        auto_prompt = build_recommendation_prompt(metrics, recent_workouts)
+
+        # Same prompt and unchanged metrics/workouts: reuse the last answer
+        key = cache_key(auto_prompt, user_fingerprint(metrics, recent_workouts))
+        ai_response = await ai_response_cache.get(db, key)
+        cached = ai_response is not None
+
+        if not cached:
+            ai_response = await generate_text(auto_prompt)
+            await ai_response_cache.set(db, key, ai_response)
 
         return {
             "ai_response": ai_response,
-            "mode": "auto_recommendation"
+            "mode": "auto_recommendation",
+            "cached": cached
         }
 
+    except GeminiTimeoutError as e:
+        raise HTTPException(
+            status_code=504,
+            detail=f"AI generation timed out: {str(e)}"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -78,36 +119,154 @@ Use headings and bullet points.
         )
 
 
+def sse_event(event: str, data: dict) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-@router.get("/progress-analysis")
-async def analyze_progress(
-    days: int = 30,
+
+@router.post("/recommendations/stream")
+async def stream_ai_recommendations(
+    request: AIRequest,
+    http_request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    from datetime import datetime, timedelta
+    """
+    Stream AI recommendations as server-sent events
 
-    start_date = datetime.utcnow() - timedelta(days=days)
+    Emits `chunk` events ({"text": ...}) as Gemini produces output, then one
+    `done` event ({"mode": ..., "cached": ...}), or an `error` event if
+    generation fails. Generation stops when the client disconnects.
+    """
+    if is_custom_prompt(request.prompt):
+        mode, prompt, key = "ask_anything", request.prompt, None
+        cached_response = None
+    else:
+        metrics, recent_workouts = await load_recommendation_context(db, current_user.id)
+        mode = "auto_recommendation"
+        prompt = build_recommendation_prompt(metrics, recent_workouts)
+        key = cache_key(prompt, user_fingerprint(metrics, recent_workouts))
+        cached_response = await ai_response_cache.get(db, key)
 
-    workouts = db.query(Workout).filter(
-        Workout.user_id == current_user.id,
-        Workout.date >= start_date
-    ).all()
+    async def events():
+        if cached_response is not None:
+            yield sse_event("chunk", {"text": cached_response})
+            yield sse_event("done", {"mode": mode, "cached": True})
+            return
 
-    if not workouts:
-        return {
-            "message": "No workout data available",
-            "days_analyzed": days
-        }
+        chunks = []
+        upstream = stream_text(prompt)
+        try:
+            async for chunk in upstream:
+                if await http_request.is_disconnected():
+                    return
+                chunks.append(chunk)
+                yield sse_event("chunk", {"text": chunk})
+        except GeminiTimeoutError as e:
+            yield sse_event("error", {"status": 504, "detail": f"AI generation timed out: {str(e)}"})
+            return
+        except Exception as e:
+            yield sse_event("error", {"status": 500, "detail": f"AI generation failed: {str(e)}"})
+            return
+        finally:
+            # Cancels the upstream call if the stream ended early
+            await upstream.aclose()
+
+        if key is not None:
+            # The request's session is closed by the time the body streams
+            async with ai_response_cache.session_factory() as cache_db:
+                await ai_response_cache.set(cache_db, key, "".join(chunks))
+        yield sse_event("done", {"mode": mode, "cached": False})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-    total_workouts = len(workouts)
-    total_minutes = sum(w.duration for w in workouts)
-    total_calories = sum(w.calories_burned for w in workouts)
 
-    return {
-        "period": f"{days} days",
-        "total_workouts": total_workouts,
-        "total_minutes": total_minutes,
-        "total_calories_burned": total_calories,
-        "consistency_score": min(100, (total_workouts / days) * 100),
+def job_response(job: AIJob) -> dict:
+    """Public view of a job; the result is only present once it is done"""
+    response = {
+        "job_id": job.id,
+        "status": job.status,
+        "mode": job.mode,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at
     }
+    if job.status == "done":
+        response["ai_response"] = job.result
+    if job.status == "failed":
+        response["error"] = job.error
+    return response
+
+
+@router.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def submit_ai_job(
+    request: AIRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Queue an AI generation and return its job id immediately
+
+    An identical pending or running job of the same user is returned
+    instead of queuing a duplicate. Poll GET /ai/jobs/{job_id} for the result.
+    """
+    if is_custom_prompt(request.prompt):
+        mode, prompt = "ask_anything", request.prompt
+        dedupe_key, result_cache_key = cache_key(prompt), None
+    else:
+        metrics, recent_workouts = await load_recommendation_context(db, current_user.id)
+        mode = "auto_recommendation"
+        prompt = build_recommendation_prompt(metrics, recent_workouts)
+        dedupe_key = result_cache_key = cache_key(prompt, user_fingerprint(metrics, recent_workouts))
+
+    job, created = await ai_job_queue.submit(
+        db, current_user.id, mode, prompt, dedupe_key, result_cache_key
+    )
+    return {**job_response(job), "deduplicated": not created}
+
+
+@router.get("/jobs/{job_id}")
+async def get_ai_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get the status of an AI job, including its result once done"""
+    job = await db.get(AIJob, job_id)
+
+    if job is None or job.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+
+    return job_response(job)
+
+
+@router.get("/progress-analysis")
+async def analyze_progress(
+    days: int = Query(30, ge=1, le=3650),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Summarize the last `days` days of workouts
+
+    Besides the totals, returns `daily` and `weekly` (Monday-based) buckets
+    and per workout_type / intensity breakdowns. Summaries are cached per
+    user and window until the user's workouts change.
+    """
+    summary = progress_cache.get(current_user.id, days)
+    if summary is None:
+        summary = await progress_summary(db, current_user.id, days)
+        if summary is None:
+            return {
+                "message": "No workout data available",
+                "days_analyzed": days
+            }
+        progress_cache.set(current_user.id, days, summary)
+
+    return summary
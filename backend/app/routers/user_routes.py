@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import false, func, update
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
 from ..database import get_db
-from ..models import User, UserMetrics, Notification
-from ..schemas import MetricsCreate, MetricsResponse, NotificationResponse
+from ..models import User, UserMetrics, Notification, MetricsEntry
+from ..schemas import MetricsCreate, MetricsResponse, NotificationResponse, NotificationsMarkRead
 from ..auth import get_current_user
+from ..conditional import user_etag
+from ..pagination import NEXT_CURSOR_HEADER, notification_page
+from ..services import data_versions, metrics_trends
 from ..utils import calculate_bmi, calculate_body_fat, calculate_skeletal_muscle
 
 router = APIRouter()
@@ -53,13 +57,23 @@ def create_or_update_metrics(
         )
         db.add(db_metrics)
     
+    # Keep every update so trends can be charted
+    db.add(MetricsEntry(
+        user_id=current_user.id,
+        recorded_at=datetime.utcnow(),
+        weight=metrics.weight,
+        bmi=bmi,
+        body_fat_percentage=body_fat,
+        skeletal_muscle_mass=muscle_mass
+    ))
+    
     db.commit()
     db.refresh(db_metrics)
     
     return db_metrics
 
 
-@router.get("/metrics", response_model=MetricsResponse)
+@router.get("/metrics", response_model=MetricsResponse, dependencies=[Depends(user_etag)])
 def get_metrics(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Get user fitness metrics"""
     metrics = db.query(UserMetrics).filter(UserMetrics.user_id == current_user.id).first()
@@ -73,16 +87,87 @@ def get_metrics(current_user: User = Depends(get_current_user), db: Session = De
     return metrics
 
 
-@router.get("/notifications", response_model=List[NotificationResponse])
-def get_notifications(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    """Get user notifications"""
-    notifications = db.query(Notification).filter(
-        Notification.user_id == current_user.id
-    ).order_by(Notification.created_at.desc()).all()
+@router.get("/metrics/history")
+def get_metrics_history(
+    metric: str = Query("weight", pattern="^(" + "|".join(metrics_trends.METRICS) + ")$"),
+    days: Optional[int] = Query(None, ge=1),
+    window_days: int = Query(7, ge=1, le=365),
+    goal: Optional[float] = None,
+    max_points: int = Query(200, ge=2, le=5000),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the history of one body metric with its trend
+
+    Returns the points of the last `days` days (all by default) with a
+    `window_days` rolling average, the current rate of change per week and,
+    when a `goal` is given, the date the trend reaches it.
+    """
+    return metrics_trends.metric_trend(
+        db, current_user.id, metric, days, window_days, goal, max_points
+    )
+
+
+@router.get("/notifications", response_model=List[NotificationResponse], dependencies=[Depends(user_etag)])
+def get_notifications(
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    unread_only: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get user notifications, newest first
+
+    Pass the X-Next-Cursor header of a response as `cursor` to get the next
+    page; the header is absent on the last page.
+    """
+    notifications, next_cursor = notification_page(db, current_user.id, limit, cursor, unread_only)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     
     return notifications
 
 
+def count_unread(db: Session, user_id: int) -> int:
+    # Matches the partial index ix_notifications_user_id_unread
+    return db.query(func.count(Notification.id)).filter(
+        Notification.user_id == user_id,
+        Notification.is_read == false()
+    ).scalar()
+
+
+@router.get("/notifications/unread-count")
+def get_unread_count(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Get the number of unread notifications"""
+    return {"unread": count_unread(db, current_user.id)}
+
+
+@router.put("/notifications/read")
+def mark_notifications_read(
+    request: NotificationsMarkRead,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Mark the given notifications, or all of them when `ids` is omitted, as read"""
+    query = update(Notification).where(
+        Notification.user_id == current_user.id,
+        Notification.is_read == false()
+    )
+    if request.ids is not None:
+        query = query.where(Notification.id.in_(request.ids))
+    
+    updated = db.execute(query.values(is_read=True)).rowcount
+    if updated:
+        # Core updates bypass the Notification mapper hooks
+        data_versions.touch(db, [current_user.id])
+    db.commit()
+    
+    return {"updated": updated, "unread": count_unread(db, current_user.id)}
+
+
 @router.put("/notifications/{notification_id}/read")
 def mark_notification_read(
     notification_id: int,
@@ -94,37 +94,6 @@
 #         "current_streak": current_streak,
 #         "longest_streak": longest_streak
 #     }
-# @router.get("/prs")
-# def get_strength_prs(
-#     current_user: User = Depends(get_current_user),
-#     db: Session = Depends(get_db)
-# ):
-#     workouts = db.query(Workout).filter(
-#         Workout.user_id == current_user.id,
-#         Workout.notes.isnot(None)
-#     ).all()
-
-#     prs = {}
-
-#     for w in workouts:
-#         try:
-#             sets_reps, weight_part = w.notes.split("@")
-#             reps = int(sets_reps.split("x")[1])
-#             weight = float(weight_part.replace("kg", "").strip())
-#             volume = reps * weight
-
-#             if w.workout_type not in prs or prs[w.workout_type]["volume"] < volume:
-#                 prs[w.workout_type] = {
-#                     "weight": weight,
-#                     "reps": reps,
-#                     "volume": volume
-#                 }
-#         except:
-#             continue
-
-#     return prs
-
-
 # @router.get("/rewards", response_model=List[RewardResponse])
 # def get_rewards(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
 #     """Get user rewards"""
@@ -136,14 +105,18 @@
 
 # backend/app/routers/workout_routes.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime, date, timedelta, timezone
-from ..database import get_db
-from ..models import User, Workout
-from ..schemas import WorkoutCreate, WorkoutResponse
+from ..database import get_async_db, get_db
+from ..models import PersonalRecord, User, Workout
+from ..schemas import PersonalRecordResponse, WorkoutCreate, WorkoutResponse
 from ..auth import get_current_user
+from ..conditional import daily_user_etag, user_etag
+from ..pagination import NEXT_CURSOR_HEADER, workout_page
+from ..services import rewards, streaks, strength, workout_export, workout_import
 
 router = APIRouter()
 
@@ -163,29 +136,80 @@ def create_workout(
         intensity=workout.intensity,
         calories_burned=workout.calories_burned,
         notes=workout.notes,
-        date=datetime.now(timezone.utc)
+        date=datetime.now(timezone.utc),
+        **strength.parse_sets(workout.notes)
     )
     
     db.add(new_workout)
+    db.flush()
+    streaks.record_workout_day(db, current_user.id, new_workout.date.date())
+    rewards.record_workout(db, new_workout)
     db.commit()
     db.refresh(new_workout)
     
     return new_workout
 
-@router.get("/workouts", response_model=List[WorkoutResponse])
+@router.get("/workouts", response_model=List[WorkoutResponse], dependencies=[Depends(user_etag)])
 def get_workouts(
+    response: Response,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get all workouts for the current user"""
-    workouts = db.query(Workout).filter(
-        Workout.user_id == current_user.id
-    ).order_by(Workout.date.desc()).offset(skip).limit(limit).all()
+    """
+    Get workouts for the current user, newest first
+
+    Pass the X-Next-Cursor header of a response as `cursor` to get the next
+    page; the header is absent on the last page.
+    """
+    workouts, next_cursor = workout_page(db, current_user.id, limit, cursor, skip)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     
     return workouts
 
+@router.post("/workouts/import")
+async def import_workouts(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Bulk import workouts from a CSV (with header row) or NDJSON request body
+
+    The body is read as a stream and rows are inserted in batches, so large
+    histories import without being held in memory. Invalid rows are skipped
+    and reported by row number; valid rows are imported either way.
+    """
+    file_format = format
+    if file_format is None:
+        content_type = request.headers.get("content-type", "")
+        if "csv" in content_type:
+            file_format = "csv"
+        elif "ndjson" in content_type or "jsonlines" in content_type:
+            file_format = "ndjson"
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson"
+            )
+
+    return await workout_import.import_workouts(
+        db, current_user.id, request.stream(), file_format
+    )
+
+@router.get("/workouts/export")
+async def export_workouts(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Download the current user's full workout history as CSV or NDJSON, oldest first"""
+    return workout_export.export_response(db, format, "workouts", current_user.id)
+
 @router.get("/workouts/today", response_model=List[WorkoutResponse])
 def get_today_workouts(
     current_user: User = Depends(get_current_user),
@@ -226,6 +250,9 @@ def update_workout(
     workout.intensity = workout_data.intensity
     workout.calories_burned = workout_data.calories_burned
     workout.notes = workout_data.notes
+    for field, value in strength.parse_sets(workout_data.notes).items():
+        setattr(workout, field, value)
+    # The workout date is not editable, so the streak state is unaffected
     
     db.commit()
     db.refresh(workout)
@@ -250,70 +277,35 @@ def delete_workout(
             detail="Workout not found"
         )
     
+    workout_day = workout.date.date()
     db.delete(workout)
+    db.flush()
+    streaks.remove_workout_day(db, current_user.id, workout_day)
     db.commit()
     
     return {"message": "Workout deleted successfully"}
 
-@router.get("/streaks")
+@router.get("/streaks", dependencies=[Depends(daily_user_etag)])
 def get_streak(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Calculate current and longest workout streaks based on unique days with workouts"""
-    workouts = db.query(Workout).filter(
-        Workout.user_id == current_user.id
-    ).order_by(Workout.date.desc()).all()
-    
-    if not workouts:
-        return {
-            "current_streak": 0,
-            "longest_streak": 0
-        }
-    
-    # Get unique workout dates
-    workout_dates = set()
-    for workout in workouts:
-        workout_date = workout.date.date()
-        workout_dates.add(workout_date)
-    
-    # Sort dates in descending order
-    sorted_dates = sorted(workout_dates, reverse=True)
-    
-    # Calculate current streak
-    current_streak = 0
-    today = date.today()
-    check_date = today
-    
-    for workout_date in sorted_dates:
-        if workout_date == check_date:
-            current_streak += 1
-            check_date = check_date - timedelta(days=1)
-        elif workout_date < check_date:
-            # Gap in streak
-            break
-    
-    # Calculate longest streak
-    longest_streak = 0
-    temp_streak = 1
-    sorted_dates_asc = sorted(workout_dates)
-    
-    for i in range(1, len(sorted_dates_asc)):
-        diff = (sorted_dates_asc[i] - sorted_dates_asc[i-1]).days
-        if diff == 1:
-            temp_streak += 1
-            longest_streak = max(longest_streak, temp_streak)
-        else:
-            temp_streak = 1
-    
-    longest_streak = max(longest_streak, temp_streak)
-    
-    return {
-        "current_streak": current_streak,
-        "longest_streak": longest_streak
-    }
+    """Get current and longest workout streaks based on unique days with workouts"""
+    state = streaks.get_streak_state(db, current_user.id)
+    return streaks.streak_response(state)
+
+@router.get("/prs", response_model=List[PersonalRecordResponse])
+def get_personal_records(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the best set (reps x load) and heaviest load per exercise"""
+    # Maintained on every workout write, see services/strength.py
+    return db.query(PersonalRecord).filter(
+        PersonalRecord.user_id == current_user.id
+    ).order_by(PersonalRecord.exercise).all()
 
-@router.get("/rewards")
+@router.get("/rewards", dependencies=[Depends(user_etag)])
 def get_rewards(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
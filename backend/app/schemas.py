@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 # User Schemas
 class UserCreate(BaseModel):
@@ -53,6 +53,10 @@ class WorkoutCreate(BaseModel):
     notes: Optional[str] = None
 
 
+class WorkoutImportRow(WorkoutCreate):
+    date: Optional[datetime] = None  # defaults to the time of import
+
+
 class WorkoutResponse(BaseModel):
     id: int
     workout_type: str
@@ -61,6 +65,22 @@ class WorkoutResponse(BaseModel):
     calories_burned: int
     notes: Optional[str]
     date: datetime
+    sets: Optional[int] = None
+    reps: Optional[int] = None
+    load_kg: Optional[float] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class PersonalRecordResponse(BaseModel):
+    exercise: str
+    weight: float
+    reps: int
+    volume: float
+    max_weight: float
+    workout_id: int
+    achieved_at: datetime
     
     class Config:
         from_attributes = True
@@ -72,6 +92,16 @@ class NotificationCreate(BaseModel):
     message: str
 
 
+class BroadcastCreate(BaseModel):
+    message: str
+    inactive_days: Optional[int] = Field(None, ge=1)
+    activity_level: Optional[str] = None
+
+
+class NotificationsMarkRead(BaseModel):
+    ids: Optional[List[int]] = None  # omitted marks every notification read
+
+
 class NotificationResponse(BaseModel):
     id: int
     message: str
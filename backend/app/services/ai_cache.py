@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import AsyncSessionLocal
+from ..models import AIResponseCacheEntry, UserMetrics, Workout
+
+AI_CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", "256"))
+AI_CACHE_TTL_SECONDS = float(os.getenv("AI_CACHE_TTL_SECONDS", "3600"))
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace and case so cosmetic prompt edits share a key"""
+    return " ".join(prompt.split()).lower()
+
+
+def user_fingerprint(metrics: Optional[UserMetrics], recent_workouts: Iterable[Workout]) -> str:
+    """Fingerprint the metrics and recent workouts a recommendation is built from"""
+    data = {
+        "metrics": None if metrics is None else [
+            metrics.age, metrics.gender, metrics.height, metrics.weight,
+            metrics.bmi, metrics.activity_level
+        ],
+        "workouts": [
+            [w.id, w.workout_type, w.duration, w.intensity] for w in recent_workouts
+        ]
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def cache_key(prompt: str, fingerprint: str = "") -> str:
+    """Content address of a prompt together with the user data behind it"""
+    return hashlib.sha256(f"{normalize_prompt(prompt)}\n{fingerprint}".encode()).hexdigest()
+
+
+class AIResponseCache:
+    """
+    Two-tier TTL cache of AI responses keyed by content hash
+
+    An in-process LRU tier answers repeat requests without touching the
+    database. Misses fall through to the ai_response_cache table, which
+    keeps responses across restarts and refills the memory tier.
+    session_factory opens sessions for writers that outlive their request,
+    such as the streaming endpoint.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 3600.0, session_factory=AsyncSessionLocal):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.session_factory = session_factory
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, db: AsyncSession, key: str) -> Optional[str]:
+        """Return a cached response, checking memory before the database"""
+        now = datetime.utcnow()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+
+        row = await db.get(AIResponseCacheEntry, key)
+        if row is None or row.expires_at <= now:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.db_hits += 1
+            self._remember(key, row.response, row.expires_at)
+        return row.response
+
+    async def set(self, db: AsyncSession, key: str, response: str):
+        """Store a response in both tiers and drop expired database rows"""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl)
+
+        with self._lock:
+            self._remember(key, response, expires_at)
+
+        await db.execute(delete(AIResponseCacheEntry).where(AIResponseCacheEntry.expires_at <= now))
+        await db.merge(AIResponseCacheEntry(
+            key=key,
+            response=response,
+            created_at=now,
+            expires_at=expires_at
+        ))
+        await db.commit()
+
+    def clear(self):
+        """Drop the memory tier and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.memory_hits = self.db_hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """Return size and hit-rate counters for both tiers"""
+        with self._lock:
+            hits = self.memory_hits + self.db_hits
+            lookups = hits + self.misses
+            return {
+                "memory_size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions
+            }
+
+    def _remember(self, key: str, response: str, expires_at: datetime):
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = (expires_at, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+ai_response_cache = AIResponseCache(maxsize=AI_CACHE_SIZE, ttl=AI_CACHE_TTL_SECONDS)
@@ -0,0 +1,249 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import AsyncSessionLocal
+from ..models import AIJob
+from .ai_cache import ai_response_cache
+from .gemini_client import generate_text
+
+AI_JOB_WORKERS = int(os.getenv("AI_JOB_WORKERS", "2"))
+AI_JOB_HEARTBEAT_SECONDS = float(os.getenv("AI_JOB_HEARTBEAT_SECONDS", "15"))
+AI_JOB_STALE_SECONDS = float(os.getenv("AI_JOB_STALE_SECONDS", "120"))
+AI_JOB_RETENTION_HOURS = float(os.getenv("AI_JOB_RETENTION_HOURS", "24"))
+
+ACTIVE_STATUSES = ("pending", "running")
+FINISHED_STATUSES = ("done", "failed")
+
+
+class AIJobQueue:
+    """
+    In-process AI generation queue backed by the ai_jobs table
+
+    Jobs are persisted before they are queued, so the table is the source
+    of truth: the asyncio queue only carries job ids to a fixed pool of
+    worker tasks. No external broker is needed.
+
+    Several processes may share the table. A job is claimed atomically by
+    one queue, which records itself as the job's worker and refreshes its
+    heartbeat while the job runs; running jobs whose heartbeat has gone
+    stale belonged to a process that died and are queued again. Finished
+    jobs are deleted after the retention period.
+    """
+
+    def __init__(
+        self,
+        workers: int = AI_JOB_WORKERS,
+        session_factory=AsyncSessionLocal,
+        heartbeat_seconds: float = AI_JOB_HEARTBEAT_SECONDS,
+        stale_seconds: float = AI_JOB_STALE_SECONDS,
+        retention_hours: float = AI_JOB_RETENTION_HOURS
+    ):
+        self.workers = workers
+        self.session_factory = session_factory
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_seconds = stale_seconds
+        self.retention_hours = retention_hours
+        self.worker_id = uuid.uuid4().hex
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return self._queue is not None
+
+    async def start(self):
+        """Start the workers and queue pending jobs and stale running ones"""
+        self._queue = asyncio.Queue()
+        await self.reclaim_stale()
+        async with self.session_factory() as db:
+            pending = (await db.execute(
+                select(AIJob.id).where(AIJob.status == "pending").order_by(AIJob.created_at)
+            )).scalars().all()
+        for job_id in pending:
+            self._queue.put_nowait(job_id)
+
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._maintain()))
+
+    async def stop(self):
+        """Cancel the workers and hand their unfinished jobs back as pending"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        async with self.session_factory() as db:
+            await db.execute(
+                update(AIJob)
+                .where(AIJob.worker_id == self.worker_id, AIJob.status == "running")
+                .values(status="pending", worker_id=None, started_at=None, heartbeat_at=None)
+            )
+            await db.commit()
+
+    async def join(self):
+        """Wait until every queued job has been processed"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def submit(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        mode: str,
+        prompt: str,
+        dedupe_key: str,
+        cache_key: Optional[str] = None
+    ) -> Tuple[AIJob, bool]:
+        """
+        Persist and queue a job, reusing an identical active job of the same user
+
+        Returns:
+            The job and whether it was newly created
+        """
+        existing = await self._active_job(db, user_id, dedupe_key)
+        if existing is not None:
+            return existing, False
+
+        job = AIJob(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            mode=mode,
+            prompt=prompt,
+            dedupe_key=dedupe_key,
+            cache_key=cache_key,
+            status="pending",
+            created_at=datetime.utcnow()
+        )
+        db.add(job)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # A concurrent submit inserted the same active job first
+            await db.rollback()
+            existing = await self._active_job(db, user_id, dedupe_key)
+            if existing is None:
+                raise
+            return existing, False
+
+        if self._queue is not None:
+            self._queue.put_nowait(job.id)
+        return job, True
+
+    async def reclaim_stale(self) -> List[str]:
+        """
+        Return running jobs whose worker stopped heartbeating to pending
+
+        Returns:
+            The reclaimed job ids, which are queued here if the queue is running
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=self.stale_seconds)
+        async with self.session_factory() as db:
+            reclaimed = (await db.execute(
+                update(AIJob)
+                .where(
+                    AIJob.status == "running",
+                    or_(AIJob.heartbeat_at.is_(None), AIJob.heartbeat_at < cutoff)
+                )
+                .values(status="pending", worker_id=None, started_at=None, heartbeat_at=None)
+                .returning(AIJob.id)
+                .execution_options(synchronize_session=False)
+            )).scalars().all()
+            await db.commit()
+        if self._queue is not None:
+            for job_id in reclaimed:
+                self._queue.put_nowait(job_id)
+        return reclaimed
+
+    async def prune(self) -> int:
+        """Delete jobs that finished longer ago than the retention period"""
+        cutoff = datetime.utcnow() - timedelta(hours=self.retention_hours)
+        async with self.session_factory() as db:
+            deleted = (await db.execute(
+                delete(AIJob)
+                .where(AIJob.status.in_(FINISHED_STATUSES), AIJob.finished_at < cutoff)
+                .execution_options(synchronize_session=False)
+            )).rowcount
+            await db.commit()
+        return deleted
+
+    async def _active_job(self, db: AsyncSession, user_id: int, dedupe_key: str) -> Optional[AIJob]:
+        return (await db.execute(
+            select(AIJob).where(
+                AIJob.user_id == user_id,
+                AIJob.dedupe_key == dedupe_key,
+                AIJob.status.in_(ACTIVE_STATUSES)
+            )
+        )).scalars().first()
+
+    async def _heartbeat(self):
+        async with self.session_factory() as db:
+            await db.execute(
+                update(AIJob)
+                .where(AIJob.worker_id == self.worker_id, AIJob.status == "running")
+                .values(heartbeat_at=datetime.utcnow())
+            )
+            await db.commit()
+
+    async def _maintain(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                await self._heartbeat()
+                await self.reclaim_stale()
+                await self.prune()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Retried on the next beat; a missed beat is far shorter than stale_seconds
+                pass
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # The job row records its own failure; keep the worker alive
+                pass
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        async with self.session_factory() as db:
+            now = datetime.utcnow()
+            claimed = await db.execute(
+                update(AIJob)
+                .where(AIJob.id == job_id, AIJob.status == "pending")
+                .values(status="running", worker_id=self.worker_id, started_at=now, heartbeat_at=now)
+            )
+            await db.commit()
+            if claimed.rowcount != 1:
+                return  # finished, or claimed by another queue
+
+            job = await db.get(AIJob, job_id)
+            try:
+                result, error, job_status = await generate_text(job.prompt), None, "done"
+            except Exception as e:
+                result, error, job_status = None, str(e), "failed"
+            # Only the owner may finish the job; a reclaimed job belongs to its new worker
+            finished = await db.execute(
+                update(AIJob)
+                .where(AIJob.id == job_id, AIJob.worker_id == self.worker_id, AIJob.status == "running")
+                .values(status=job_status, result=result, error=error, finished_at=datetime.utcnow())
+            )
+            await db.commit()
+
+            if finished.rowcount == 1 and job_status == "done" and job.cache_key:
+                await ai_response_cache.set(db, job.cache_key, result)
+
+
+ai_job_queue = AIJobQueue()
@@ -0,0 +1,352 @@
+"""
+Platform analytics rollups
+
+platform_stats (one row) and daily_stats (one row per day) hold the counts
+behind GET /admin/analytics. They are kept current by mapper hooks on User
+and Workout, so every ORM write path (routes, cascades, fixtures, seed
+scripts) updates them in the same transaction as the change itself.
+Bulk Core inserts bypass the hooks; their writers report the rows through
+record_bulk_workouts, and anything else can be reconciled with
+rebuild_rollups.
+
+Whether a workout makes its user active (overall, or on its day) depends
+on the user's other workouts, which may change in the same flush (a user
+deleted with all their workouts, several workouts added at once). So the
+workout hooks only note each row's +1/-1 per user and day, and the active
+counts are settled once per flush by counting the user's workouts after it.
+
+Incremental updates only run once platform_stats exists. Until then (a
+fresh or pre-rollup database) the first read rebuilds everything.
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Set, Tuple
+
+from sqlalchemy import event, func, inspect, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, object_session
+
+from ..models import DailyStats, PlatformStats, User, Workout
+
+PLATFORM_ROW_ID = 1
+
+platform_table = PlatformStats.__table__
+daily_table = DailyStats.__table__
+users_table = User.__table__
+workouts_table = Workout.__table__
+
+# session.info key: {user_id: {day: net workouts added}} for non-admin users
+# written to in the current flush
+_ACTIVITY = "analytics_activity_changes"
+
+
+def _rollups_initialized(conn: Connection) -> bool:
+    return conn.execute(
+        select(platform_table.c.id).where(platform_table.c.id == PLATFORM_ROW_ID)
+    ).first() is not None
+
+
+def _bump_platform(conn: Connection, **deltas):
+    deltas = {k: v for k, v in deltas.items() if v}
+    if deltas:
+        conn.execute(
+            update(platform_table)
+            .where(platform_table.c.id == PLATFORM_ROW_ID)
+            .values({platform_table.c[k]: platform_table.c[k] + v for k, v in deltas.items()})
+        )
+
+
+def _bump_day(conn: Connection, day: date, **deltas):
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas:
+        return
+    result = conn.execute(
+        update(daily_table)
+        .where(daily_table.c.day == day)
+        .values({daily_table.c[k]: daily_table.c[k] + v for k, v in deltas.items()})
+    )
+    if result.rowcount == 0:
+        conn.execute(insert(daily_table).values(
+            day=day, new_users=0, workouts=0, active_users=0, minutes=0, calories=0
+        ).values(**deltas))
+
+
+def _is_admin(conn: Connection, user_id: int) -> bool:
+    return bool(conn.execute(
+        select(users_table.c.is_admin).where(users_table.c.id == user_id)
+    ).scalar())
+
+
+def _as_date(value) -> date:
+    # func.date() returns ISO strings on SQLite
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def _apply_workout(conn: Connection, target: Workout, user_id: int, when: datetime,
+                   duration: int, calories: int, sign: int):
+    """Add (sign=1) or remove (sign=-1) one workout from the rollups"""
+    day = when.date()
+    _bump_platform(
+        conn,
+        total_workouts=sign,
+        total_minutes=sign * (duration or 0),
+        total_calories=sign * (calories or 0)
+    )
+    _bump_day(
+        conn, day,
+        workouts=sign,
+        minutes=sign * (duration or 0),
+        calories=sign * (calories or 0)
+    )
+
+    # Active counts are settled in _settle_activity once the flush is done
+    changes = object_session(target).info.setdefault(_ACTIVITY, {})
+    if user_id not in changes:
+        # Looked up on first touch, while a user deleted in this flush still exists
+        changes[user_id] = None if _is_admin(conn, user_id) else {}
+    if changes[user_id] is not None:
+        changes[user_id][day] = changes[user_id].get(day, 0) + sign
+
+
+def _workout_counts(conn: Connection, user_id: int, days: Set[date]) -> Tuple[int, Dict[date, int]]:
+    """A user's workout count, overall and on each of `days`"""
+    total = conn.execute(
+        select(func.count(workouts_table.c.id)).where(workouts_table.c.user_id == user_id)
+    ).scalar()
+    if not total:
+        return 0, {}
+    day_column = func.date(workouts_table.c.date)
+    per_day = conn.execute(
+        select(day_column, func.count(workouts_table.c.id)).where(
+            workouts_table.c.user_id == user_id,
+            workouts_table.c.date >= datetime.combine(min(days), datetime.min.time()),
+            workouts_table.c.date < datetime.combine(max(days) + timedelta(days=1), datetime.min.time())
+        ).group_by(day_column)
+    ).all()
+    return total, {_as_date(day): count for day, count in per_day}
+
+
+@event.listens_for(Session, "after_flush")
+def _settle_activity(session: Session, flush_context):
+    changes = session.info.pop(_ACTIVITY, None)
+    if not changes:
+        return
+    conn = session.connection()
+    for user_id, by_day in changes.items():
+        if not by_day:
+            continue
+        total, per_day = _workout_counts(conn, user_id, set(by_day))
+        # Counts before the flush are the counts after it minus its changes
+        total_before = total - sum(by_day.values())
+        _bump_platform(conn, active_users=(total > 0) - (total_before > 0))
+        for day, added in by_day.items():
+            after = per_day.get(day, 0)
+            _bump_day(conn, day, active_users=(after > 0) - (after - added > 0))
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_activity(session: Session):
+    session.info.pop(_ACTIVITY, None)
+
+
+def _previous(target, attr: str):
+    """Value of an attribute before the current flush"""
+    history = inspect(target).attrs[attr].history
+    return history.deleted[0] if history.deleted else getattr(target, attr)
+
+
+@event.listens_for(Workout, "after_insert")
+def _workout_inserted(mapper, conn, target: Workout):
+    if _rollups_initialized(conn):
+        _apply_workout(conn, target, target.user_id, target.date,
+                       target.duration, target.calories_burned, 1)
+
+
+@event.listens_for(Workout, "after_delete")
+def _workout_deleted(mapper, conn, target: Workout):
+    if _rollups_initialized(conn):
+        _apply_workout(conn, target, target.user_id, target.date,
+                       target.duration, target.calories_burned, -1)
+
+
+@event.listens_for(Workout, "after_update")
+def _workout_updated(mapper, conn, target: Workout):
+    fields = ("user_id", "date", "duration", "calories_burned")
+    before = tuple(_previous(target, f) for f in fields)
+    after = tuple(getattr(target, f) for f in fields)
+    if before == after or not _rollups_initialized(conn):
+        return
+    _apply_workout(conn, target, *before, -1)
+    _apply_workout(conn, target, *after, 1)
+
+
+def _apply_user(conn: Connection, user: User, sign: int):
+    """Add or remove a non-admin user from the user counts"""
+    _bump_platform(conn, total_users=sign)
+    _bump_day(conn, (user.created_at or datetime.utcnow()).date(), new_users=sign)
+
+
+@event.listens_for(User, "after_insert")
+def _user_inserted(mapper, conn, target: User):
+    if not target.is_admin and _rollups_initialized(conn):
+        _apply_user(conn, target, 1)
+
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(mapper, conn, target: User):
+    # Workouts are deleted first by the cascade, which takes the user out
+    # of the active counts when the flush is settled
+    if not target.is_admin and _rollups_initialized(conn):
+        _apply_user(conn, target, -1)
+
+
+@event.listens_for(User, "after_update")
+def _user_updated(mapper, conn, target: User):
+    was_admin = bool(_previous(target, "is_admin"))
+    if was_admin == bool(target.is_admin) or not _rollups_initialized(conn):
+        return
+
+    # Promoted users leave the counts, demoted users join them
+    sign = -1 if target.is_admin else 1
+    _apply_user(conn, target, sign)
+
+    day_column = func.date(workouts_table.c.date)
+    days = conn.execute(
+        select(day_column).where(workouts_table.c.user_id == target.id).distinct()
+    ).scalars().all()
+    if days:
+        _bump_platform(conn, active_users=sign)
+    for day in days:
+        _bump_day(conn, _as_date(day), active_users=sign)
+
+
+def user_activity(conn: Connection, user_id: int, days) -> Tuple[bool, Set[date]]:
+    """
+    Whether a user has any workout, and on which of `days` they have one
+
+    Taken before a bulk insert so record_bulk_workouts can tell which days
+    the new rows make the user active on.
+    """
+    days = set(days)
+    if not days:
+        return False, set()
+    has_any = conn.execute(
+        select(workouts_table.c.id).where(workouts_table.c.user_id == user_id).limit(1)
+    ).first() is not None
+    if not has_any:
+        return False, set()
+
+    day_column = func.date(workouts_table.c.date)
+    active = conn.execute(
+        select(day_column).where(
+            workouts_table.c.user_id == user_id,
+            workouts_table.c.date >= datetime.combine(min(days), datetime.min.time()),
+            workouts_table.c.date < datetime.combine(max(days) + timedelta(days=1), datetime.min.time())
+        ).distinct()
+    ).scalars().all()
+    return True, {_as_date(d) for d in active} & days
+
+
+def record_bulk_workouts(conn: Connection, user_id: int, rows: List[dict], activity_before: Tuple[bool, Set[date]]):
+    """
+    Apply workouts inserted with a Core executemany to the rollups
+
+    Core inserts bypass the mapper hooks, so bulk writers call this with the
+    inserted rows and the user_activity taken before the insert.
+    """
+    if not rows or not _rollups_initialized(conn):
+        return
+
+    had_any, active_days = activity_before
+    counts_as_active = not _is_admin(conn, user_id)
+
+    per_day = {}
+    for row in rows:
+        totals = per_day.setdefault(row["date"].date(), [0, 0, 0])
+        totals[0] += 1
+        totals[1] += row.get("duration") or 0
+        totals[2] += row.get("calories_burned") or 0
+
+    _bump_platform(
+        conn,
+        total_workouts=sum(t[0] for t in per_day.values()),
+        total_minutes=sum(t[1] for t in per_day.values()),
+        total_calories=sum(t[2] for t in per_day.values()),
+        active_users=1 if counts_as_active and not had_any else 0
+    )
+    for day, (count, minutes, calories) in per_day.items():
+        _bump_day(
+            conn, day,
+            workouts=count,
+            minutes=minutes,
+            calories=calories,
+            active_users=1 if counts_as_active and day not in active_days else 0
+        )
+
+
+def rebuild_rollups(db: Session) -> PlatformStats:
+    """Recompute platform_stats and daily_stats from the users and workouts tables"""
+    non_admin = User.is_admin == False
+
+    totals = db.query(
+        func.count(Workout.id),
+        func.coalesce(func.sum(Workout.duration), 0),
+        func.coalesce(func.sum(Workout.calories_burned), 0)
+    ).one()
+
+    stats = db.get(PlatformStats, PLATFORM_ROW_ID)
+    if stats is None:
+        stats = PlatformStats(id=PLATFORM_ROW_ID)
+        db.add(stats)
+
+    stats.total_users = db.query(func.count(User.id)).filter(non_admin).scalar()
+    stats.total_workouts = totals[0]
+    stats.total_minutes = totals[1]
+    stats.total_calories = totals[2]
+    stats.active_users = db.query(func.count(func.distinct(Workout.user_id))).join(User).filter(non_admin).scalar()
+    stats.rebuilt_at = datetime.utcnow()
+
+    days = {}
+
+    def day_row(day):
+        if not isinstance(day, date):
+            day = date.fromisoformat(day)
+        return days.setdefault(day, {
+            "day": day, "new_users": 0, "workouts": 0, "active_users": 0, "minutes": 0, "calories": 0
+        })
+
+    workout_day = func.date(Workout.date)
+    for day, count, minutes, calories in db.query(
+        workout_day, func.count(Workout.id), func.sum(Workout.duration), func.sum(Workout.calories_burned)
+    ).group_by(workout_day):
+        row = day_row(day)
+        row.update(workouts=count, minutes=minutes or 0, calories=calories or 0)
+
+    for day, active in db.query(
+        workout_day, func.count(func.distinct(Workout.user_id))
+    ).join(User).filter(non_admin).group_by(workout_day):
+        day_row(day)["active_users"] = active
+
+    user_day = func.date(User.created_at)
+    for day, count in db.query(user_day, func.count(User.id)).filter(non_admin).group_by(user_day):
+        day_row(day)["new_users"] = count
+
+    db.query(DailyStats).delete()
+    db.flush()
+    if days:
+        db.execute(insert(daily_table), list(days.values()))
+    db.commit()
+    return stats
+
+
+def ensure_rollups(db: Session):
+    """Build the rollups if this database has never had them"""
+    if not _rollups_initialized(db.connection()):
+        rebuild_rollups(db)
+
+
+def get_platform_stats(db: Session) -> PlatformStats:
+    """Read the platform rollup row, building the rollups on first access"""
+    stats = db.get(PlatformStats, PLATFORM_ROW_ID)
+    if stats is None:
+        stats = rebuild_rollups(db)
+    return stats
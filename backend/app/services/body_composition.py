@@ -0,0 +1,91 @@
+import os
+import time
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from ..database import run_after_commit
+from ..models import User, UserMetrics
+from . import data_versions
+from ..utils import calculate_bmi_array, calculate_body_fat_array, calculate_skeletal_muscle_array
+
+RECOMPUTE_CHUNK_SIZE = int(os.getenv("RECOMPUTE_CHUNK_SIZE", "5000"))
+
+metrics_table = UserMetrics.__table__
+users_table = User.__table__
+
+DERIVED = ("bmi", "body_fat_percentage", "skeletal_muscle_mass")
+
+_write_back = (
+    update(metrics_table)
+    .where(metrics_table.c.id == bindparam("row_id"))
+    .values({name: bindparam(f"new_{name}") for name in DERIVED})
+)
+
+
+def recompute_chunk(rows) -> list:
+    """Recompute the derived metrics of a chunk, returning parameters for the rows that changed"""
+    ids, weights, heights, ages, genders, *stored = map(list, zip(*rows))
+    bmi = calculate_bmi_array(weights, heights)
+    body_fat = calculate_body_fat_array(bmi, ages, genders)
+    muscle = calculate_skeletal_muscle_array(weights, heights, ages, genders)
+
+    fresh = np.column_stack((bmi, body_fat, muscle))
+    old = np.array(stored, dtype=np.float64).T
+    # NaN marks values never computed, which always need writing
+    changed = np.flatnonzero(np.any((fresh != old) | np.isnan(old), axis=1))
+    return [
+        {"row_id": ids[i], **{f"new_{name}": value for name, value in zip(DERIVED, fresh[i].tolist())}}
+        for i in changed.tolist()
+    ]
+
+
+def recompute_body_composition(db: Session, chunk_size: Optional[int] = None) -> dict:
+    """
+    Recompute bmi, body fat and muscle mass of every user_metrics row
+
+    Rows are read in id order one chunk at a time, recomputed with the
+    vectorized formulas, and rows whose stored values differ are written
+    back with one executemany UPDATE per chunk, committed per chunk.
+    Rows missing any input are skipped.
+    """
+    chunk_size = chunk_size or RECOMPUTE_CHUNK_SIZE
+    query = select(
+        metrics_table.c.id, metrics_table.c.weight, metrics_table.c.height,
+        metrics_table.c.age, metrics_table.c.gender,
+        *(metrics_table.c[name] for name in DERIVED)
+    ).where(
+        metrics_table.c.weight.isnot(None),
+        metrics_table.c.height > 0,
+        metrics_table.c.age.isnot(None),
+        metrics_table.c.gender.isnot(None)
+    ).order_by(metrics_table.c.id).limit(chunk_size)
+
+    started = time.perf_counter()
+    scanned = updated = 0
+    last_id = 0
+    while True:
+        rows = db.execute(query.where(metrics_table.c.id > last_id)).all()
+        if not rows:
+            break
+        changes = recompute_chunk(rows)
+        if changes:
+            db.execute(_write_back, changes)
+            data_versions.bump(db.connection(), users_table.c.id.in_(
+                select(metrics_table.c.user_id).where(metrics_table.c.id.in_([c["row_id"] for c in changes]))
+            ))
+            run_after_commit(db, data_versions.data_version_cache.clear)
+            db.commit()
+        scanned += len(rows)
+        updated += len(changes)
+        last_id = rows[-1][0]
+
+    seconds = time.perf_counter() - started
+    return {
+        "rows": scanned,
+        "updated": updated,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(scanned / seconds) if seconds else None
+    }
@@ -0,0 +1,117 @@
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import exists, false, func, insert, literal, select, update
+
+from ..database import AsyncSessionLocal
+from ..models import Broadcast, Notification, User, UserMetrics, Workout
+from . import data_versions
+
+BROADCAST_CHUNK_SIZE = int(os.getenv("BROADCAST_CHUNK_SIZE", "10000"))
+
+users_table = User.__table__
+
+
+def segment_filter(broadcast: Broadcast):
+    """WHERE clause selecting the non-admin users a broadcast targets"""
+    conditions = [users_table.c.is_admin == false()]
+    if broadcast.activity_level is not None:
+        conditions.append(exists().where(
+            UserMetrics.user_id == users_table.c.id,
+            UserMetrics.activity_level == broadcast.activity_level
+        ))
+    if broadcast.inactive_days is not None:
+        # Measured from submission, so every chunk sees the same cutoff
+        cutoff = broadcast.created_at - timedelta(days=broadcast.inactive_days)
+        conditions.append(~exists().where(
+            Workout.user_id == users_table.c.id,
+            Workout.date >= cutoff
+        ))
+    return conditions
+
+
+def broadcast_response(broadcast: Broadcast) -> dict:
+    """Public view of a broadcast and its progress"""
+    return {
+        "broadcast_id": broadcast.id,
+        "status": broadcast.status,
+        "inactive_days": broadcast.inactive_days,
+        "activity_level": broadcast.activity_level,
+        "total_recipients": broadcast.total_recipients,
+        "sent": broadcast.sent,
+        "error": broadcast.error,
+        "created_at": broadcast.created_at,
+        "finished_at": broadcast.finished_at
+    }
+
+
+class BroadcastSender:
+    """
+    Fans a broadcast out into per-user notifications
+
+    Each chunk of the target segment, by user id range, is written with one
+    INSERT ... SELECT, so no user rows pass through Python. Chunks commit
+    separately and advance `sent`, which is what progress polling reads.
+    """
+
+    def __init__(self, chunk_size: int = BROADCAST_CHUNK_SIZE, session_factory=AsyncSessionLocal):
+        self.chunk_size = chunk_size
+        self.session_factory = session_factory
+
+    async def run(self, broadcast_id: int):
+        async with self.session_factory() as db:
+            broadcast = await db.get(Broadcast, broadcast_id)
+            if broadcast is None or broadcast.status != "pending":
+                return
+
+            conditions = segment_filter(broadcast)
+            total, low, high = (await db.execute(
+                select(func.count(), func.min(users_table.c.id), func.max(users_table.c.id)).where(*conditions)
+            )).one()
+            broadcast.status = "running"
+            broadcast.total_recipients = total
+            await db.commit()
+
+            try:
+                if total:
+                    await self._fan_out(db, broadcast, conditions, low, high)
+                broadcast.status = "done"
+            except Exception as e:
+                await db.rollback()
+                broadcast.error = str(e)
+                broadcast.status = "failed"
+            broadcast.finished_at = datetime.utcnow()
+            await db.commit()
+
+    async def _fan_out(self, db, broadcast: Broadcast, conditions, low: int, high: int):
+        sent = 0
+        for start in range(low, high + 1, self.chunk_size):
+            recipients = select(
+                users_table.c.id,
+                literal(broadcast.message),
+                false(),
+                literal(broadcast.created_at)
+            ).where(
+                *conditions,
+                users_table.c.id >= start,
+                users_table.c.id < start + self.chunk_size
+            )
+            result = await db.execute(
+                insert(Notification.__table__).from_select(
+                    ["user_id", "message", "is_read", "created_at"], recipients
+                )
+            )
+            sent += result.rowcount
+            await db.run_sync(lambda session: data_versions.bump(
+                session.connection(),
+                *conditions,
+                users_table.c.id >= start,
+                users_table.c.id < start + self.chunk_size
+            ))
+            await db.execute(update(Broadcast).where(Broadcast.id == broadcast.id).values(sent=sent))
+            await db.commit()
+            data_versions.data_version_cache.clear()
+        broadcast.sent = sent
+
+
+broadcast_sender = BroadcastSender()
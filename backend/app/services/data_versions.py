@@ -0,0 +1,146 @@
+"""
+Per-user data versions for conditional GETs
+
+users.data_version is bumped in the same transaction as every write to a
+user's workouts, metrics, rewards or notifications: by mapper hooks for ORM
+writes and by touch() or bump() for Core bulk writes. Read endpoints turn
+it into an ETag (see app/conditional.py).
+
+Versions are cached per process. A cached version is dropped when a
+transaction that bumped it commits; writes made by other processes are
+picked up once the entry's TTL runs out.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, object_session
+
+from ..database import run_after_commit
+from ..models import Notification, Reward, User, UserMetrics, Workout
+
+DATA_VERSION_CACHE_SIZE = int(os.getenv("DATA_VERSION_CACHE_SIZE", "4096"))
+DATA_VERSION_CACHE_TTL_SECONDS = float(os.getenv("DATA_VERSION_CACHE_TTL_SECONDS", "60"))
+
+users_table = User.__table__
+
+_BUMPED = "data_versions_bumped"
+
+
+class DataVersionCache:
+    """
+    Bounded LRU cache of user data versions
+
+    get() also returns the cache's invalidation count; set() is ignored if
+    anything was invalidated since, so a version read just before a write
+    committed cannot be cached after that write's invalidation.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._invalidations = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Tuple[Optional[int], int]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None, self._invalidations
+            expires_at, version = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None, self._invalidations
+            self._entries.move_to_end(user_id)
+            return version, self._invalidations
+
+    def set(self, user_id: int, version: int, invalidations: int):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if invalidations != self._invalidations:
+                return
+            self._entries[user_id] = (time.monotonic() + self.ttl, version)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._invalidations += 1
+
+
+data_version_cache = DataVersionCache(maxsize=DATA_VERSION_CACHE_SIZE, ttl=DATA_VERSION_CACHE_TTL_SECONDS)
+
+
+def current_version(db: Session, user_id: int) -> int:
+    """Return a user's data version, from the cache when possible"""
+    version, invalidations = data_version_cache.get(user_id)
+    if version is None:
+        version = db.execute(
+            select(users_table.c.data_version).where(users_table.c.id == user_id)
+        ).scalar() or 0
+        data_version_cache.set(user_id, version, invalidations)
+    return version
+
+
+def bump(conn: Connection, *conditions) -> int:
+    """
+    Bump the data version of the users matching conditions, or of every user
+
+    For Core bulk writes; the caller drops cached versions once its
+    transaction commits.
+    """
+    return conn.execute(
+        update(users_table).where(*conditions).values(data_version=users_table.c.data_version + 1)
+    ).rowcount
+
+
+def touch(db: Session, user_ids: Iterable[int], conn: Optional[Connection] = None):
+    """
+    Bump the data version of users written to in the session's transaction
+
+    Each user is bumped once per transaction; their cached versions are
+    dropped when it commits.
+    """
+    bumped = db.info.setdefault(_BUMPED, set())
+    fresh = sorted(set(user_ids) - bumped - {None})
+    if fresh:
+        bump(conn or db.connection(), users_table.c.id.in_(fresh))
+        bumped.update(fresh)
+    for user_id in fresh:
+        run_after_commit(db, data_version_cache.invalidate_user, user_id)
+
+
+@event.listens_for(Workout, "after_insert")
+@event.listens_for(Workout, "after_update")
+@event.listens_for(Workout, "after_delete")
+@event.listens_for(UserMetrics, "after_insert")
+@event.listens_for(UserMetrics, "after_update")
+@event.listens_for(UserMetrics, "after_delete")
+@event.listens_for(Reward, "after_insert")
+@event.listens_for(Reward, "after_update")
+@event.listens_for(Reward, "after_delete")
+@event.listens_for(Notification, "after_insert")
+@event.listens_for(Notification, "after_update")
+@event.listens_for(Notification, "after_delete")
+def _bump_owner(mapper, connection, target):
+    user_ids = {target.user_id, *inspect(target).attrs.user_id.history.deleted}
+    touch(object_session(target), user_ids, connection)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _reset_bumped(session: Session):
+    session.info.pop(_BUMPED, None)
@@ -0,0 +1,296 @@
+"""
+Engagement metrics from per-day activity bitmaps
+
+activity_bitmaps holds one bitmap per day with a bit per user id, set when
+the user logged a workout that day. DAU is the popcount of a day's bitmap,
+WAU and MAU the popcount of the OR over the last 7 and 30 days, and weekly
+retention cohorts are ANDs of weekly ORs, so none of these read the
+workouts table.
+
+Like the analytics rollups, the bitmaps are kept current by mapper hooks on
+Workout. Core bulk inserts report their rows through record_bulk_workouts,
+and rebuild_activity rebuilds everything from workout history. Admins are
+masked out when the bitmaps are read, so promoting or demoting a user needs
+no rewrite.
+"""
+import time
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import delete, event, func, inspect, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from ..models import ActivityBitmap, User, Workout
+
+# User ids per stored bitmap row; a write rewrites at most CHUNK_BYTES
+CHUNK_BITS = 1 << 16
+CHUNK_BYTES = CHUNK_BITS // 8
+REBUILD_BATCH_SIZE = 100_000
+
+WEEK_DAYS = 7
+MONTH_DAYS = 30
+
+bitmaps_table = ActivityBitmap.__table__
+workouts_table = Workout.__table__
+
+
+def _as_date(value) -> date:
+    # func.date() returns ISO strings on SQLite
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+_DIALECT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _ensure_row(conn: Connection, day: date, chunk: int):
+    """Create an empty bitmap row for (day, chunk) unless one exists"""
+    dialect_insert = _DIALECT_INSERTS.get(conn.dialect.name)
+    if dialect_insert is None:
+        raise NotImplementedError(f"No upsert for the {conn.dialect.name} dialect")
+    conn.execute(
+        dialect_insert(bitmaps_table).values(day=day, chunk=chunk, bits=b"").on_conflict_do_nothing()
+    )
+
+
+def _set_bit(conn: Connection, day: date, user_id: int, active: bool):
+    """Set or clear one user's bit in a day's bitmap"""
+    chunk, offset = divmod(user_id, CHUNK_BITS)
+    byte, bit = divmod(offset, 8)
+    key = (bitmaps_table.c.day == day, bitmaps_table.c.chunk == chunk)
+
+    # Make sure the row exists before locking it, so concurrent first writes
+    # to a day serialize on the row instead of racing to insert it
+    if active:
+        _ensure_row(conn, day, chunk)
+    row = conn.execute(select(bitmaps_table.c.bits).where(*key).with_for_update()).first()
+    if row is None:
+        return
+    bits = bytearray(row.bits)
+    if byte >= len(bits):
+        if not active:
+            return
+        bits.extend(bytes(byte + 1 - len(bits)))
+    if bool(bits[byte] >> bit & 1) != active:
+        bits[byte] ^= 1 << bit
+    bits = bytes(bits).rstrip(b"\0")
+
+    if not bits:
+        conn.execute(delete(bitmaps_table).where(*key))
+    elif bits != row.bits:
+        conn.execute(update(bitmaps_table).where(*key).values(bits=bits))
+
+
+def _release(conn: Connection, workout_id: int, user_id: int, day: date):
+    """Clear a user's bit for `day` unless another workout keeps it set"""
+    day_start = datetime.combine(day, datetime.min.time())
+    other = conn.execute(
+        select(workouts_table.c.id).where(
+            workouts_table.c.user_id == user_id,
+            workouts_table.c.id != workout_id,
+            workouts_table.c.date >= day_start,
+            workouts_table.c.date < day_start + timedelta(days=1)
+        ).limit(1)
+    ).first()
+    if other is None:
+        _set_bit(conn, day, user_id, False)
+
+
+@event.listens_for(Workout, "after_insert")
+def _workout_inserted(mapper, conn, target: Workout):
+    _set_bit(conn, target.date.date(), target.user_id, True)
+
+
+@event.listens_for(Workout, "after_delete")
+def _workout_deleted(mapper, conn, target: Workout):
+    _release(conn, target.id, target.user_id, target.date.date())
+
+
+@event.listens_for(Workout, "after_update")
+def _workout_updated(mapper, conn, target: Workout):
+    state = inspect(target).attrs
+    before_user = (state.user_id.history.deleted or [target.user_id])[0]
+    before_date = (state.date.history.deleted or [target.date])[0]
+    before = (before_user, before_date.date())
+    after = (target.user_id, target.date.date())
+    if before != after:
+        _release(conn, target.id, *before)
+        _set_bit(conn, after[1], after[0], True)
+
+
+def record_bulk_workouts(conn: Connection, user_id: int, rows: List[dict]):
+    """Mark the days of workouts inserted with a Core executemany as active"""
+    for day in {row["date"].date() for row in rows}:
+        _set_bit(conn, day, user_id, True)
+
+
+def _set_ids(bitmap: np.ndarray, user_ids: np.ndarray):
+    np.bitwise_or.at(bitmap, user_ids >> 3, np.left_shift(1, user_ids & 7).astype(np.uint8))
+
+
+def rebuild_activity(conn: Connection, batch_size: Optional[int] = None) -> dict:
+    """
+    Rebuild every activity bitmap from the workouts table
+
+    Workouts are streamed in batches and folded into one in-memory bitmap per
+    day, so memory grows with days × users / 8 bytes, not with workouts.
+
+    Returns:
+        Counts of days, workouts and bitmap rows written, and the elapsed time
+    """
+    started = time.perf_counter()
+    batch_size = batch_size or REBUILD_BATCH_SIZE
+    max_user_id = conn.execute(select(func.max(workouts_table.c.user_id))).scalar() or 0
+    size = (max_user_id // CHUNK_BITS + 1) * CHUNK_BYTES
+
+    days = {}
+    workouts = 0
+    result = conn.execution_options(yield_per=batch_size).execute(
+        select(func.date(workouts_table.c.date), workouts_table.c.user_id)
+    )
+    for partition in result.partitions():
+        workouts += len(partition)
+        by_day = {}
+        for day, user_id in partition:
+            by_day.setdefault(day, []).append(user_id)
+        for day, user_ids in by_day.items():
+            bitmap = days.get(day)
+            if bitmap is None:
+                bitmap = days[day] = np.zeros(size, np.uint8)
+            _set_ids(bitmap, np.array(user_ids, dtype=np.int64))
+
+    conn.execute(delete(bitmaps_table))
+    rows = []
+    for day, bitmap in days.items():
+        for chunk in range(size // CHUNK_BYTES):
+            bits = bitmap[chunk * CHUNK_BYTES:(chunk + 1) * CHUNK_BYTES].tobytes().rstrip(b"\0")
+            if bits:
+                rows.append({"day": _as_date(day), "chunk": chunk, "bits": bits})
+    if rows:
+        conn.execute(insert(bitmaps_table), rows)
+
+    return {
+        "days": len(days),
+        "workouts": workouts,
+        "bitmaps": len(rows),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def _width(db) -> int:
+    """Bytes per day needed to hold every stored chunk"""
+    max_chunk = db.execute(select(func.max(bitmaps_table.c.chunk))).scalar()
+    return ((max_chunk or 0) + 1) * CHUNK_BYTES
+
+
+def load_bitmaps(db: Session, start: date, end: date, width: Optional[int] = None) -> np.ndarray:
+    """
+    Bitmaps of start..end (inclusive) as a (days, bytes) uint8 matrix
+
+    Days without activity are zero rows. Admin bits are cleared.
+    """
+    width = width or _width(db)
+    matrix = np.zeros(((end - start).days + 1, width), np.uint8)
+    rows = db.execute(
+        select(bitmaps_table.c.day, bitmaps_table.c.chunk, bitmaps_table.c.bits)
+        .where(bitmaps_table.c.day >= start, bitmaps_table.c.day <= end)
+    )
+    for day, chunk, bits in rows:
+        offset = chunk * CHUNK_BYTES
+        matrix[(day - start).days, offset:offset + len(bits)] = np.frombuffer(bits, np.uint8)
+
+    admin_ids = db.execute(select(User.id).where(User.is_admin == True)).scalars()
+    for user_id in admin_ids:
+        if user_id >> 3 < width:
+            matrix[:, user_id >> 3] &= np.uint8(~(1 << (user_id & 7)) & 0xFF)
+    return matrix
+
+
+def active_before(db: Session, day: date, width: int) -> np.ndarray:
+    """OR of every bitmap before `day`: users active at any point before it"""
+    seen = np.zeros(width, np.uint8)
+    rows = db.execute(
+        select(bitmaps_table.c.chunk, bitmaps_table.c.bits).where(bitmaps_table.c.day < day)
+    )
+    for chunk, bits in rows:
+        offset = chunk * CHUNK_BYTES
+        seen[offset:offset + len(bits)] |= np.frombuffer(bits, np.uint8)
+    return seen
+
+
+def popcount(bitmaps: np.ndarray) -> np.ndarray:
+    """Number of set bits in each bitmap (the last axis)"""
+    return np.bitwise_count(bitmaps).sum(axis=-1, dtype=np.int64)
+
+
+def window_or(matrix: np.ndarray, width: int) -> np.ndarray:
+    """
+    Row i of the result is the OR of matrix rows i..i+width-1
+
+    Built by doubling: ORing a matrix with itself shifted by `span` rows
+    covers windows of 2 × span, so a window of w days takes log2(w) passes
+    instead of w.
+    """
+    result, span = matrix, 1
+    while span * 2 <= width:
+        result = result[:-span] | result[span:]
+        span *= 2
+    if span < width:
+        shift = width - span
+        result = result[:-shift] | result[shift:]
+    return result
+
+
+def engagement_series(db: Session, days: int = 30, as_of: Optional[date] = None) -> List[dict]:
+    """Per-day DAU, WAU, MAU and stickiness (DAU / MAU) for the `days` days ending at as_of"""
+    as_of = as_of or datetime.utcnow().date()
+    start = as_of - timedelta(days=days - 1)
+    matrix = load_bitmaps(db, start - timedelta(days=MONTH_DAYS - 1), as_of)
+
+    dau = popcount(matrix)[-days:]
+    wau = popcount(window_or(matrix, WEEK_DAYS))[-days:]
+    mau = popcount(window_or(matrix, MONTH_DAYS))[-days:]
+
+    return [
+        {
+            "day": start + timedelta(days=i),
+            "dau": int(dau[i]),
+            "wau": int(wau[i]),
+            "mau": int(mau[i]),
+            "stickiness": round(int(dau[i]) / int(mau[i]), 4) if mau[i] else 0.0
+        }
+        for i in range(days)
+    ]
+
+
+def retention_cohorts(db: Session, weeks: int = 8, as_of: Optional[date] = None) -> List[dict]:
+    """
+    Weekly retention of users by the (Monday-based) week of their first workout
+
+    retention[k] is the share of a cohort active in its k-th week after the
+    first; the current week may be partial.
+    """
+    as_of = as_of or datetime.utcnow().date()
+    first_week = as_of - timedelta(days=as_of.weekday(), weeks=weeks - 1)
+    width = _width(db)
+    matrix = load_bitmaps(db, first_week, as_of, width)
+    weekly = [
+        np.bitwise_or.reduce(matrix[k * WEEK_DAYS:(k + 1) * WEEK_DAYS], axis=0)
+        for k in range(weeks)
+    ]
+
+    seen = active_before(db, first_week, width)
+    cohorts = []
+    for k, week in enumerate(weekly):
+        cohort = week & ~seen
+        seen |= week
+        size = int(popcount(cohort))
+        retained = [int(popcount(cohort & later)) for later in weekly[k:]]
+        cohorts.append({
+            "week": first_week + timedelta(weeks=k),
+            "users": size,
+            "retention": [round(r / size, 4) if size else 0.0 for r in retained]
+        })
+    return cohorts
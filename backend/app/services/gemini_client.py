@@ -1,31 +1,170 @@
+import asyncio
+import hashlib
 import os
+import time
+from typing import AsyncIterator, Optional
+
 from dotenv import load_dotenv
 import google.generativeai as genai
 
+from ..telemetry import gemini_latency
+
 load_dotenv()
 
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
 MODEL_NAME = "models/gemini-2.5-flash"
 
+GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "top_p": 0.9,
+    "max_output_tokens": 2048,
+}
 
-def generate_text(prompt: str) -> str:
-    """
-    Send any prompt to Gemini and return plain text response
-    """
-    try:
-        model = genai.GenerativeModel(MODEL_NAME)
+# "gemini" calls the real API, "fake" answers locally for tests and load runs
+GEMINI_BACKEND = os.getenv("GEMINI_BACKEND", "gemini")
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "30"))
+GEMINI_FAKE_LATENCY_SECONDS = float(os.getenv("GEMINI_FAKE_LATENCY_SECONDS", "0"))
 
-        response = model.generate_content(
+
+class GeminiTimeoutError(RuntimeError):
+    """Raised when a call does not finish within its deadline"""
+
+
+class GeminiBackend:
+    """Google Gemini backend sharing one model instance across calls"""
+
+    def __init__(self, model_name: str = MODEL_NAME):
+        self.model = genai.GenerativeModel(model_name)
+
+    async def generate(self, prompt: str) -> str:
+        response = await self.model.generate_content_async(
             prompt,
-            generation_config={
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "max_output_tokens": 2048,
-            }
+            generation_config=GENERATION_CONFIG
         )
-
         return response.text
 
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        response = await self.model.generate_content_async(
+            prompt,
+            generation_config=GENERATION_CONFIG,
+            stream=True
+        )
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+class FakeBackend:
+    """Local stand-in that answers after a fixed delay without network access"""
+
+    def __init__(self, latency: float = GEMINI_FAKE_LATENCY_SECONDS):
+        self.latency = latency
+
+    async def generate(self, prompt: str) -> str:
+        await asyncio.sleep(self.latency)
+        digest = hashlib.sha256(prompt.encode()).hexdigest()[:12]
+        return f"[fake-gemini {digest}] Response to a {len(prompt)} character prompt."
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        text = await self.generate(prompt)
+        for word in text.split(" "):
+            yield word + " "
+
+
+BACKENDS = {
+    "gemini": GeminiBackend,
+    "fake": FakeBackend,
+}
+
+_backend = None
+_limiter: Optional[asyncio.Semaphore] = None
+_limiter_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_backend():
+    """Return the shared backend, creating it on first use"""
+    global _backend
+    if _backend is None:
+        _backend = BACKENDS[GEMINI_BACKEND]()
+    return _backend
+
+
+def set_backend(backend):
+    """Replace the shared backend (e.g. with a FakeBackend for load runs)"""
+    global _backend
+    _backend = backend
+
+
+def _get_limiter() -> asyncio.Semaphore:
+    """Return the in-flight call limiter for the running event loop"""
+    global _limiter, _limiter_loop
+    loop = asyncio.get_running_loop()
+    if _limiter is None or _limiter_loop is not loop:
+        _limiter = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+        _limiter_loop = loop
+    return _limiter
+
+
+async def _limited_generate(prompt: str) -> str:
+    async with _get_limiter():
+        return await get_backend().generate(prompt)
+
+
+async def generate_text(prompt: str, timeout: Optional[float] = None) -> str:
+    """
+    Send any prompt to Gemini and return plain text response
+
+    At most GEMINI_MAX_CONCURRENCY calls are in flight at once; further calls
+    wait their turn. The deadline covers both the wait and the call itself,
+    and an expired call is cancelled upstream.
+    """
+    deadline = GEMINI_TIMEOUT_SECONDS if timeout is None else timeout
+    outcome = "cancelled"
+    started = time.perf_counter()
+    try:
+        text = await asyncio.wait_for(_limited_generate(prompt), deadline)
+        outcome = "ok"
+        return text
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        raise GeminiTimeoutError(f"Gemini API call exceeded {deadline}s deadline")
     except Exception as e:
+        outcome = "error"
         raise RuntimeError(f"Gemini API error: {str(e)}")
+    finally:
+        gemini_latency.observe((outcome,), time.perf_counter() - started)
+
+
+async def stream_text(prompt: str, timeout: Optional[float] = None) -> AsyncIterator[str]:
+    """
+    Send a prompt to Gemini and yield the response as it is generated
+
+    The stream holds one concurrency slot until it finishes or is closed.
+    The deadline applies to the gap before each chunk, so a long answer
+    that keeps producing output is not cut off. Closing the generator
+    (e.g. when the client disconnects) cancels the upstream call.
+    """
+    deadline = GEMINI_TIMEOUT_SECONDS if timeout is None else timeout
+    limiter = _get_limiter()
+    try:
+        await asyncio.wait_for(limiter.acquire(), deadline)
+    except asyncio.TimeoutError:
+        raise GeminiTimeoutError(f"Gemini API call exceeded {deadline}s deadline")
+
+    upstream = get_backend().stream(prompt)
+    try:
+        while True:
+            try:
+                chunk = await asyncio.wait_for(upstream.__anext__(), deadline)
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                raise GeminiTimeoutError(f"Gemini API stream stalled for {deadline}s")
+            except Exception as e:
+                raise RuntimeError(f"Gemini API error: {str(e)}")
+            yield chunk
+    finally:
+        await upstream.aclose()
+        limiter.release()
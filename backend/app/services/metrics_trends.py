@@ -0,0 +1,137 @@
+"""
+Body-metrics time series
+
+The history of one metric is loaded as two NumPy arrays (seconds since
+the epoch and values) and every statistic is computed on the arrays as a
+whole: rolling averages from a cumulative sum, the trend from a
+least-squares fit and downsampling from bucketed sums.
+"""
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import MetricsEntry
+
+METRICS = ("weight", "bmi", "body_fat_percentage", "skeletal_muscle_mass")
+
+SECONDS_PER_DAY = 86400.0
+EPOCH = datetime(1970, 1, 1)
+
+# Goals further out than this are reported as unreachable at the current rate
+MAX_PROJECTION_DAYS = 5 * 365
+
+history_table = MetricsEntry.__table__
+
+
+def load_series(db: Session, user_id: int, metric: str, since: Optional[datetime] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """A user's recorded values of one metric as (seconds, values) arrays, oldest first"""
+    column = history_table.c[metric]
+    query = select(history_table.c.recorded_at, column).where(
+        history_table.c.user_id == user_id,
+        column.isnot(None)
+    )
+    if since is not None:
+        query = query.where(history_table.c.recorded_at >= since)
+    rows = db.execute(query.order_by(history_table.c.recorded_at, history_table.c.id)).all()
+
+    times = np.fromiter(((row[0] - EPOCH).total_seconds() for row in rows), dtype=np.float64, count=len(rows))
+    values = np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows))
+    return times, values
+
+
+def rolling_mean(times: np.ndarray, values: np.ndarray, window_days: float) -> np.ndarray:
+    """Mean of each point and the points in the `window_days` before it"""
+    sums = np.concatenate(([0.0], np.cumsum(values)))
+    start = np.searchsorted(times, times - window_days * SECONDS_PER_DAY, side="left")
+    end = np.arange(1, len(values) + 1)
+    return (sums[end] - sums[start]) / (end - start)
+
+
+def slope_per_day(times: np.ndarray, values: np.ndarray, window_days: float) -> Optional[float]:
+    """Least-squares rate of change over the trailing `window_days`, per day"""
+    if len(times) == 0:
+        return None
+    recent = times >= times[-1] - window_days * SECONDS_PER_DAY
+    days = times[recent] / SECONDS_PER_DAY
+    if len(days) < 2 or np.ptp(days) == 0:
+        return None
+    slope, _ = np.polyfit(days - days[0], values[recent], 1)
+    return float(slope)
+
+
+def project_goal(latest_time: float, current: float, slope: Optional[float], goal: float) -> Optional[datetime]:
+    """When the trend reaches `goal`, or None if it is moving away from it or stalled"""
+    if current == goal:
+        return to_datetimes(np.array([latest_time]))[0]
+    if not slope:
+        return None
+    days = (goal - current) / slope
+    if days <= 0 or days > MAX_PROJECTION_DAYS:
+        return None
+    return to_datetimes(np.array([latest_time + days * SECONDS_PER_DAY]))[0]
+
+
+def downsample(max_points: int, times: np.ndarray, *series: np.ndarray):
+    """Average consecutive points into at most `max_points` evenly filled buckets"""
+    n = len(times)
+    if n <= max_points:
+        return (times, *series)
+    buckets = np.arange(n) * max_points // n
+    counts = np.bincount(buckets)
+    return tuple(np.bincount(buckets, weights=s) / counts for s in (times, *series))
+
+
+def to_datetimes(seconds: np.ndarray):
+    return (seconds * 1e6).astype("datetime64[us]").tolist()
+
+
+def metric_trend(
+    db: Session,
+    user_id: int,
+    metric: str,
+    days: Optional[int] = None,
+    window_days: int = 7,
+    goal: Optional[float] = None,
+    max_points: int = 200
+) -> dict:
+    """
+    Time series of one metric with its rolling average, trend and goal projection
+
+    `rate_per_week` is fitted over the last `window_days * 4` days. Series
+    longer than `max_points` are averaged down to that many points.
+    """
+    since = datetime.utcnow() - timedelta(days=days) if days else None
+    times, values = load_series(db, user_id, metric, since)
+
+    result = {
+        "metric": metric,
+        "window_days": window_days,
+        "count": len(values),
+        "points": [],
+        "latest": None,
+        "rate_per_week": None,
+        "goal": goal,
+        "projected_goal_date": None
+    }
+    if len(values) == 0:
+        return result
+
+    averages = rolling_mean(times, values, window_days)
+    slope = slope_per_day(times, values, window_days * 4)
+
+    result["latest"] = round(float(values[-1]), 2)
+    result["rate_per_week"] = None if slope is None else round(slope * 7, 3)
+    if goal is not None:
+        result["projected_goal_date"] = project_goal(times[-1], float(averages[-1]), slope, goal)
+
+    times, values, averages = downsample(max_points, times, values, averages)
+    result["points"] = [
+        {"recorded_at": when, "value": value, "rolling_average": average}
+        for when, value, average in zip(
+            to_datetimes(times), np.round(values, 2).tolist(), np.round(averages, 2).tolist()
+        )
+    ]
+    return result
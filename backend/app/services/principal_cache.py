@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Optional, Set
+
+
+class PrincipalCache:
+    """
+    Bounded LRU cache of authenticated principals keyed by bearer token
+
+    Each entry holds the column values of the user the token belongs to and
+    lives until the cache TTL elapses or the token itself expires, whichever
+    comes first. Entries are also indexed by username so every token of a
+    user can be dropped when that user changes or is deleted.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._tokens_by_username: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, token: str) -> Optional[dict]:
+        """Return the cached user values for a token, or None on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, username, values = entry
+            if expires_at <= now:
+                self._remove(token, username)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return values
+
+    def set(self, token: str, values: dict, token_exp: Optional[int] = None):
+        """Cache user values for a token, never past the token's own expiry"""
+        if self.maxsize <= 0:
+            return
+
+        expires_at = time.monotonic() + self.ttl
+        if token_exp is not None:
+            remaining = token_exp - datetime.now(timezone.utc).timestamp()
+            expires_at = min(expires_at, time.monotonic() + remaining)
+
+        username = values["username"]
+        with self._lock:
+            previous = self._entries.pop(token, None)
+            if previous is not None:
+                self._unindex(token, previous[1])
+
+            self._entries[token] = (expires_at, username, values)
+            self._tokens_by_username.setdefault(username, set()).add(token)
+
+            while len(self._entries) > self.maxsize:
+                oldest, (_, oldest_username, _) = self._entries.popitem(last=False)
+                self._unindex(oldest, oldest_username)
+                self.evictions += 1
+
+    def invalidate_user(self, username: str):
+        """Drop every cached token that belongs to a user"""
+        with self._lock:
+            tokens = self._tokens_by_username.pop(username, set())
+            for token in tokens:
+                self._entries.pop(token, None)
+            self.invalidations += len(tokens)
+
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_username.clear()
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def stats(self) -> dict:
+        """Return size and hit-rate counters for sizing the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+    def _remove(self, token: str, username: str):
+        self._entries.pop(token, None)
+        self._unindex(token, username)
+
+    def _unindex(self, token: str, username: str):
+        tokens = self._tokens_by_username.get(username)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_username[username]
@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Set
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import object_session
+
+from ..database import run_after_commit
+from ..models import Workout
+
+PROGRESS_CACHE_SIZE = int(os.getenv("PROGRESS_CACHE_SIZE", "1024"))
+# Windows are relative to now, so entries also age out on their own
+PROGRESS_CACHE_TTL_SECONDS = float(os.getenv("PROGRESS_CACHE_TTL_SECONDS", "300"))
+
+
+class ProgressCache:
+    """
+    Bounded LRU cache of progress summaries keyed by (user_id, days)
+
+    Entries expire after the TTL and every window of a user is dropped
+    when a transaction that wrote one of their workouts commits.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._keys_by_user: Dict[int, Set[tuple]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int, days: int) -> Optional[dict]:
+        key = (user_id, days)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, summary = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return summary
+
+    def set(self, user_id: int, days: int, summary: dict):
+        if self.maxsize <= 0:
+            return
+        key = (user_id, days)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, summary)
+            self._entries.move_to_end(key)
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int):
+        """Drop every cached window of a user"""
+        with self._lock:
+            for key in self._keys_by_user.pop(user_id, set()):
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _remove(self, key: tuple):
+        self._entries.pop(key, None)
+        keys = self._keys_by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[key[0]]
+
+
+progress_cache = ProgressCache(maxsize=PROGRESS_CACHE_SIZE, ttl=PROGRESS_CACHE_TTL_SECONDS)
+
+
+@event.listens_for(Workout, "after_insert")
+@event.listens_for(Workout, "after_update")
+@event.listens_for(Workout, "after_delete")
+def _invalidate_progress(mapper, connection, target: Workout):
+    user_ids = {target.user_id, *inspect(target).attrs.user_id.history.deleted}
+    for user_id in user_ids:
+        run_after_commit(object_session(target), progress_cache.invalidate_user, user_id)
+
+
+def _empty_bucket() -> dict:
+    return {"workouts": 0, "minutes": 0, "calories": 0}
+
+
+def _add(bucket: dict, workout_type: str, intensity: str, count: int, minutes: int, calories: int):
+    """Add one grouped row to a bucket and its per-type and per-intensity breakdowns"""
+    for target in (
+        bucket,
+        bucket["by_type"].setdefault(workout_type, _empty_bucket()),
+        bucket["by_intensity"].setdefault(intensity, _empty_bucket())
+    ):
+        target["workouts"] += count
+        target["minutes"] += minutes
+        target["calories"] += calories
+
+
+def _new_bucket(**key) -> dict:
+    return {**key, **_empty_bucket(), "by_type": {}, "by_intensity": {}}
+
+
+async def progress_summary(db: AsyncSession, user_id: int, days: int) -> Optional[dict]:
+    """
+    Workout totals of the last `days` days with daily and weekly buckets
+
+    One query groups the window by (day, workout_type, intensity); totals
+    and buckets are rolled up from those few rows. Returns None when the
+    window has no workouts.
+    """
+    start_date = datetime.utcnow() - timedelta(days=days)
+    day_column = func.date(Workout.date)
+    rows = (await db.execute(
+        select(
+            day_column,
+            Workout.workout_type,
+            Workout.intensity,
+            func.count(Workout.id),
+            func.coalesce(func.sum(Workout.duration), 0),
+            func.coalesce(func.sum(Workout.calories_burned), 0)
+        ).where(
+            Workout.user_id == user_id,
+            Workout.date >= start_date
+        ).group_by(day_column, Workout.workout_type, Workout.intensity).order_by(day_column)
+    )).all()
+
+    if not rows:
+        return None
+
+    totals = _new_bucket()
+    daily: Dict[date, dict] = {}
+    weekly: Dict[date, dict] = {}
+    for day, workout_type, intensity, count, minutes, calories in rows:
+        if not isinstance(day, date):
+            day = date.fromisoformat(day)
+        week_start = day - timedelta(days=day.weekday())
+        for bucket in (
+            totals,
+            daily.setdefault(day, _new_bucket(day=day)),
+            weekly.setdefault(week_start, _new_bucket(week_start=week_start))
+        ):
+            _add(bucket, workout_type, intensity, count, minutes, calories)
+
+    return {
+        "period": f"{days} days",
+        "total_workouts": totals["workouts"],
+        "total_minutes": totals["minutes"],
+        "total_calories_burned": totals["calories"],
+        "consistency_score": min(100, (totals["workouts"] / days) * 100),
+        "by_type": totals["by_type"],
+        "by_intensity": totals["by_intensity"],
+        "daily": list(daily.values()),
+        "weekly": list(weekly.values())
+    }
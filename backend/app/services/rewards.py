@@ -0,0 +1,335 @@
+"""
+Rewards engine
+
+Logged workouts are turned into events that advance a few per-user
+running counters (reward_progress): total workouts, personal records set,
+the current run of consecutive days, and this week's minutes and volume.
+Rules registered with @reward_rule look only at the counters before and
+after an event, so each event costs O(rules) no matter how long the
+user's history is.
+
+Every reward a rule hands out has a code that is unique per user
+("workouts:10", "weekly_minutes:2024-03-04"). Awarding is therefore
+idempotent: replay_rewards can refold workout history at any time and
+only adds rewards that are missing. Rewards are never revoked; deleting
+workouts does not take back a reward already earned.
+"""
+from datetime import date, datetime, timedelta, timezone
+from itertools import groupby
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from ..models import PersonalRecord, Reward, RewardProgress, Workout
+
+REPLAY_BATCH_SIZE = 1000  # users per replay batch
+
+WORKOUT_MILESTONES = (1, 10, 25, 50, 100, 250, 500, 1000)
+STREAK_MILESTONES = (3, 7, 14, 30, 60, 100, 365)
+PR_MILESTONES = (1, 5, 10, 25, 50, 100)
+WEEKLY_MINUTES_GOAL = 150  # WHO guideline for weekly moderate activity
+WEEKLY_VOLUME_GOAL = 10_000.0  # kg lifted (sets x reps x load) in a week
+
+COUNTER_FIELDS = ("workouts", "prs", "last_day", "day_run", "week_start", "week_minutes", "week_volume")
+
+progress_table = RewardProgress.__table__
+rewards_table = Reward.__table__
+workouts_table = Workout.__table__
+
+
+class WorkoutEvent(NamedTuple):
+    day: date
+    minutes: int
+    volume: float
+    is_pr: bool
+    when: datetime
+
+
+class Rule(NamedTuple):
+    name: str
+    check: Callable[[dict, dict, WorkoutEvent], Optional[dict]]
+
+
+RULES: List[Rule] = []
+
+
+def reward_rule(check: Callable[[dict, dict, WorkoutEvent], Optional[dict]]):
+    """
+    Register a rule
+
+    The rule is called with the counters before and after an event and the
+    event itself, and returns the reward it earned ({"code", "title",
+    "description"}) or None.
+    """
+    if any(r.name == check.__name__ for r in RULES):
+        raise ValueError(f"Duplicate reward rule: {check.__name__}")
+    RULES.append(Rule(check.__name__, check))
+    return check
+
+
+def empty_counters() -> dict:
+    return {
+        "workouts": 0, "prs": 0, "last_day": None, "day_run": 0,
+        "week_start": None, "week_minutes": 0, "week_volume": 0.0,
+    }
+
+
+def advance(counters: dict, event: WorkoutEvent) -> dict:
+    """Return the counters after one workout event"""
+    after = dict(counters)
+    after["workouts"] += 1
+    after["prs"] += event.is_pr
+
+    last_day = counters["last_day"]
+    if last_day is None or event.day > last_day:
+        consecutive = last_day is not None and event.day == last_day + timedelta(days=1)
+        after["day_run"] = counters["day_run"] + 1 if consecutive else 1
+        after["last_day"] = event.day
+
+    week_start = event.day - timedelta(days=event.day.weekday())
+    if counters["week_start"] is None or week_start > counters["week_start"]:
+        after.update(week_start=week_start, week_minutes=0, week_volume=0.0)
+    if after["week_start"] == week_start:
+        after["week_minutes"] += event.minutes
+        after["week_volume"] += event.volume
+    return after
+
+
+def evaluate(before: dict, after: dict, event: WorkoutEvent) -> List[dict]:
+    """Rewards earned by moving from `before` to `after`"""
+    return [reward for rule in RULES if (reward := rule.check(before, after, event)) is not None]
+
+
+def _week_total(before: dict, after: dict, field: str):
+    """This week's total before the event (0 when the event started a new week)"""
+    return before[field] if before["week_start"] == after["week_start"] else 0
+
+
+# ---------------------------------------------------------------------------
+# Rules
+# ---------------------------------------------------------------------------
+
+@reward_rule
+def workout_milestone(before: dict, after: dict, event: WorkoutEvent) -> Optional[dict]:
+    count = after["workouts"]
+    if count in WORKOUT_MILESTONES:
+        return {
+            "code": f"workouts:{count}",
+            "title": f"🏋️ {count} Workout{'s' if count > 1 else ''}",
+            "description": f"You've logged {count} workout{'s' if count > 1 else ''}. Keep it up!"
+        }
+
+
+@reward_rule
+def streak_milestone(before: dict, after: dict, event: WorkoutEvent) -> Optional[dict]:
+    run = after["day_run"]
+    if run != before["day_run"] and run in STREAK_MILESTONES:
+        return {
+            "code": f"streak:{run}",
+            "title": f"🔥 {run}-Day Streak!",
+            "description": f"You've worked out {run} days in a row."
+        }
+
+
+@reward_rule
+def weekly_minutes(before: dict, after: dict, event: WorkoutEvent) -> Optional[dict]:
+    if _week_total(before, after, "week_minutes") < WEEKLY_MINUTES_GOAL <= after["week_minutes"]:
+        return {
+            "code": f"weekly_minutes:{after['week_start'].isoformat()}",
+            "title": f"⏱️ {WEEKLY_MINUTES_GOAL} Active Minutes",
+            "description": f"You hit {WEEKLY_MINUTES_GOAL} minutes of exercise in the week of {after['week_start'].isoformat()}."
+        }
+
+
+@reward_rule
+def weekly_volume(before: dict, after: dict, event: WorkoutEvent) -> Optional[dict]:
+    if _week_total(before, after, "week_volume") < WEEKLY_VOLUME_GOAL <= after["week_volume"]:
+        return {
+            "code": f"weekly_volume:{after['week_start'].isoformat()}",
+            "title": f"💪 {WEEKLY_VOLUME_GOAL:,.0f} kg Week",
+            "description": f"You lifted {WEEKLY_VOLUME_GOAL:,.0f} kg in the week of {after['week_start'].isoformat()}."
+        }
+
+
+@reward_rule
+def pr_milestone(before: dict, after: dict, event: WorkoutEvent) -> Optional[dict]:
+    count = after["prs"]
+    if count != before["prs"] and count in PR_MILESTONES:
+        return {
+            "code": f"prs:{count}",
+            "title": f"🏆 {count} Personal Record{'s' if count > 1 else ''}",
+            "description": f"You've set {count} personal record{'s' if count > 1 else ''}."
+        }
+
+
+# ---------------------------------------------------------------------------
+# Awarding
+# ---------------------------------------------------------------------------
+
+def _naive_utc(when: datetime) -> datetime:
+    return when.astimezone(timezone.utc).replace(tzinfo=None) if when.tzinfo else when
+
+
+def _volume(sets, reps, load_kg) -> float:
+    return float((sets or 0) * (reps or 0) * (load_kg or 0))
+
+
+def award(conn: Connection, user_id: int, earned: List[dict]) -> List[dict]:
+    """Insert the earned rewards the user does not have yet, returning those"""
+    if not earned:
+        return []
+    existing = set(conn.execute(
+        select(rewards_table.c.code).where(
+            rewards_table.c.user_id == user_id,
+            rewards_table.c.code.in_([r["code"] for r in earned])
+        )
+    ).scalars())
+    new = [{"user_id": user_id, **r} for r in earned if r["code"] not in existing]
+    if new:
+        conn.execute(insert(rewards_table), new)
+    return new
+
+
+def record_workout(db: Session, workout: Workout) -> List[dict]:
+    """
+    Feed a newly logged (and flushed) workout to the rewards engine
+
+    Users without counters yet have their history replayed instead, which
+    includes this workout.
+
+    Returns:
+        The rewards newly earned
+    """
+    progress = db.get(RewardProgress, workout.user_id)
+    if progress is None:
+        return replay_rewards(db.connection(), workout.user_id)["earned"]
+
+    # The personal-record hooks ran at flush; the record names its workout
+    record_holder = db.execute(
+        select(PersonalRecord.workout_id).where(
+            PersonalRecord.user_id == workout.user_id,
+            PersonalRecord.exercise == workout.workout_type
+        )
+    ).scalar()
+    when = _naive_utc(workout.date)
+    event = WorkoutEvent(
+        day=when.date(),
+        minutes=workout.duration or 0,
+        volume=_volume(workout.sets, workout.reps, workout.load_kg),
+        is_pr=workout.reps is not None and record_holder == workout.id,
+        when=when
+    )
+
+    before = {field: getattr(progress, field) for field in COUNTER_FIELDS}
+    after = advance(before, event)
+    for field in COUNTER_FIELDS:
+        setattr(progress, field, after[field])
+
+    earned = [{**r, "earned_at": when} for r in evaluate(before, after, event)]
+    return award(db.connection(), workout.user_id, earned)
+
+
+def _fold_user(rows) -> tuple:
+    """Replay one user's workouts in order, returning final counters and earned rewards"""
+    counters = empty_counters()
+    best: Dict[str, tuple] = {}
+    earned = []
+    for row in rows:
+        is_pr = False
+        if row.reps is not None:
+            load = row.load_kg or 0.0
+            rank = (row.reps * load, load, row.reps)
+            if row.workout_type not in best or rank > best[row.workout_type]:
+                best[row.workout_type] = rank
+                is_pr = True
+        event = WorkoutEvent(
+            day=row.date.date(),
+            minutes=row.duration or 0,
+            volume=_volume(row.sets, row.reps, row.load_kg),
+            is_pr=is_pr,
+            when=row.date
+        )
+        after = advance(counters, event)
+        earned.extend({**r, "earned_at": row.date} for r in evaluate(counters, after, event))
+        counters = after
+    return counters, earned
+
+
+def replay_rewards(conn: Connection, user_id: Optional[int] = None, batch_size: Optional[int] = None) -> dict:
+    """
+    Rebuild reward counters from workout history and award missing rewards
+
+    Users are taken in id-ordered batches; each batch's workouts are read
+    once in (user, date) order over the (user_id, date) index and folded
+    per user, then counters and new rewards are written with one
+    executemany each. Already awarded codes are skipped, so replaying is
+    safe to repeat.
+
+    Returns:
+        Counts of users, workouts and rewards added, and the rewards added
+    """
+    batch_size = batch_size or REPLAY_BATCH_SIZE
+    users = workouts = 0
+    added = []
+    last_id = user_id - 1 if user_id is not None else 0
+
+    while True:
+        ids = select(workouts_table.c.user_id).where(workouts_table.c.user_id > last_id)
+        if user_id is not None:
+            ids = ids.where(workouts_table.c.user_id == user_id)
+        # The highest user id in the next batch of users with workouts
+        batch = ids.distinct().order_by(workouts_table.c.user_id).limit(batch_size).subquery()
+        bound = conn.execute(select(func.max(batch.c.user_id))).scalar()
+        if bound is None:
+            break
+
+        rows = conn.execute(
+            select(
+                workouts_table.c.user_id, workouts_table.c.date, workouts_table.c.duration,
+                workouts_table.c.workout_type, workouts_table.c.sets, workouts_table.c.reps,
+                workouts_table.c.load_kg
+            )
+            .where(workouts_table.c.user_id > last_id, workouts_table.c.user_id <= bound)
+            .order_by(workouts_table.c.user_id, workouts_table.c.date, workouts_table.c.id)
+        ).all()
+        workouts += len(rows)
+
+        progress, earned = [], []
+        for current_user, history in groupby(rows, key=lambda row: row.user_id):
+            counters, user_earned = _fold_user(history)
+            progress.append({"user_id": current_user, **counters})
+            earned.extend({"user_id": current_user, **r} for r in user_earned)
+        users += len(progress)
+
+        in_batch = (progress_table.c.user_id > last_id, progress_table.c.user_id <= bound)
+        conn.execute(delete(progress_table).where(*in_batch))
+        conn.execute(insert(progress_table), progress)
+        added.extend(_award_many(conn, last_id, bound, earned))
+        last_id = bound
+
+    return {"users": users, "workouts": workouts, "rewards": len(added), "earned": added}
+
+
+def _award_many(conn: Connection, first_after: int, last: int, earned: List[dict]) -> List[dict]:
+    """Insert the rewards of users in (first_after, last] they do not have yet"""
+    if not earned:
+        return []
+    existing = set(conn.execute(
+        select(rewards_table.c.user_id, rewards_table.c.code).where(
+            rewards_table.c.user_id > first_after,
+            rewards_table.c.user_id <= last,
+            rewards_table.c.code.isnot(None)
+        )
+    ).tuples())
+    new = []
+    for reward in earned:
+        # Milestones such as streak:3 can be reached again after a break
+        key = (reward["user_id"], reward["code"])
+        if key not in existing:
+            existing.add(key)
+            new.append(reward)
+    if new:
+        conn.execute(insert(rewards_table), new)
+    return new
@@ -0,0 +1,159 @@
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models import UserStreak, Workout
+
+
+def compute_streaks(workout_days: Iterable[date], today: Optional[date] = None) -> dict:
+    """
+    Calculate current and longest streaks from a collection of workout days
+
+    This is the full-history scan used to build the persisted state and to
+    check it for consistency. Multiple workouts on the same day count once.
+    """
+    today = today or date.today()
+    unique_days = set(workout_days)
+
+    if not unique_days:
+        return {"current_streak": 0, "longest_streak": 0}
+
+    # Current streak only counts when it reaches today
+    current_streak = 0
+    check_date = today
+    for workout_day in sorted(unique_days, reverse=True):
+        if workout_day == check_date:
+            current_streak += 1
+            check_date = check_date - timedelta(days=1)
+        elif workout_day < check_date:
+            break
+
+    longest_streak = 0
+    temp_streak = 1
+    sorted_days = sorted(unique_days)
+    for i in range(1, len(sorted_days)):
+        if (sorted_days[i] - sorted_days[i - 1]).days == 1:
+            temp_streak += 1
+            longest_streak = max(longest_streak, temp_streak)
+        else:
+            temp_streak = 1
+    longest_streak = max(longest_streak, temp_streak)
+
+    return {"current_streak": current_streak, "longest_streak": longest_streak}
+
+
+def scan_streaks(db: Session, user_id: int, today: Optional[date] = None) -> dict:
+    """Calculate streaks by scanning every workout the user has logged"""
+    rows = db.query(Workout.date).filter(Workout.user_id == user_id).all()
+    return compute_streaks((row.date.date() for row in rows), today)
+
+
+def rebuild_streak(db: Session, user_id: int) -> UserStreak:
+    """Recompute the persisted streak state for a user from full history"""
+    rows = db.query(Workout.date).filter(Workout.user_id == user_id).all()
+    days = sorted({row.date.date() for row in rows})
+
+    current_run = 0
+    longest_run = 0
+    previous = None
+    for day in days:
+        if previous is not None and (day - previous).days == 1:
+            current_run += 1
+        else:
+            current_run = 1
+        longest_run = max(longest_run, current_run)
+        previous = day
+
+    state = db.get(UserStreak, user_id)
+    if state is None:
+        state = UserStreak(user_id=user_id)
+        db.add(state)
+
+    state.current_run = current_run
+    state.longest_run = longest_run
+    state.last_active_day = previous
+    return state
+
+
+def get_streak_state(db: Session, user_id: int) -> UserStreak:
+    """Load the persisted streak state, building it on first access"""
+    state = db.get(UserStreak, user_id)
+    if state is None:
+        state = rebuild_streak(db, user_id)
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent first request stored the state already
+            db.rollback()
+            state = db.get(UserStreak, user_id)
+    return state
+
+
+def record_workout_day(db: Session, user_id: int, workout_day: date) -> UserStreak:
+    """Extend the streak state with a newly logged workout day"""
+    state = db.get(UserStreak, user_id)
+    if state is None:
+        return rebuild_streak(db, user_id)
+
+    last_day = state.last_active_day
+    if last_day is None:
+        state.current_run = 1
+    elif workout_day == last_day:
+        return state
+    elif workout_day == last_day + timedelta(days=1):
+        state.current_run += 1
+    elif workout_day > last_day:
+        state.current_run = 1
+    else:
+        # A day before the last active day can join or split earlier runs
+        return rebuild_streak(db, user_id)
+
+    state.last_active_day = workout_day
+    state.longest_run = max(state.longest_run or 0, state.current_run)
+    return state
+
+
+def remove_workout_day(db: Session, user_id: int, workout_day: date) -> Optional[UserStreak]:
+    """
+    Update the streak state after a workout on the given day was deleted
+
+    The state only changes when no other workout remains on that day, in
+    which case the run it belonged to is broken and history is rebuilt.
+    """
+    day_start = datetime.combine(workout_day, datetime.min.time())
+    still_active = db.query(Workout.id).filter(
+        Workout.user_id == user_id,
+        Workout.date >= day_start,
+        Workout.date < day_start + timedelta(days=1)
+    ).first()
+
+    if still_active:
+        return db.get(UserStreak, user_id)
+
+    return rebuild_streak(db, user_id)
+
+
+def streak_response(state: UserStreak, today: Optional[date] = None) -> dict:
+    """Convert persisted streak state into the /streaks response"""
+    today = today or date.today()
+    current_streak = state.current_run if state.last_active_day == today else 0
+    return {
+        "current_streak": current_streak or 0,
+        "longest_streak": state.longest_run or 0
+    }
+
+
+def check_streak_consistency(db: Session, user_id: int, today: Optional[date] = None) -> dict:
+    """Compare the persisted streak state against a full-history scan"""
+    today = today or date.today()
+    stored = streak_response(get_streak_state(db, user_id), today)
+    scanned = scan_streaks(db, user_id, today)
+    return {
+        "user_id": user_id,
+        "stored": stored,
+        "scanned": scanned,
+        "consistent": stored == scanned
+    }
+
@@ -0,0 +1,244 @@
+"""
+Structured strength sets and personal records
+
+Workout notes such as "3x10 @ 60kg" are parsed once when a workout is
+written, into the sets, reps and load_kg columns. personal_records keeps
+each user's best set per exercise (workout_type), ranked by reps x load,
+together with the heaviest load logged. Like the analytics rollups it is
+kept current by mapper hooks on Workout; Core bulk inserts report their
+rows through record_bulk_workouts, and backfill_strength parses existing
+rows and rebuilds every record.
+"""
+import os
+import re
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import bindparam, delete, event, func, insert, inspect, select, update
+from sqlalchemy.engine import Connection
+
+from ..models import PersonalRecord, Workout
+
+BACKFILL_CHUNK_SIZE = int(os.getenv("BACKFILL_CHUNK_SIZE", "5000"))
+
+LB_TO_KG = 0.45359237
+
+# "3x10 @ 60kg", "5 × 5 @ 225 lbs", "4x8" (bodyweight)
+SET_PATTERN = re.compile(
+    r"(?P<sets>\d+)\s*[x×]\s*(?P<reps>\d+)"
+    r"(?:\s*@\s*(?P<load>\d+(?:[.,]\d+)?)\s*(?P<unit>kgs?|lbs?)?)?",
+    re.IGNORECASE,
+)
+
+records_table = PersonalRecord.__table__
+workouts_table = Workout.__table__
+
+STRENGTH_FIELDS = ("sets", "reps", "load_kg")
+
+_write_back = (
+    update(workouts_table)
+    .where(workouts_table.c.id == bindparam("row_id"))
+    .values({name: bindparam(f"new_{name}") for name in STRENGTH_FIELDS})
+)
+
+
+def parse_sets(notes: Optional[str]) -> dict:
+    """
+    Parse the first "<sets>x<reps> [@ <load>[kg|lb]]" in workout notes
+
+    Returns:
+        sets, reps and load_kg (loads in pounds are converted), all None
+        when the notes hold no set description
+    """
+    match = SET_PATTERN.search(notes or "")
+    if match is None:
+        return dict.fromkeys(STRENGTH_FIELDS)
+    load = match["load"]
+    load_kg = None
+    if load is not None:
+        load_kg = float(load.replace(",", "."))
+        if (match["unit"] or "kg").lower().startswith("lb"):
+            load_kg = round(load_kg * LB_TO_KG, 2)
+    return {"sets": int(match["sets"]), "reps": int(match["reps"]), "load_kg": load_kg}
+
+
+def _naive_utc(when: datetime) -> datetime:
+    # Routes stamp workouts with aware UTC times; stored values are naive
+    return when.astimezone(timezone.utc).replace(tzinfo=None) if when.tzinfo else when
+
+
+def _rank(reps: int, weight: float) -> tuple:
+    return (reps * weight, weight, reps)
+
+
+def _offer(conn: Connection, user_id: int, exercise: str, workout_id: int,
+           reps: int, weight: float, when: datetime):
+    """Raise the user's record for an exercise if this set beats it"""
+    key = (records_table.c.user_id == user_id, records_table.c.exercise == exercise)
+    row = conn.execute(select(records_table).where(*key).with_for_update()).first()
+    best = {
+        "weight": weight, "reps": reps, "volume": reps * weight,
+        "workout_id": workout_id, "achieved_at": _naive_utc(when),
+    }
+    if row is None:
+        conn.execute(insert(records_table).values(user_id=user_id, exercise=exercise, max_weight=weight, **best))
+        return
+
+    values = {}
+    new, old = _rank(reps, weight), _rank(row.reps, row.weight)
+    # Equal sets keep the earliest workout as the record
+    if new > old or (new == old and (best["achieved_at"], workout_id) < (row.achieved_at, row.workout_id)):
+        values.update(best)
+    if weight > row.max_weight:
+        values["max_weight"] = weight
+    if values:
+        conn.execute(update(records_table).where(*key).values(**values))
+
+
+def _recompute(conn: Connection, user_id: int, exercise: str):
+    """Rebuild one user's record for an exercise from their workouts"""
+    weight = func.coalesce(workouts_table.c.load_kg, 0.0)
+    logged = (
+        workouts_table.c.user_id == user_id,
+        workouts_table.c.workout_type == exercise,
+        workouts_table.c.reps.isnot(None),
+    )
+    best = conn.execute(
+        select(workouts_table.c.id, workouts_table.c.reps, weight.label("weight"), workouts_table.c.date)
+        .where(*logged)
+        .order_by(
+            (workouts_table.c.reps * weight).desc(), weight.desc(), workouts_table.c.reps.desc(),
+            workouts_table.c.date, workouts_table.c.id
+        )
+        .limit(1)
+    ).first()
+
+    key = (records_table.c.user_id == user_id, records_table.c.exercise == exercise)
+    conn.execute(delete(records_table).where(*key))
+    if best is None:
+        return
+    conn.execute(insert(records_table).values(
+        user_id=user_id, exercise=exercise,
+        weight=best.weight, reps=best.reps, volume=best.reps * best.weight,
+        max_weight=conn.execute(select(func.max(weight)).where(*logged)).scalar(),
+        workout_id=best.id, achieved_at=best.date,
+    ))
+
+
+def _retract(conn: Connection, workout_id: int, user_id: int, exercise: str, weight: float):
+    """Recompute a record that a changed or deleted workout may have held"""
+    row = conn.execute(
+        select(records_table).where(records_table.c.user_id == user_id, records_table.c.exercise == exercise)
+    ).first()
+    if row is not None and (row.workout_id == workout_id or weight >= row.max_weight):
+        _recompute(conn, user_id, exercise)
+
+
+@event.listens_for(Workout, "after_insert")
+def _workout_inserted(mapper, conn, target: Workout):
+    if target.reps is not None:
+        _offer(conn, target.user_id, target.workout_type, target.id,
+               target.reps, target.load_kg or 0.0, target.date)
+
+
+@event.listens_for(Workout, "after_delete")
+def _workout_deleted(mapper, conn, target: Workout):
+    if target.reps is not None:
+        _retract(conn, target.id, target.user_id, target.workout_type, target.load_kg or 0.0)
+
+
+@event.listens_for(Workout, "after_update")
+def _workout_updated(mapper, conn, target: Workout):
+    fields = ("user_id", "workout_type", "reps", "load_kg", "date")
+    state = inspect(target).attrs
+    before = {f: (state[f].history.deleted or [getattr(target, f)])[0] for f in fields}
+    if all(before[f] == getattr(target, f) for f in fields):
+        return
+    if before["reps"] is not None:
+        _retract(conn, target.id, before["user_id"], before["workout_type"], before["load_kg"] or 0.0)
+    _workout_inserted(mapper, conn, target)
+
+
+def record_bulk_workouts(conn: Connection, user_id: int, rows: List[dict]):
+    """Update records for workouts inserted with a Core executemany"""
+    for exercise in {row["workout_type"] for row in rows if row.get("reps") is not None}:
+        _recompute(conn, user_id, exercise)
+
+
+def rebuild_records(conn: Connection) -> int:
+    """Rebuild personal_records from the parsed workout columns in one pass"""
+    weight = func.coalesce(workouts_table.c.load_kg, 0.0)
+    rows = conn.execution_options(yield_per=BACKFILL_CHUNK_SIZE).execute(
+        select(
+            workouts_table.c.user_id, workouts_table.c.workout_type, workouts_table.c.id,
+            workouts_table.c.reps, weight, workouts_table.c.date
+        ).where(workouts_table.c.reps.isnot(None))
+    )
+
+    records = {}
+    for user_id, exercise, workout_id, reps, load, when in rows:
+        record = records.get((user_id, exercise))
+        if record is None:
+            records[(user_id, exercise)] = {
+                "user_id": user_id, "exercise": exercise, "weight": load, "reps": reps,
+                "volume": reps * load, "max_weight": load, "workout_id": workout_id, "achieved_at": when,
+            }
+            continue
+        record["max_weight"] = max(record["max_weight"], load)
+        new, old = _rank(reps, load), _rank(record["reps"], record["weight"])
+        if new > old or (new == old and (when, workout_id) < (record["achieved_at"], record["workout_id"])):
+            record.update(weight=load, reps=reps, volume=reps * load, workout_id=workout_id, achieved_at=when)
+
+    conn.execute(delete(records_table))
+    if records:
+        conn.execute(insert(records_table), list(records.values()))
+    return len(records)
+
+
+def backfill_strength(conn: Connection, chunk_size: Optional[int] = None) -> dict:
+    """
+    Parse the notes of existing workouts and rebuild every personal record
+
+    Workouts are read in id-ordered chunks and only rows whose parsed values
+    changed are written back, so rerunning the backfill is cheap.
+
+    Returns:
+        Counts of workouts scanned, parsed and updated, records and elapsed time
+    """
+    started = time.perf_counter()
+    chunk_size = chunk_size or BACKFILL_CHUNK_SIZE
+    scanned = parsed = updated = 0
+    last_id = 0
+
+    while True:
+        rows = conn.execute(
+            select(workouts_table.c.id, workouts_table.c.notes,
+                   *(workouts_table.c[name] for name in STRENGTH_FIELDS))
+            .where(workouts_table.c.id > last_id)
+            .order_by(workouts_table.c.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        scanned += len(rows)
+
+        changes = []
+        for row in rows:
+            fields = parse_sets(row.notes)
+            parsed += fields["reps"] is not None
+            if tuple(fields.values()) != tuple(row[2:]):
+                changes.append({"row_id": row.id, **{f"new_{k}": v for k, v in fields.items()}})
+        if changes:
+            conn.execute(_write_back, changes)
+            updated += len(changes)
+
+    records = rebuild_records(conn)
+    return {
+        "workouts": scanned,
+        "parsed": parsed,
+        "updated": updated,
+        "records": records,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
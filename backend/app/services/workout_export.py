@@ -0,0 +1,83 @@
+import csv
+import io
+import json
+import os
+from typing import AsyncIterator, Optional
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Workout
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# Same fields POST /workouts/import accepts, so an export can be re-imported
+EXPORT_COLUMNS = ("id", "workout_type", "duration", "intensity", "calories_burned", "notes", "date")
+
+
+def export_query(user_id: Optional[int] = None):
+    """Workouts of one user (or everyone) in (user_id, date, id) order"""
+    columns = [Workout.__table__.c[name] for name in EXPORT_COLUMNS]
+    if user_id is None:
+        query = select(Workout.user_id, *columns).order_by(Workout.user_id)
+    else:
+        query = select(*columns).where(Workout.user_id == user_id)
+    return query.order_by(Workout.date, Workout.id)
+
+
+def _csv_lines(rows, header=None) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(header)
+    for row in rows:
+        writer.writerow(value.isoformat() if hasattr(value, "isoformat") else value for value in row)
+    return buffer.getvalue()
+
+
+def _ndjson_lines(rows) -> str:
+    return "".join(
+        json.dumps(dict(row._mapping), default=lambda value: value.isoformat()) + "\n"
+        for row in rows
+    )
+
+
+async def stream_workouts(
+    db: AsyncSession,
+    file_format: str,
+    user_id: Optional[int] = None,
+    batch_size: Optional[int] = None
+) -> AsyncIterator[str]:
+    """
+    Yield an export of workouts as CSV or NDJSON text, one batch at a time
+
+    Rows come from a server-side cursor (`yield_per`), so only one batch is
+    in memory however large the export is. The generator closes `db` when
+    it finishes, since a streamed body outlives the request's dependencies.
+    """
+    query = export_query(user_id)
+    try:
+        if file_format == "csv":
+            # The header goes out before the query runs
+            yield _csv_lines((), header=[c.name for c in query.selected_columns])
+
+        result = await db.stream(query.execution_options(yield_per=batch_size or EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            yield _csv_lines(rows) if file_format == "csv" else _ndjson_lines(rows)
+    finally:
+        await db.close()
+
+
+def export_response(db: AsyncSession, file_format: str, filename: str, user_id: Optional[int] = None) -> StreamingResponse:
+    """StreamingResponse serving stream_workouts as a file download"""
+    return StreamingResponse(
+        stream_workouts(db, file_format, user_id),
+        media_type=FORMATS[file_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{file_format}"'}
+    )
@@ -0,0 +1,178 @@
+import codecs
+import csv
+import json
+import os
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models import Workout
+from ..schemas import WorkoutImportRow
+from . import analytics, data_versions, engagement, rewards, streaks, strength
+from .progress import progress_cache
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+# Only the first errors are reported; the rest are counted
+IMPORT_MAX_REPORTED_ERRORS = 100
+
+FORMATS = ("csv", "ndjson")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream as UTF-8 and yield it line by line, keeping line endings"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        # Only "\n" ends a record; str.splitlines would also break on U+2028,
+        # form feeds and other separators that may appear inside a value.
+        # A trailing "\r" stays on the line for csv/json to deal with.
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, dict]]:
+    """Yield (row number, record) pairs from CSV text with a header row"""
+    header = None
+    record = ""
+    row_number = 0
+    async for line in lines:
+        record += line
+        # A quoted field can span lines; doubled quotes keep the count even
+        if record.count('"') % 2:
+            continue
+        fields = next(csv.reader([record]), [])
+        record = ""
+        if not any(field.strip() for field in fields):
+            continue
+        if header is None:
+            header = [field.strip() for field in fields]
+            continue
+        row_number += 1
+        # Empty cells mean "not given" so optional fields fall back to defaults
+        yield row_number, {k: v for k, v in zip(header, fields) if v != ""}
+    if record.strip():
+        row_number += 1
+        yield row_number, {"__error__": "Unterminated quoted field"}
+
+
+async def iter_ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, dict]]:
+    """Yield (row number, record) pairs from newline-delimited JSON"""
+    row_number = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            record = {"__error__": f"Invalid JSON: {e.msg}"}
+        if not isinstance(record, dict):
+            record = {"__error__": "Expected a JSON object"}
+        yield row_number, record
+
+
+def to_row(user_id: int, record: dict, imported_at: datetime) -> dict:
+    """Validate a raw record against WorkoutImportRow and build a workouts row"""
+    if "__error__" in record:
+        raise ValueError(record["__error__"])
+    workout = WorkoutImportRow.model_validate(record)
+    when = workout.date or imported_at
+    if when.tzinfo is not None:
+        when = when.astimezone(timezone.utc).replace(tzinfo=None)
+    return {
+        "user_id": user_id,
+        "workout_type": workout.workout_type,
+        "duration": workout.duration,
+        "intensity": workout.intensity,
+        "calories_burned": workout.calories_burned,
+        "notes": workout.notes,
+        "date": when,
+        **strength.parse_sets(workout.notes)
+    }
+
+
+def insert_batch(db: Session, user_id: int, rows: List[dict]):
+    """Insert one batch with a single executemany and update the rollups"""
+    conn = db.connection()
+    activity = analytics.user_activity(conn, user_id, {row["date"].date() for row in rows})
+    conn.execute(insert(Workout.__table__), rows)
+    data_versions.touch(db, [user_id], conn)
+    analytics.record_bulk_workouts(conn, user_id, rows, activity)
+    engagement.record_bulk_workouts(conn, user_id, rows)
+    strength.record_bulk_workouts(conn, user_id, rows)
+
+
+def error_messages(error: Exception) -> List[str]:
+    if isinstance(error, ValidationError):
+        return [f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in error.errors()]
+    return [str(error)]
+
+
+async def import_workouts(
+    db: AsyncSession,
+    user_id: int,
+    chunks: AsyncIterator[bytes],
+    file_format: str,
+    batch_size: Optional[int] = None
+) -> dict:
+    """
+    Stream workouts from a CSV or NDJSON body into the database
+
+    Rows are validated as they arrive and inserted in batches, each batch in
+    its own transaction, so memory use is bounded by the batch size rather
+    than the upload. Invalid rows are skipped and reported by row number.
+    """
+    batch_size = batch_size or IMPORT_BATCH_SIZE
+    parse = iter_csv_records if file_format == "csv" else iter_ndjson_records
+    imported_at = datetime.utcnow()
+
+    imported = 0
+    failed = 0
+    errors = []
+    batch = []
+
+    async def flush():
+        nonlocal imported
+        await db.run_sync(insert_batch, user_id, batch)
+        await db.commit()
+        imported += len(batch)
+        batch.clear()
+
+    async for row_number, record in parse(iter_lines(chunks)):
+        try:
+            batch.append(to_row(user_id, record, imported_at))
+        except (ValidationError, ValueError) as e:
+            failed += 1
+            if len(errors) < IMPORT_MAX_REPORTED_ERRORS:
+                errors.append({"row": row_number, "errors": error_messages(e)})
+            continue
+        if len(batch) >= batch_size:
+            await flush()
+
+    if batch:
+        await flush()
+
+    if imported:
+        # Imported history can land anywhere in the past, so rebuild streaks
+        # and refold reward counters once
+        await db.run_sync(lambda session: streaks.rebuild_streak(session, user_id))
+        await db.run_sync(lambda session: rewards.replay_rewards(session.connection(), user_id))
+        await db.commit()
+        # Core inserts bypass the Workout mapper hooks
+        progress_cache.invalidate_user(user_id)
+
+    return {
+        "imported": imported,
+        "failed": failed,
+        "errors": errors,
+        "errors_truncated": failed > len(errors)
+    }
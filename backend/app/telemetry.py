@@ -0,0 +1,286 @@
+"""
+Request, database and Gemini instrumentation in Prometheus text format
+
+TelemetryMiddleware times every HTTP request and labels it with the route
+template ("/admin/users/{user_id}/stats"), so ids in paths do not create a
+series each. SQL statements are counted and timed with engine events and
+attributed to the request running them through a context variable, which
+the threadpool that runs sync routes copies along. Requests in flight are
+counted per route when /metrics is scraped, by looking at which route each
+active request was dispatched to, so the hot path only adds and removes
+one dict entry. Gemini call latency is recorded by gemini_client.
+
+Everything lives in process memory; with several workers each one reports
+its own numbers.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+UNMATCHED_ROUTE = "unmatched"  # 404s and the like share one series
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic totals per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: tuple = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+
+
+class Gauge:
+    """Values read from a callback at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str], read: Callable[[], Dict[tuple, float]]):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self.read = read
+
+    def clear(self):
+        pass
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in sorted(self.read().items()):
+            yield f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+
+
+class Histogram:
+    """Bucketed observations per label set; buckets are cumulative only when rendered"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket (last is +Inf), sum]
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, labels: tuple = ()) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def total(self, labels: tuple = ()) -> float:
+        series = self._series.get(labels)
+        return series[1] if series else 0
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._series.items())
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                bucket = _labels(self.label_names, labels, 'le="' + le + '"')
+                yield f"{self.name}_bucket{bucket} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {_number(float(total))}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List = []
+
+    def register(self, metric):
+        if any(m.name == metric.name for m in self.metrics):
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self.metrics.append(metric)
+        return metric
+
+    def clear(self):
+        """Reset every series (for tests)"""
+        for metric in self.metrics:
+            metric.clear()
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# Scopes of requests currently inside the app; the router adds "route" to
+# each scope when it dispatches it
+_active: Dict[int, dict] = {}
+
+
+def _route_name(scope: dict) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", UNMATCHED_ROUTE) if route is not None else UNMATCHED_ROUTE
+
+
+def _in_flight() -> Dict[tuple, float]:
+    counts: Dict[tuple, float] = {}
+    for scope in list(_active.values()):
+        key = (scope["method"], _route_name(scope))
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status code", ("method", "route", "status")
+))
+http_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "Time from request start to the end of the response", ("method", "route")
+))
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "Requests being handled", ("method", "route"), _in_flight
+))
+request_statements = registry.register(Histogram(
+    "http_request_db_statements", "SQL statements executed per request", ("method", "route"), STATEMENT_BUCKETS
+))
+request_db_time = registry.register(Histogram(
+    "http_request_db_seconds", "Time spent executing SQL per request", ("method", "route")
+))
+db_statements = registry.register(Counter(
+    "db_statements_total", "SQL statements executed, including outside requests"
+))
+db_time = registry.register(Counter(
+    "db_statement_seconds_total", "Time spent executing SQL, including outside requests"
+))
+gemini_latency = registry.register(Histogram(
+    "gemini_request_duration_seconds", "Gemini generate_text calls by outcome", ("outcome",)
+))
+
+
+# ---------------------------------------------------------------------------
+# Database
+# ---------------------------------------------------------------------------
+
+class QueryStats:
+    __slots__ = ("statements", "seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+
+
+_request_queries: ContextVar[Optional[QueryStats]] = ContextVar("request_queries", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    context._telemetry_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._telemetry_started
+    stats = _request_queries.get()
+    if stats is None:
+        db_statements.inc()
+        db_time.inc(amount=elapsed)
+    else:
+        # Added to the totals once the request finishes
+        stats.statements += 1
+        stats.seconds += elapsed
+
+
+# ---------------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------------
+
+class TelemetryMiddleware:
+    """ASGI middleware recording latency, status and SQL work per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        stats = QueryStats()
+        token = _request_queries.set(stats)
+        key = id(scope)
+        _active[key] = scope
+
+        async def send_and_record_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_and_record_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _active.pop(key, None)
+            _request_queries.reset(token)
+            labels = (scope["method"], _route_name(scope))
+            http_requests.inc(labels + (str(status_code),))
+            http_latency.observe(labels, elapsed)
+            request_statements.observe(labels, stats.statements)
+            request_db_time.observe(labels, stats.seconds)
+            if stats.statements:
+                db_statements.inc(amount=stats.statements)
+                db_time.inc(amount=stats.seconds)
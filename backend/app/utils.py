@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def calculate_bmi(weight: float, height: float) -> float:
     """
     Calculate BMI (Body Mass Index)
@@ -47,4 +50,46 @@ def calculate_skeletal_muscle(weight: float, height: float, age: int, gender: st
     if gender.lower() == "male":
         return round(0.407 * weight + 0.267 * height - 0.048 * age - 19.2, 2)
     else:
-        return round(0.252 * weight + 0.473 * height - 0.048 * age + 0.4, 2)
\ No newline at end of file
+        return round(0.252 * weight + 0.473 * height - 0.048 * age + 0.4, 2)
+
+
+def _round2(values: np.ndarray) -> np.ndarray:
+    """
+    Round to 2 decimal places exactly like the built-in round()
+
+    np.round rounds the scaled binary value, which can fall on the other
+    side of a .xx5 tie than round()'s correctly rounded result. Only those
+    rare near-ties are settled with round() itself.
+    """
+    scaled = values * 100
+    rounded = np.round(values, 2)
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_tie.any():
+        rounded[near_tie] = [round(v, 2) for v in values[near_tie].tolist()]
+    return rounded
+
+
+def _is_male(genders) -> np.ndarray:
+    return np.char.lower(np.asarray(genders, dtype=str)) == "male"
+
+
+def calculate_bmi_array(weights, heights) -> np.ndarray:
+    """Vectorized calculate_bmi over arrays of weights (kg) and heights (cm)"""
+    height_m = np.asarray(heights, dtype=np.float64) / 100
+    return _round2(np.asarray(weights, dtype=np.float64) / (height_m ** 2))
+
+
+def calculate_body_fat_array(bmis, ages, genders) -> np.ndarray:
+    """Vectorized calculate_body_fat; genders other than 'male' use the female formula"""
+    base = (1.20 * np.asarray(bmis, dtype=np.float64)) + (0.23 * np.asarray(ages, dtype=np.float64))
+    return _round2(np.where(_is_male(genders), base - 16.2, base - 5.4))
+
+
+def calculate_skeletal_muscle_array(weights, heights, ages, genders) -> np.ndarray:
+    """Vectorized calculate_skeletal_muscle over arrays of weights, heights, ages and genders"""
+    weights = np.asarray(weights, dtype=np.float64)
+    heights = np.asarray(heights, dtype=np.float64)
+    ages = np.asarray(ages, dtype=np.float64)
+    male = 0.407 * weights + 0.267 * heights - 0.048 * ages - 19.2
+    female = 0.252 * weights + 0.473 * heights - 0.048 * ages + 0.4
+    return _round2(np.where(_is_male(genders), male, female))
@@ -0,0 +1,77 @@
+"""
+/ai/recommendations under load with a slow fake Gemini backend
+
+Fires a burst of AI requests and, while they are queued behind the
+concurrency limit, measures how fast GET /health still answers on the same
+event loop.
+
+Usage:
+    python -m benchmarks.ai_load --requests 40 --latency 0.5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.auth import get_current_user
+from app.main import app
+from app.models import User
+from app.services import gemini_client
+from app.services.gemini_client import FakeBackend
+
+
+async def main(args):
+    gemini_client.set_backend(FakeBackend(latency=args.latency))
+    user = User(id=1, username="bench", email="bench@example.com", is_admin=False)
+
+    async def bench_user():
+        return user
+
+    # Skip authentication; the handler's metrics and workout lookups are
+    # read-only queries against DATABASE_URL
+    app.dependency_overrides[get_current_user] = bench_user
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def ask(i):
+            started = time.perf_counter()
+            response = await client.post("/ai/recommendations", json={"prompt": f"question {i}"})
+            return response.status_code, time.perf_counter() - started
+
+        async def health():
+            latencies = []
+            while not burst.done():
+                started = time.perf_counter()
+                await client.get("/health")
+                latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+            return latencies
+
+        started = time.perf_counter()
+        burst = asyncio.ensure_future(asyncio.gather(*(ask(i) for i in range(args.requests))))
+        health_latencies = await health()
+        results = await burst
+        elapsed = time.perf_counter() - started
+
+    app.dependency_overrides.clear()
+
+    ai_latencies = sorted(latency for _, latency in results)
+    statuses = sorted({status for status, _ in results})
+    print(
+        f"{args.requests} AI requests, backend latency {args.latency}s, "
+        f"max concurrency {gemini_client.GEMINI_MAX_CONCURRENCY}"
+    )
+    print(f"AI:     statuses {statuses}, p50 {statistics.median(ai_latencies):.2f}s, "
+          f"max {ai_latencies[-1]:.2f}s, total {elapsed:.2f}s")
+    print(f"health: {len(health_latencies)} probes, "
+          f"p50 {statistics.median(health_latencies) * 1000:.1f} ms, "
+          f"max {max(health_latencies) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,145 @@
+"""
+DAU/WAU/MAU and retention cohorts from activity bitmaps
+
+Writes `--days` days of activity bitmaps for `--users` users straight into
+a throwaway SQLite database (each user gets a signup day and a daily
+activity probability), then times the engagement series and the weekly
+retention cohorts. A smaller workouts table (`--history-users`) is also
+seeded to time the rebuild and to compare one MAU figure against the
+COUNT(DISTINCT) scan over workouts that the bitmaps replace.
+
+Usage:
+    python -m benchmarks.engagement --users 1000000 --days 365
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import ActivityBitmap, User, Workout
+from app.services.engagement import (
+    CHUNK_BYTES, engagement_series, rebuild_activity, retention_cohorts
+)
+
+AS_OF = date(2024, 12, 31)
+
+
+def activity(rng, users: int, days: int):
+    """Yield (day, active mask over user ids 0..users) with churn and weekly habits"""
+    signup = rng.integers(0, days, users + 1)
+    rate = rng.beta(0.6, 4.0, users + 1)
+    # Users drift away: activity decays with time since signup
+    half_life = rng.exponential(90, users + 1) + 7
+    for d in range(days):
+        age = d - signup
+        p = np.where(age >= 0, rate * np.exp2(-np.maximum(age, 0) / half_life), 0.0)
+        mask = rng.random(users + 1) < p
+        mask[0] = False
+        yield AS_OF - timedelta(days=days - 1 - d), mask
+
+
+def seed_bitmaps(engine, users: int, days: int, seed: int) -> int:
+    rng = np.random.default_rng(seed)
+    stored = 0
+    with engine.begin() as conn:
+        for day, mask in activity(rng, users, days):
+            packed = np.packbits(mask, bitorder="little")
+            rows = []
+            for chunk in range(0, len(packed), CHUNK_BYTES):
+                bits = packed[chunk:chunk + CHUNK_BYTES].tobytes().rstrip(b"\0")
+                if bits:
+                    rows.append({"day": day, "chunk": chunk // CHUNK_BYTES, "bits": bits})
+                    stored += len(bits)
+            if rows:
+                conn.execute(insert(ActivityBitmap.__table__), rows)
+    return stored
+
+
+def seed_workouts(engine, users: int, days: int, seed: int) -> int:
+    rng = np.random.default_rng(seed)
+    now = datetime.utcnow()
+    count = 0
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [{
+            "id": i, "email": f"u{i}@example.com", "username": f"u{i}",
+            "hashed_password": "x", "is_admin": False, "created_at": now
+        } for i in range(1, users + 1)])
+        for day, mask in activity(rng, users, days):
+            ids = np.flatnonzero(mask)
+            when = datetime.combine(day, datetime.min.time()) + timedelta(hours=12)
+            conn.execute(insert(Workout.__table__), [{
+                "user_id": int(i), "workout_type": "Running", "duration": 30,
+                "intensity": "moderate", "calories_burned": 300, "notes": None, "date": when
+            } for i in ids])
+            count += len(ids)
+    return count
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main(args):
+    directory = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+    Base.metadata.create_all(bind=engine)
+
+    _, seed_ms = timed(lambda: seed_bitmaps(engine, args.users, args.days, args.seed))
+    size = os.path.getsize(os.path.join(directory, "bench.db"))
+    db = sessionmaker(bind=engine)()
+
+    series, series_ms = timed(lambda: engagement_series(db, 30, as_of=AS_OF))
+    series_90, series_90_ms = timed(lambda: engagement_series(db, 90, as_of=AS_OF))
+    cohorts, cohorts_ms = timed(lambda: retention_cohorts(db, 12, as_of=AS_OF))
+    last = series[-1]
+
+    print(f"{args.users} users x {args.days} days: seeded in {seed_ms / 1000:.1f}s, "
+          f"database {size / 2**20:.1f} MiB")
+    print(f"as of {AS_OF}: DAU {last['dau']}, WAU {last['wau']}, MAU {last['mau']}, "
+          f"stickiness {last['stickiness']}")
+    print(f"{'engagement series, 30 days':32} {series_ms:9.1f} ms")
+    print(f"{'engagement series, 90 days':32} {series_90_ms:9.1f} ms")
+    print(f"{'retention cohorts, 12 weeks':32} {cohorts_ms:9.1f} ms")
+    print(f"oldest cohort: {cohorts[0]['users']} users, retention {cohorts[0]['retention'][:4]}")
+    db.close()
+    engine.dispose()
+
+    # Rebuild and the workouts scan at a size where a workouts table is practical
+    directory = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'history.db')}")
+    Base.metadata.create_all(bind=engine)
+    workouts = seed_workouts(engine, args.history_users, args.history_days, args.seed)
+    with engine.begin() as conn:
+        report, rebuild_ms = timed(lambda: rebuild_activity(conn))
+    db = sessionmaker(bind=engine)()
+    since = datetime.combine(AS_OF - timedelta(days=29), datetime.min.time())
+    scan_mau, scan_ms = timed(lambda: db.execute(
+        select(func.count(func.distinct(Workout.user_id))).where(Workout.date >= since)
+    ).scalar())
+    bitmap_mau, bitmap_ms = timed(lambda: engagement_series(db, 1, as_of=AS_OF)[0]["mau"])
+    assert scan_mau == bitmap_mau
+    db.close()
+    engine.dispose()
+
+    print(f"\n{args.history_users} users x {args.history_days} days, {workouts} workouts:")
+    print(f"{'rebuild from workouts':32} {rebuild_ms:9.1f} ms ({report['bitmaps']} bitmap rows)")
+    print(f"{'MAU via COUNT(DISTINCT) scan':32} {scan_ms:9.1f} ms")
+    print(f"{'MAU via bitmaps':32} {bitmap_ms:9.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--history-users", type=int, default=20_000)
+    parser.add_argument("--history-days", type=int, default=90)
+    parser.add_argument("--seed", type=int, default=1)
+    main(parser.parse_args())
@@ -0,0 +1,169 @@
+"""
+Event-loop lag under concurrent load: sync Session vs AsyncSession
+
+Seeds a throwaway SQLite database, then fires concurrent requests at
+GET /ai/progress-analysis in two configurations while a probe task measures
+how late the event loop wakes it up:
+
+    blocking  the handler as it was before the async database layer, running
+              synchronous Session queries directly on the event loop
+    async     the current handler and auth dependency on AsyncSession
+
+Usage:
+    python -m benchmarks.event_loop_lag --workouts 20000 --requests 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.auth import create_access_token, principal_cache
+from app.database import Base, get_async_db, to_async_url
+from app.main import app
+from app.models import User, Workout
+
+PROBE_INTERVAL = 0.005
+
+
+def seed(url: str, workouts: int):
+    """Create the schema with one user and `workouts` workouts spread over a year"""
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{
+            "id": 1, "email": "bench@example.com", "username": "bench",
+            "hashed_password": "x", "is_admin": False, "created_at": now
+        }])
+        conn.execute(Workout.__table__.insert(), [{
+            "user_id": 1, "workout_type": "Running", "duration": 30,
+            "intensity": "moderate", "calories_burned": 300, "notes": None,
+            "date": now - timedelta(minutes=i * 20)
+        } for i in range(workouts)])
+    engine.dispose()
+
+
+def build_blocking_app(session_factory) -> FastAPI:
+    """The pre-async handler: sync queries inside an `async def` route"""
+    blocking_app = FastAPI()
+
+    def get_sync_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @blocking_app.get("/ai/progress-analysis")
+    async def analyze_progress(days: int = 30, db: Session = Depends(get_sync_db)):
+        user = db.query(User).filter(User.username == "bench").first()
+        start_date = datetime.utcnow() - timedelta(days=days)
+        workouts = db.query(Workout).filter(
+            Workout.user_id == user.id,
+            Workout.date >= start_date
+        ).all()
+        return {"total_workouts": len(workouts)}
+
+    return blocking_app
+
+
+async def probe(lags: list, stop: asyncio.Event):
+    """Record how much later than requested each short sleep returns"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - started - PROBE_INTERVAL)
+
+
+async def run_load(target: FastAPI, requests: int, concurrency: int, days: int, headers: dict) -> dict:
+    lags, latencies = [], []
+    stop = asyncio.Event()
+    limit = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=target)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with limit:
+                started = time.perf_counter()
+                response = await client.get(f"/ai/progress-analysis?days={days}", headers=headers)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        probe_task = asyncio.create_task(probe(lags, stop))
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await probe_task
+
+    lags.sort()
+    latencies.sort()
+    return {
+        "requests_per_second": requests / elapsed,
+        "latency_p50_ms": statistics.median(latencies) * 1000,
+        "loop_lag_p99_ms": lags[int(len(lags) * 0.99) - 1] * 1000 if lags else 0.0,
+        "loop_lag_max_ms": lags[-1] * 1000 if lags else 0.0,
+        "probe_samples": len(lags),
+    }
+
+
+async def main(args):
+    directory = tempfile.mkdtemp()
+    url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    seed(url, args.workouts)
+
+    # Size the sync pool so requests wait on the database, not on connections
+    sync_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        pool_size=args.concurrency,
+        max_overflow=args.concurrency
+    )
+    async_engine = create_async_engine(to_async_url(url))
+    async_sessions = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def bench_async_db():
+        async with async_sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = bench_async_db
+    principal_cache.clear()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench'})}"}
+
+    results = {
+        "blocking": await run_load(
+            build_blocking_app(sessionmaker(bind=sync_engine)),
+            args.requests, args.concurrency, args.days, headers
+        ),
+        "async": await run_load(app, args.requests, args.concurrency, args.days, headers),
+    }
+
+    app.dependency_overrides.clear()
+    await async_engine.dispose()
+    sync_engine.dispose()
+
+    print(f"{args.workouts} workouts, {args.requests} requests, concurrency {args.concurrency}")
+    print(f"{'':10} {'req/s':>8} {'p50 ms':>8} {'lag p99 ms':>11} {'lag max ms':>11}")
+    for name, r in results.items():
+        print(
+            f"{name:10} {r['requests_per_second']:8.1f} {r['latency_p50_ms']:8.1f} "
+            f"{r['loop_lag_p99_ms']:11.1f} {r['loop_lag_max_ms']:11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--workouts", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--days", type=int, default=30)
+    asyncio.run(main(parser.parse_args()))
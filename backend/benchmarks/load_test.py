@@ -0,0 +1,296 @@
+"""
+Per-route latency and throughput of the API at several dataset sizes
+
+For each scale (1k, 100k, 10m workouts) a throwaway SQLite database is
+filled by seed_data.py's generator, with one user per 100 workouts. The
+app's database dependencies are then pointed at it and every route in
+ROUTES is driven in turn by `--concurrency` async clients over httpx's
+ASGI transport, each request as one of `--sample-users` users (or the
+admin). p50/p95/p99 latency and requests per second are printed and
+written to a JSON baseline; `--compare` diffs a run against an earlier
+baseline and exits non-zero when a route's p95 grew by more than
+`--threshold` percent.
+
+The Gemini-backed /ai routes and admin writes (user deletion, broadcasts,
+rebuilds) are left out; POST /auth/login is bcrypt-bound by design.
+
+Usage:
+    python -m benchmarks.load_test --scales 1k 100k --output benchmarks/baselines/load_test.json
+    python -m benchmarks.load_test --scales 1k --compare benchmarks/baselines/load_test.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+# The app creates its schema on import; keep that off the development database
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'app.db')}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+from sqlalchemy import create_engine, select  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.auth import create_access_token, principal_cache  # noqa: E402
+from app.database import Base, get_async_db, get_db, to_async_url  # noqa: E402
+from app.main import app  # noqa: E402
+from app.migrations import run_migrations  # noqa: E402
+from app.models import User  # noqa: E402
+from app.services.ai_cache import ai_response_cache  # noqa: E402
+from app.services.data_versions import data_version_cache  # noqa: E402
+from app.services.progress import progress_cache  # noqa: E402
+from seed_data import seed as seed_database  # noqa: E402
+
+SCALES = {"1k": 1_000, "100k": 100_000, "10m": 10_000_000}
+WORKOUTS_PER_USER = 100
+
+
+class Route(NamedTuple):
+    method: str
+    path: str  # {user_id} is replaced with a sampled user's id
+    admin: bool = False
+    body: Optional[dict] = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.method} {self.path}"
+
+
+ROUTES = [
+    Route("GET", "/health"),
+    Route("GET", "/auth/me"),
+    Route("GET", "/users/metrics"),
+    Route("GET", "/users/metrics/history?metric=weight"),
+    Route("GET", "/users/notifications"),
+    Route("GET", "/users/notifications/unread-count"),
+    Route("GET", "/workouts"),
+    Route("GET", "/workouts/today"),
+    Route("GET", "/workouts/export"),
+    Route("GET", "/streaks"),
+    Route("GET", "/prs"),
+    Route("GET", "/rewards"),
+    Route("GET", "/ai/progress-analysis?days=90"),
+    Route("POST", "/workouts", body={
+        "workout_type": "Squat", "duration": 40, "intensity": "high",
+        "calories_burned": 320, "notes": "5x5 @ 100kg"
+    }),
+    Route("GET", "/admin/users", admin=True),
+    Route("GET", "/admin/users/{user_id}/workouts", admin=True),
+    Route("GET", "/admin/users/{user_id}/stats", admin=True),
+    Route("GET", "/admin/analytics", admin=True),
+    Route("GET", "/admin/analytics/daily", admin=True),
+    Route("GET", "/admin/analytics/engagement", admin=True),
+    Route("GET", "/admin/analytics/retention", admin=True),
+]
+
+
+# ---------------------------------------------------------------------------
+# Seeding
+# ---------------------------------------------------------------------------
+
+def seed(url: str, workouts: int, seed: int) -> int:
+    """Create the schema and fill it with seed_data's generator; returns the user count"""
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    users = max(10, workouts // WORKOUTS_PER_USER)
+    seed_database(engine, users, workouts, seed=seed, log=lambda line: None)
+    engine.dispose()
+    return users
+
+
+# ---------------------------------------------------------------------------
+# Load
+# ---------------------------------------------------------------------------
+
+def percentile(sorted_values, q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+async def drive(client, route: Route, requests: int, concurrency: int, headers, user_ids, rng) -> dict:
+    """Send `requests` requests to one route from `concurrency` workers"""
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            pick = int(rng.integers(0, len(user_ids)))
+            path = route.path.replace("{user_id}", str(user_ids[pick]))
+            started = time.perf_counter()
+            response = await client.request(
+                route.method, path, json=route.body,
+                headers=headers["admin"] if route.admin else headers[pick]
+            )
+            latencies.append(time.perf_counter() - started)
+            errors += response.status_code >= 400
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "requests_per_second": round(requests / elapsed, 1),
+    }
+
+
+async def run_scale(name: str, workouts: int, args) -> dict:
+    directory = tempfile.mkdtemp()
+    url = f"sqlite:///{os.path.join(directory, 'load.db')}"
+    started = time.perf_counter()
+    users = seed(url, workouts, args.seed)
+    seed_seconds = time.perf_counter() - started
+    size = os.path.getsize(os.path.join(directory, "load.db"))
+    print(f"\n[{name}] {workouts} workouts, {users} users: seeded in {seed_seconds:.1f}s, "
+          f"database {size / 2**20:.1f} MiB")
+
+    # Size the sync pool so requests wait on the database, not on connections
+    sync_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        pool_size=args.concurrency,
+        max_overflow=args.concurrency
+    )
+    sessions = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
+    async_engine = create_async_engine(to_async_url(url))
+    async_sessions = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    def load_db():
+        db = sessions()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def load_async_db():
+        async with async_sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = load_db
+    app.dependency_overrides[get_async_db] = load_async_db
+    # Users with the same name exist in every scale's database
+    for cache in (principal_cache, progress_cache, ai_response_cache, data_version_cache):
+        cache.clear()
+
+    rng = np.random.default_rng(args.seed)
+    user_ids = [int(i) for i in rng.choice(np.arange(2, users + 2), min(args.sample_users, users), replace=False)]
+    with sync_engine.connect() as conn:
+        names = dict(conn.execute(select(User.id, User.username).where(User.id.in_(user_ids))).tuples().all())
+    headers = {i: {"Authorization": f"Bearer {create_access_token({'sub': names[user_id]})}"}
+               for i, user_id in enumerate(user_ids)}
+    headers["admin"] = {"Authorization": f"Bearer {create_access_token({'sub': 'admin'})}"}
+
+    routes = {}
+    # Count server errors instead of raising them into the client
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load", timeout=None) as client:
+        for route in ROUTES:
+            if args.routes and not any(pattern in route.name for pattern in args.routes):
+                continue
+            await drive(client, route, args.warmup, args.concurrency, headers, user_ids, rng)
+            result = await drive(client, route, args.requests, args.concurrency, headers, user_ids, rng)
+            routes[route.name] = result
+            print(f"  {route.name:42} p50 {result['p50_ms']:8.1f}  p95 {result['p95_ms']:8.1f}  "
+                  f"p99 {result['p99_ms']:8.1f} ms  {result['requests_per_second']:8.1f} req/s"
+                  + (f"  {result['errors']} errors" if result["errors"] else ""))
+
+    app.dependency_overrides.clear()
+    await async_engine.dispose()
+    sync_engine.dispose()
+    return {
+        "workouts": workouts,
+        "users": users,
+        "seed_seconds": round(seed_seconds, 1),
+        "database_mib": round(size / 2**20, 1),
+        "routes": routes,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Baselines
+# ---------------------------------------------------------------------------
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> int:
+    """Print p95 changes per route against a baseline; returns the number of regressions"""
+    regressions = 0
+    print(f"\np95 against baseline {baseline.get('commit') or '(unknown commit)'}:")
+    for scale, result in current["scales"].items():
+        old_routes = baseline.get("scales", {}).get(scale, {}).get("routes", {})
+        for route, numbers in result["routes"].items():
+            old = old_routes.get(route)
+            if old is None or not old["p95_ms"]:
+                continue
+            change = (numbers["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100
+            flag = change > threshold
+            regressions += flag
+            print(f"  [{scale}] {route:42} {old['p95_ms']:8.1f} -> {numbers['p95_ms']:8.1f} ms "
+                  f"({change:+6.1f}%){'  REGRESSION' if flag else ''}")
+    return regressions
+
+
+async def main(args) -> int:
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "concurrency": args.concurrency,
+        "requests_per_route": args.requests,
+        "scales": {},
+    }
+    for name in args.scales:
+        report["scales"][name] = await run_scale(name, SCALES[name], args)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\nWrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            return 1 if compare(json.load(f), report, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=["1k", "100k"])
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per route")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests per route first")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--sample-users", type=int, default=200)
+    parser.add_argument("--routes", nargs="*", help="only routes whose name contains one of these")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to diff against")
+    parser.add_argument("--threshold", type=float, default=20.0, help="p95 growth (%%) reported as a regression")
+    parser.add_argument("--seed", type=int, default=1)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,93 @@
+"""
+Per-page latency of workout history: offset vs keyset pagination
+
+Seeds one user with enough workouts for `--pages` pages in a throwaway
+SQLite database, then times fetching page 1 and the last page with the
+legacy `skip` offset and with a (date, id) cursor.
+
+Usage:
+    python -m benchmarks.pagination --pages 10000 --limit 20
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.migrations import run_migrations
+from app.models import User, Workout
+from app.pagination import encode_cursor, workout_page
+
+
+def seed(engine, workouts: int):
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{
+            "id": 1, "email": "bench@example.com", "username": "bench",
+            "hashed_password": "x", "is_admin": False, "created_at": now
+        }])
+        batch = 50000
+        for start in range(0, workouts, batch):
+            conn.execute(Workout.__table__.insert(), [{
+                "user_id": 1, "workout_type": "Running", "duration": 30,
+                "intensity": "moderate", "calories_burned": 300, "notes": None,
+                # Several workouts share each timestamp to exercise the id tiebreak
+                "date": now - timedelta(minutes=i // 3)
+            } for i in range(start, min(start + batch, workouts))])
+
+
+def timed(fn, repeat: int) -> float:
+    """Median wall time of fn() in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def main(args):
+    directory = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    seed(engine, args.pages * args.limit)
+    db = sessionmaker(bind=engine)()
+
+    last_skip = (args.pages - 1) * args.limit
+    # Cursor for the last page: the final row of the page before it
+    previous_row = db.query(Workout).filter(Workout.user_id == 1).order_by(
+        Workout.date.desc(), Workout.id.desc()
+    ).offset(last_skip - 1).first()
+    last_cursor = encode_cursor(previous_row)
+
+    offset_last, _ = workout_page(db, 1, args.limit, skip=last_skip)
+    cursor_last, _ = workout_page(db, 1, args.limit, cursor=last_cursor)
+    assert [w.id for w in offset_last] == [w.id for w in cursor_last]
+
+    results = {
+        ("offset", 1): timed(lambda: workout_page(db, 1, args.limit), args.repeat),
+        ("offset", args.pages): timed(lambda: workout_page(db, 1, args.limit, skip=last_skip), args.repeat),
+        ("cursor", 1): timed(lambda: workout_page(db, 1, args.limit), args.repeat),
+        ("cursor", args.pages): timed(lambda: workout_page(db, 1, args.limit, cursor=last_cursor), args.repeat),
+    }
+    db.close()
+    engine.dispose()
+
+    print(f"{args.pages * args.limit} workouts, {args.limit} per page, median of {args.repeat}")
+    print(f"{'':8} {'page 1 ms':>10} {f'page {args.pages} ms':>14}")
+    for mode in ("offset", "cursor"):
+        print(f"{mode:8} {results[(mode, 1)]:10.2f} {results[(mode, args.pages)]:14.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--pages", type=int, default=10000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    main(parser.parse_args())
@@ -0,0 +1,109 @@
+"""
+Overhead of the telemetry middleware and SQL event listeners
+
+Seeds a small throwaway database, then sends sequential requests to a few
+routes with telemetry on and off, alternating short rounds (and which side
+goes first) so drift in the machine's speed affects both sides equally.
+"off" removes the middleware's work and the engine listeners entirely.
+
+Usage:
+    python -m benchmarks.telemetry --rounds 20 --requests 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+# The app creates its schema on import; keep that off the development database
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'app.db')}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+import httpx  # noqa: E402
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import telemetry  # noqa: E402
+from app.auth import create_access_token  # noqa: E402
+from app.database import Base, get_async_db, get_db, to_async_url  # noqa: E402
+from app.main import app  # noqa: E402
+from app.migrations import run_migrations  # noqa: E402
+from seed_data import seed  # noqa: E402
+
+ROUTES = ["/health", "/workouts", "/streaks", "/ai/progress-analysis"]
+LISTENERS = [
+    ("before_cursor_execute", telemetry._before_execute),
+    ("after_cursor_execute", telemetry._after_execute),
+]
+
+
+def set_telemetry(enabled: bool):
+    telemetry.METRICS_ENABLED = enabled
+    for name, listener in LISTENERS:
+        if enabled and not event.contains(Engine, name, listener):
+            event.listen(Engine, name, listener)
+        elif not enabled and event.contains(Engine, name, listener):
+            event.remove(Engine, name, listener)
+
+
+async def main(args):
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    seed(engine, users=100, workouts=20_000, log=lambda line: None)
+
+    sessions = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    async_engine = create_async_engine(to_async_url(url))
+    async_sessions = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    def bench_db():
+        db = sessions()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def bench_async_db():
+        async with async_sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = bench_db
+    app.dependency_overrides[get_async_db] = bench_async_db
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'john_doe'})}"}
+
+    timings = {(route, enabled): [] for route in ROUTES for enabled in (True, False)}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        for route in ROUTES:
+            await client.get(route)  # warm caches and connections
+        for i in range(args.rounds):
+            for enabled in ((True, False) if i % 2 else (False, True)):
+                set_telemetry(enabled)
+                for route in ROUTES:
+                    started = time.perf_counter()
+                    for _ in range(args.requests):
+                        await client.get(route)
+                    timings[(route, enabled)].append((time.perf_counter() - started) / args.requests)
+
+    set_telemetry(True)
+    app.dependency_overrides.clear()
+    await async_engine.dispose()
+    engine.dispose()
+
+    print(f"{'route':28} {'off':>10} {'on':>10} {'overhead':>18}")
+    for route in ROUTES:
+        off = statistics.median(timings[(route, False)])
+        on = statistics.median(timings[(route, True)])
+        print(f"{route:28} {off * 1e6:8.0f}us {on * 1e6:8.0f}us "
+              f"{(on - off) * 1e6:+8.1f}us ({(on - off) / off * 100:+5.2f}%)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,126 @@
+"""
+Maintenance commands for the workout planner database
+
+Usage:
+    python manage.py migrate
+    python manage.py migration-status
+    python manage.py rebuild-analytics
+    python manage.py rebuild-activity
+    python manage.py backfill-strength
+    python manage.py replay-rewards
+    python manage.py recompute-metrics
+"""
+import argparse
+
+from app.database import Base, SessionLocal, engine
+from app.migrations import MIGRATIONS, applied_versions, run_migrations
+from app.services.analytics import rebuild_rollups
+from app.services.engagement import rebuild_activity as rebuild_activity_bitmaps
+from app.services.strength import backfill_strength as backfill_strength_sets
+from app.services.rewards import replay_rewards as replay_reward_history
+from app.services.body_composition import recompute_body_composition
+from app.services.data_versions import bump as bump_data_versions
+
+
+def migrate(args):
+    """Create missing tables and apply pending migrations"""
+    Base.metadata.create_all(bind=engine)
+    applied = run_migrations(engine)
+    if applied:
+        print(f"Applied migrations: {', '.join(str(v) for v in applied)}")
+    else:
+        print("Database is up to date")
+
+
+def migration_status(args):
+    """List migrations and whether they have been applied"""
+    done = set(applied_versions(engine))
+    for m in MIGRATIONS:
+        marker = "x" if m.version in done else " "
+        print(f"[{marker}] {m.version:04d} {m.description}")
+
+
+def rebuild_analytics(args):
+    """Recompute the analytics rollup tables from users and workouts"""
+    db = SessionLocal()
+    try:
+        stats = rebuild_rollups(db)
+        print(
+            f"Rebuilt analytics: {stats.total_users} users, "
+            f"{stats.total_workouts} workouts, {stats.active_users} active"
+        )
+    finally:
+        db.close()
+
+
+def rebuild_activity(args):
+    """Rebuild the per-day activity bitmaps from workout history"""
+    with engine.begin() as conn:
+        report = rebuild_activity_bitmaps(conn)
+    print(
+        f"Rebuilt activity bitmaps: {report['days']} days from {report['workouts']} workouts "
+        f"({report['bitmaps']} bitmap rows) in {report['seconds']}s"
+    )
+
+
+def backfill_strength(args):
+    """Parse sets/reps/load from workout notes and rebuild personal records"""
+    with engine.begin() as conn:
+        report = backfill_strength_sets(conn)
+        if report["updated"]:
+            bump_data_versions(conn)
+    print(
+        f"Scanned {report['workouts']} workouts: {report['parsed']} with sets, "
+        f"{report['updated']} updated, {report['records']} personal records in {report['seconds']}s"
+    )
+
+
+def replay_rewards(args):
+    """Refold workout history into reward counters and award missing rewards"""
+    with engine.begin() as conn:
+        report = replay_reward_history(conn)
+        if report["rewards"]:
+            bump_data_versions(conn)
+    print(
+        f"Replayed {report['workouts']} workouts of {report['users']} users: "
+        f"{report['rewards']} rewards added"
+    )
+
+
+def recompute_metrics(args):
+    """Recompute derived body metrics of every user with the current formulas"""
+    db = SessionLocal()
+    try:
+        report = recompute_body_composition(db)
+        print(
+            f"Recomputed {report['rows']} metrics rows ({report['updated']} changed) "
+            f"in {report['seconds']}s, {report['rows_per_second']} rows/s"
+        )
+    finally:
+        db.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Workout planner maintenance commands"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("migrate", help=migrate.__doc__).set_defaults(func=migrate)
+    subparsers.add_parser("migration-status", help=migration_status.__doc__).set_defaults(func=migration_status)
+    subparsers.add_parser("rebuild-analytics", help=rebuild_analytics.__doc__).set_defaults(func=rebuild_analytics)
+    subparsers.add_parser("rebuild-activity", help=rebuild_activity.__doc__).set_defaults(func=rebuild_activity)
+    subparsers.add_parser("backfill-strength", help=backfill_strength.__doc__).set_defaults(func=backfill_strength)
+    subparsers.add_parser("replay-rewards", help=replay_rewards.__doc__).set_defaults(func=replay_rewards)
+    subparsers.add_parser("recompute-metrics", help=recompute_metrics.__doc__).set_defaults(func=recompute_metrics)
+
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,238 +1,404 @@
 """
-Database seed script to create sample users and data
-Run this after starting the backend for the first time
+Generate a synthetic dataset straight into the database
+
+Users, body metrics, metrics history, notifications and workouts are drawn
+with NumPy from a seeded generator, so the same arguments always produce
+the same rows:
+
+- activity per user follows a power law (a few users log most workouts),
+  users sign up over the window with growth towards the present, and a
+  share of them churn after an exponentially distributed lifetime
+- workouts favour weekdays and cluster around morning, lunch and evening;
+  each user has a favourite workout type, intensities depend on the type
+  and durations are log-normal around a per-type median
+- strength workouts carry "<sets>x<reps> @ <load>kg" notes (with the
+  parsed columns filled in) whose loads grow over each user's history
+
+Rows are written in chunks with DBAPI executemany, every user shares one
+of two precomputed bcrypt hashes, and the workouts indexes are dropped
+during the load and rebuilt afterwards. The derived tables (analytics
+rollups, activity bitmaps, personal records, rewards) are then rebuilt with
+the same services manage.py uses.
+
+The first accounts are the demo logins: admin / admin123 and john_doe,
+jane_smith, mike_wilson / password123. Every other user is user<id> with
+password123.
+
+Usage:
+    python seed_data.py
+    python seed_data.py --users 100000 --workouts 10000000 --reset
 """
+import argparse
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+import numpy as np
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import sessionmaker
+
+from app.auth import get_password_hash
+from app.database import SQLALCHEMY_DATABASE_URL, Base
+from app.migrations import migration_metadata, run_migrations
+from app.models import MetricsEntry, Notification, User, UserMetrics, Workout
+from app.services.analytics import rebuild_rollups
+from app.services.engagement import rebuild_activity
+from app.services.rewards import replay_rewards
+from app.services.strength import rebuild_records
+from app.utils import calculate_bmi_array, calculate_body_fat_array, calculate_skeletal_muscle_array
+
+CHUNK_SIZE = 200_000  # rows per executemany
+
+DEMO_USERS = [
+    ("admin", "admin@fittrack.com", "admin123", True),
+    ("john_doe", "john@example.com", "password123", False),
+    ("jane_smith", "jane@example.com", "password123", False),
+    ("mike_wilson", "mike@example.com", "password123", False),
+]
+PASSWORD = "password123"
+
+# name: (share of workouts, median minutes, kcal per minute at moderate, (low, moderate, high))
+WORKOUT_TYPES = {
+    "Running": (0.20, 35, 11.0, (0.20, 0.55, 0.25)),
+    "Walking": (0.12, 40, 4.5, (0.60, 0.35, 0.05)),
+    "Cycling": (0.12, 50, 9.0, (0.25, 0.50, 0.25)),
+    "Swimming": (0.06, 40, 9.5, (0.25, 0.50, 0.25)),
+    "Bench Press": (0.09, 50, 5.5, (0.10, 0.50, 0.40)),
+    "Squat": (0.08, 50, 6.0, (0.10, 0.50, 0.40)),
+    "Deadlift": (0.06, 45, 6.0, (0.10, 0.45, 0.45)),
+    "Yoga": (0.10, 45, 3.5, (0.55, 0.40, 0.05)),
+    "HIIT": (0.08, 25, 12.0, (0.05, 0.30, 0.65)),
+    "CrossFit": (0.04, 45, 11.0, (0.05, 0.35, 0.60)),
+    "Basketball": (0.03, 60, 8.0, (0.20, 0.50, 0.30)),
+    "Tennis": (0.02, 60, 7.5, (0.25, 0.50, 0.25)),
+}
+TYPE_NAMES = list(WORKOUT_TYPES)
+TYPE_SHARES = np.array([spec[0] for spec in WORKOUT_TYPES.values()])
+TYPE_MEDIANS = np.array([spec[1] for spec in WORKOUT_TYPES.values()], dtype=np.float64)
+TYPE_KCAL = np.array([spec[2] for spec in WORKOUT_TYPES.values()])
+TYPE_INTENSITY_CDF = np.cumsum([spec[3] for spec in WORKOUT_TYPES.values()], axis=1)
+INTENSITIES = np.array(["low", "moderate", "high"], dtype=object)
+INTENSITY_KCAL = np.array([0.8, 1.0, 1.3])
+# Working load relative to the lifter's base strength
+STRENGTH_FACTORS = {"Bench Press": 0.8, "Squat": 1.1, "Deadlift": 1.3}
+FAVOURITE_SHARE = 0.5  # workouts of the user's favourite type, the rest follow TYPE_SHARES
+
+WEEKDAY_SHARES = np.array([0.17, 0.16, 0.16, 0.15, 0.12, 0.12, 0.12])  # Monday first
+# (share, mean hour, spread in hours) of the morning, lunch and evening peaks
+HOUR_PEAKS = np.array([(0.40, 7.0, 1.0), (0.15, 12.5, 0.7), (0.45, 18.5, 1.5)])
+
+ACTIVITY_TAIL = 1.16  # Pareto shape; 80% of workouts come from about 20% of users
+CHURN_SHARE = 0.6  # users who stop after an exponential lifetime
+MEAN_LIFETIME_DAYS = 120
+MAX_WORKOUTS_PER_DAY = 2
+ACTIVITY_LEVELS = ["sedentary", "light", "moderate", "active", "very_active"]
+ACTIVITY_LEVEL_SHARES = np.cumsum([0.20, 0.25, 0.25, 0.20, 0.10])
+
+MESSAGES = [
+    "Great job on your consistency! Keep up the good work! 💪",
+    "Remember to stay hydrated during your workouts! 💧",
+    "Don't forget to warm up before intense exercises! 🔥",
+    "You're making excellent progress! Keep pushing! 🎯",
+    "Rest days are important too! Take care of your body! 😴",
+]
+NOTIFICATIONS_PER_USER = 3.0  # Poisson mean
+READ_SHARE = 0.7
+
 
-import requests
-from datetime import datetime, timedelta
-import random
-
-BASE_URL = "http://localhost:8080"
-
-def create_users():
-    """Create sample users"""
-    users = [
-        {
-            "email": "admin@fittrack.com",
-            "username": "admin",
-            "password": "admin123",
-            "is_admin": True
-        },
-        {
-            "email": "john@example.com",
-            "username": "john_doe",
-            "password": "password123",
-            "is_admin": False
-        },
-        {
-            "email": "jane@example.com",
-            "username": "jane_smith",
-            "password": "password123",
-            "is_admin": False
-        },
-        {
-            "email": "mike@example.com",
-            "username": "mike_wilson",
-            "password": "password123",
-            "is_admin": False
-        }
-    ]
-    
-    tokens = {}
-    
-    for user in users:
-        # Register user
-        response = requests.post(f"{BASE_URL}/auth/register", json=user)
-        if response.status_code == 200:
-            print(f"✅ Created user: {user['username']}")
-            
-            # Login to get token
-            login_data = {
-                "username": user["username"],
-                "password": user["password"]
-            }
-            login_response = requests.post(
-                f"{BASE_URL}/auth/login",
-                data=login_data
-            )
-            
-            if login_response.status_code == 200:
-                token = login_response.json()["access_token"]
-                tokens[user["username"]] = token
-                print(f"   Logged in: {user['username']}")
+def timestamps(seconds: np.ndarray) -> np.ndarray:
+    """Render epoch seconds the way SQLAlchemy stores DateTime on SQLite"""
+    rendered = np.datetime_as_string(seconds.astype("datetime64[s]").astype("datetime64[us]"), unit="us")
+    return np.char.replace(rendered, "T", " ")
+
+
+def bulk_insert(conn: Connection, table, columns, rows) -> int:
+    """executemany one chunk of tuples through the DBAPI cursor"""
+    marker = "?" if conn.dialect.paramstyle == "qmark" else "%s"
+    sql = f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join([marker] * len(columns))})"
+    rows = list(rows)
+    conn.exec_driver_sql(sql, rows)
+    return len(rows)
+
+
+def spread_workouts(rng, weights: np.ndarray, capacity: np.ndarray, total: int) -> np.ndarray:
+    """Split `total` workouts across users in proportion to `weights`, capped by `capacity`"""
+    counts = np.zeros(len(weights), dtype=np.int64)
+    remaining = min(total, int(capacity.sum()))
+    while remaining:
+        open_ = counts < capacity
+        p = np.where(open_, weights, 0.0)
+        counts += rng.multinomial(remaining, p / p.sum())
+        overflow = np.maximum(counts - capacity, 0)
+        counts -= overflow
+        remaining = int(overflow.sum())
+    return counts
+
+
+class Population:
+    """Per-user attributes every other table is drawn from"""
+
+    def __init__(self, rng, users: int, days: int, end: np.datetime64):
+        self.users = users
+        self.ids = np.arange(2, users + 2)  # the admin is user 1
+        self.end = end.astype("datetime64[s]").astype(np.int64)
+        window = days * 86400
+
+        # More signups towards the present; demo users have been around from the start
+        self.signup = self.end - window + (rng.power(2.0, users) * window).astype(np.int64)
+        self.activity = rng.pareto(ACTIVITY_TAIL, users) + 1.0
+        churns = rng.random(users) < CHURN_SHARE
+        lifetime = (rng.exponential(MEAN_LIFETIME_DAYS, users) * 86400).astype(np.int64)
+        self.last_active = np.where(churns, np.minimum(self.signup + lifetime, self.end), self.end)
+        demo = slice(0, len(DEMO_USERS) - 1)
+        self.signup[demo] = self.end - window
+        self.last_active[demo] = self.end
+        self.activity[demo] = np.quantile(self.activity, 0.9)
+
+        self.male = rng.random(users) < 0.5
+        self.height = np.where(self.male, rng.normal(176, 7, users), rng.normal(163, 6.5, users)).round(1)
+        bmi = np.clip(rng.normal(26, 4.5, users), 17, 45)
+        self.weight = (bmi * (self.height / 100) ** 2).round(1)
+        self.age = np.clip(18 + rng.gamma(4.0, 5.5, users), 18, 85).astype(np.int64)
+        # Busier users describe themselves as more active
+        rank = self.activity.argsort().argsort() / max(users - 1, 1)
+        self.activity_level = np.minimum(np.searchsorted(ACTIVITY_LEVEL_SHARES, rank), len(ACTIVITY_LEVELS) - 1)
+        self.favourite = rng.choice(len(TYPE_NAMES), users, p=TYPE_SHARES)
+        # Base working load in kg, relative to body weight
+        self.strength = self.weight * np.clip(rng.normal(0.9, 0.2, users), 0.3, 2.0)
+
+
+def insert_users(conn: Connection, rng, people: Population) -> int:
+    hashes = {password: get_password_hash(password) for password in {p for _, _, p, _ in DEMO_USERS} | {PASSWORD}}
+    created = timestamps(people.signup).tolist()
+    rows = [(1, DEMO_USERS[0][1], DEMO_USERS[0][0], hashes[DEMO_USERS[0][2]], True, min(created))]
+    for i, user_id in enumerate(people.ids.tolist()):
+        if i < len(DEMO_USERS) - 1:
+            username, email, password, _ = DEMO_USERS[i + 1]
         else:
-            print(f"❌ Failed to create user: {user['username']} - {response.text}")
-    
-    return tokens
-
-def create_metrics(tokens):
-    """Create sample metrics for users"""
-    metrics_data = {
-        "john_doe": {
-            "height": 175,
-            "weight": 75,
-            "age": 28,
-            "gender": "male",
-            "activity_level": "moderate"
-        },
-        "jane_smith": {
-            "height": 165,
-            "weight": 60,
-            "age": 25,
-            "gender": "female",
-            "activity_level": "active"
-        },
-        "mike_wilson": {
-            "height": 180,
-            "weight": 85,
-            "age": 32,
-            "gender": "male",
-            "activity_level": "very_active"
-        }
-    }
-    
-    for username, metrics in metrics_data.items():
-        if username in tokens:
-            headers = {"Authorization": f"Bearer {tokens[username]}"}
-            response = requests.post(
-                f"{BASE_URL}/metrics",
-                json=metrics,
-                headers=headers
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                print(f"✅ Created metrics for {username}")
-                print(f"   BMI: {data['bmi']}, Body Fat: {data['body_fat_percentage']}%")
-            else:
-                print(f"❌ Failed to create metrics for {username}")
-
-def create_workouts(tokens):
-    """Create sample workout history"""
-    workout_types = [
-        "Running", "Cycling", "Swimming", "Weightlifting",
-        "Yoga", "CrossFit", "Basketball", "Tennis"
-    ]
-    intensities = ["low", "moderate", "high"]
-    
-    for username in ["john_doe", "jane_smith", "mike_wilson"]:
-        if username not in tokens:
-            continue
-            
-        headers = {"Authorization": f"Bearer {tokens[username]}"}
-        
-        # Create 10-15 workouts over the past 2 weeks
-        num_workouts = random.randint(10, 15)
-        
-        for i in range(num_workouts):
-            workout = {
-                "workout_type": random.choice(workout_types),
-                "duration": random.randint(20, 90),
-                "intensity": random.choice(intensities),
-                "calories_burned": random.randint(150, 600),
-                "notes": f"Great workout session #{i+1}"
-            }
-            
-            response = requests.post(
-                f"{BASE_URL}/workouts",
-                json=workout,
-                headers=headers
-            )
-            
-            if response.status_code == 200:
-                print(f"✅ Created workout for {username}: {workout['workout_type']}")
-            else:
-                print(f"❌ Failed to create workout for {username}")
-
-def send_sample_notifications(admin_token, user_tokens):
-    """Send sample notifications from admin to users"""
-    headers = {"Authorization": f"Bearer {admin_token}"}
-    
-    # Get all users
-    response = requests.get(f"{BASE_URL}/admin/users", headers=headers)
-    
-    if response.status_code == 200:
-        users = response.json()
-        
-        messages = [
-            "Great job on your consistency! Keep up the good work! 💪",
-            "Remember to stay hydrated during your workouts! 💧",
-            "Don't forget to warm up before intense exercises! 🔥",
-            "You're making excellent progress! Keep pushing! 🎯",
-            "Rest days are important too! Take care of your body! 😴"
+            username, email, password = f"user{user_id}", f"user{user_id}@example.com", PASSWORD
+        rows.append((user_id, email, username, hashes[password], False, created[i]))
+    return bulk_insert(conn, User.__table__, ("id", "email", "username", "hashed_password", "is_admin", "created_at"), rows)
+
+
+def insert_metrics(conn: Connection, rng, people: Population) -> int:
+    genders = np.where(people.male, "male", "female")
+    bmi = calculate_bmi_array(people.weight, people.height)
+    bulk_insert(conn, UserMetrics.__table__, (
+        "user_id", "height", "weight", "age", "gender", "activity_level",
+        "bmi", "body_fat_percentage", "skeletal_muscle_mass", "updated_at"
+    ), zip(
+        people.ids.tolist(), people.height.tolist(), people.weight.tolist(), people.age.tolist(),
+        genders.tolist(), [ACTIVITY_LEVELS[level] for level in people.activity_level.tolist()],
+        bmi.tolist(), calculate_body_fat_array(bmi, people.age, genders).tolist(),
+        calculate_skeletal_muscle_array(people.weight, people.height, people.age, genders).tolist(),
+        timestamps(people.last_active).tolist()
+    ))
+
+    # Monthly snapshots back from the latest, with a per-user weight trend
+    months = np.minimum((people.last_active - people.signup) // (30 * 86400) + 1, 12)
+    owner = np.repeat(np.arange(people.users), months)
+    back = np.arange(len(owner)) - np.repeat(np.cumsum(months) - months, months)
+    trend = rng.normal(0.3, 0.5, people.users)
+    weight = (people.weight[owner] + trend[owner] * back + rng.normal(0, 0.4, len(owner))).round(1)
+    height = people.height[owner]
+    history_bmi = calculate_bmi_array(weight, height)
+    history_genders = genders[owner]
+    return bulk_insert(conn, MetricsEntry.__table__, (
+        "user_id", "recorded_at", "weight", "bmi", "body_fat_percentage", "skeletal_muscle_mass"
+    ), zip(
+        people.ids[owner].tolist(),
+        timestamps(people.last_active[owner] - back * 30 * 86400).tolist(),
+        weight.tolist(), history_bmi.tolist(),
+        calculate_body_fat_array(history_bmi, people.age[owner], history_genders).tolist(),
+        calculate_skeletal_muscle_array(weight, height, people.age[owner], history_genders).tolist()
+    ))
+
+
+def insert_notifications(conn: Connection, rng, people: Population) -> int:
+    counts = rng.poisson(NOTIFICATIONS_PER_USER, people.users)
+    owner = np.repeat(np.arange(people.users), counts)
+    span = people.end - people.signup[owner]
+    sent = people.signup[owner] + (rng.random(len(owner)) * span).astype(np.int64)
+    return bulk_insert(conn, Notification.__table__, ("user_id", "message", "is_read", "created_at"), zip(
+        people.ids[owner].tolist(),
+        [MESSAGES[m] for m in rng.integers(0, len(MESSAGES), len(owner)).tolist()],
+        (rng.random(len(owner)) < READ_SHARE).tolist(),
+        timestamps(sent).tolist()
+    ))
+
+
+def schedule_workouts(rng, people: Population, workouts: int):
+    """Owner index and epoch second of every workout, in chronological order"""
+    active_days = (people.last_active - people.signup) // 86400 + 1
+    counts = spread_workouts(rng, people.activity, active_days * MAX_WORKOUTS_PER_DAY, workouts)
+    owner = np.repeat(np.arange(people.users, dtype=np.int32), counts)
+    n = len(owner)
+
+    # A day in the user's active span, moved to a weekday drawn from WEEKDAY_SHARES
+    first_day = people.signup[owner] // 86400
+    last_day = people.last_active[owner] // 86400
+    day = first_day + (rng.random(n) * (last_day - first_day + 1)).astype(np.int64)
+    weekday = rng.choice(7, n, p=WEEKDAY_SHARES)
+    moved = day - (day + 3) % 7 + weekday  # 1970-01-01 was a Thursday
+    day = np.where((moved >= first_day) & (moved <= last_day), moved, day)
+    del first_day, last_day, weekday, moved
+
+    peak = rng.choice(len(HOUR_PEAKS), n, p=HOUR_PEAKS[:, 0])
+    hours = np.clip(rng.normal(HOUR_PEAKS[peak, 1], HOUR_PEAKS[peak, 2]), 5.0, 22.9)
+    when = np.minimum(day * 86400 + (hours * 3600).astype(np.int64), people.end)
+    del day, peak, hours
+
+    order = np.argsort(when, kind="stable")
+    return owner[order], when[order]
+
+
+def insert_workouts(conn: Connection, rng, people: Population, owner: np.ndarray, when: np.ndarray,
+                    chunk_size: int) -> int:
+    """Draw the remaining columns one chunk at a time and insert it"""
+    names = ("user_id", "workout_type", "duration", "intensity", "calories_burned",
+             "notes", "date", "sets", "reps", "load_kg")
+    factor = np.zeros(len(TYPE_NAMES))
+    for name, value in STRENGTH_FACTORS.items():
+        factor[TYPE_NAMES.index(name)] = value
+    written = 0
+
+    for start in range(0, len(owner), chunk_size):
+        users, at = owner[start:start + chunk_size], when[start:start + chunk_size]
+        n = len(users)
+        kind = np.where(
+            rng.random(n) < FAVOURITE_SHARE, people.favourite[users],
+            rng.choice(len(TYPE_NAMES), n, p=TYPE_SHARES)
+        )
+        intensity = (rng.random(n)[:, None] > TYPE_INTENSITY_CDF[kind]).sum(axis=1)
+        duration = np.clip(np.rint(rng.lognormal(np.log(TYPE_MEDIANS[kind]), 0.35)), 10, 180).astype(np.int64)
+        calories = np.rint(
+            duration * TYPE_KCAL[kind] * INTENSITY_KCAL[intensity] * people.weight[users] / 75
+        ).astype(np.int64)
+
+        # Loads grow with time since signup and are rounded to 2.5 kg plates
+        sets = rng.integers(3, 6, n)
+        reps = rng.choice([5, 8, 10, 12], n, p=[0.25, 0.35, 0.25, 0.15])
+        span = np.maximum(people.last_active[users] - people.signup[users], 1)
+        progress = (at - people.signup[users]) / span
+        load = np.maximum(np.round(
+            people.strength[users] * factor[kind] * (0.85 + 0.3 * progress) * (1.1 - 0.02 * reps) / 2.5
+        ) * 2.5, 2.5)
+
+        lifted = (factor[kind] > 0).tolist()
+        sets, reps, load = [
+            [value if strength else None for strength, value in zip(lifted, column.tolist())]
+            for column in (sets, reps, load)
         ]
-        
-        for user in users:
-            notification = {
-                "user_id": user["id"],
-                "message": random.choice(messages)
-            }
-            
-            notif_response = requests.post(
-                f"{BASE_URL}/admin/notifications",
-                json=notification,
-                headers=headers
-            )
-            
-            if notif_response.status_code == 200:
-                print(f"✅ Sent notification to {user['username']}")
-            else:
-                print(f"❌ Failed to send notification to {user['username']}")
-    else:
-        print("❌ Failed to get users list")
+        written += bulk_insert(conn, Workout.__table__, names, zip(
+            people.ids[users].tolist(),
+            [TYPE_NAMES[k] for k in kind.tolist()],
+            duration.tolist(),
+            INTENSITIES[intensity].tolist(),
+            calories.tolist(),
+            [f"{s}x{r} @ {w:g}kg" if s is not None else None for s, r, w in zip(sets, reps, load)],
+            timestamps(at).tolist(),
+            sets, reps, load,
+        ))
+    return written
+
+
+def seed(engine: Engine, users: int, workouts: int, days: int = 365, seed: int = 42,
+         end: Optional[datetime] = None, chunk_size: Optional[int] = None,
+         log: Callable[[str], None] = print) -> dict:
+    """
+    Fill an empty, migrated database with an admin, `users` regular users
+    and `workouts` workouts over the `days` days up to `end` (default now)
+
+    Returns:
+        Row counts per table and seconds per phase
+    """
+    chunk_size = chunk_size or CHUNK_SIZE
+    rng = np.random.default_rng(seed)
+    end = np.datetime64((end or datetime.utcnow()).replace(microsecond=0))
+    report = {}
+    timings = {}
+
+    def phase(name: str, fn):
+        started = time.perf_counter()
+        result = fn()
+        timings[name] = round(time.perf_counter() - started, 2)
+        log(f"{name:<24} {timings[name]:8.2f}s")
+        return result
+
+    people = Population(rng, users, days, end)
+    workout_indexes = list(Workout.__table__.indexes)
+
+    with engine.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA synchronous = OFF")
+            conn.exec_driver_sql("PRAGMA cache_size = -262144")  # 256 MiB
+        report["users"] = phase("users", lambda: insert_users(conn, rng, people))
+        report["metrics_history"] = phase("metrics", lambda: insert_metrics(conn, rng, people))
+        report["notifications"] = phase("notifications", lambda: insert_notifications(conn, rng, people))
+        owner, when = phase("schedule workouts", lambda: schedule_workouts(rng, people, workouts))
+        # Appending to the table and sorting each index once beats keeping
+        # every index up to date row by row
+        for index in workout_indexes:
+            index.drop(conn)
+        report["workouts"] = phase(
+            "insert workouts", lambda: insert_workouts(conn, rng, people, owner, when, chunk_size)
+        )
+        del owner, when
+        phase("index workouts", lambda: [index.create(conn) for index in workout_indexes])
+
+    with engine.begin() as conn:
+        phase("activity bitmaps", lambda: rebuild_activity(conn))
+        report["personal_records"] = phase("personal records", lambda: rebuild_records(conn))
+        report["rewards"] = phase("rewards", lambda: replay_rewards(conn)["rewards"])
+    db = sessionmaker(bind=engine)()
+    try:
+        phase("analytics rollups", lambda: rebuild_rollups(db))
+    finally:
+        db.close()
+
+    report["seconds"] = timings
+    return report
+
+
+def prepare(engine: Engine, reset: bool):
+    """Create and migrate the schema, refusing to write into a database that already has users"""
+    if reset:
+        Base.metadata.drop_all(bind=engine)
+        migration_metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    with engine.connect() as conn:
+        if conn.execute(select(func.count()).select_from(User.__table__)).scalar():
+            raise SystemExit("The database already has users; pass --reset to replace its contents")
+
 
 def main():
-    print("\n🌱 Starting database seeding...\n")
-    
-    # Create users and get tokens
-    print("=" * 50)
-    print("Creating Users...")
-    print("=" * 50)
-    tokens = create_users()
-    
-    if not tokens:
-        print("\n❌ No users created. Exiting...")
-        return
-    
-    # Create metrics
-    print("\n" + "=" * 50)
-    print("Creating Metrics...")
-    print("=" * 50)
-    create_metrics(tokens)
-    
-    # Create workouts
-    print("\n" + "=" * 50)
-    print("Creating Workout History...")
-    print("=" * 50)
-    create_workouts(tokens)
-    
-    # Send notifications (admin only)
-    if "admin" in tokens:
-        print("\n" + "=" * 50)
-        print("Sending Sample Notifications...")
-        print("=" * 50)
-        send_sample_notifications(tokens["admin"], tokens)
-    
-    print("\n" + "=" * 50)
-    print("✨ Database seeding completed!")
-    print("=" * 50)
-    print("\nTest Credentials:")
-    print("-" * 50)
-    print("Admin:")
-    print("  Username: admin")
-    print("  Password: admin123")
-    print("\nRegular Users:")
-    print("  Username: john_doe | Password: password123")
-    print("  Username: jane_smith | Password: password123")
-    print("  Username: mike_wilson | Password: password123")
-    print("=" * 50 + "\n")
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--database-url", default=SQLALCHEMY_DATABASE_URL)
+    parser.add_argument("--users", type=int, default=500, help="regular users besides the admin")
+    parser.add_argument("--workouts", type=int, default=20_000)
+    parser.add_argument("--days", type=int, default=365, help="length of the history window")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="end of the history window (default now)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--reset", action="store_true", help="drop every table first")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    prepare(engine, args.reset)
+    started = time.perf_counter()
+    report = seed(engine, args.users, args.workouts, args.days, args.seed, args.end, args.chunk_size)
+    engine.dispose()
+
+    print(
+        f"\nSeeded {report['users']} users, {report['workouts']} workouts, "
+        f"{report['metrics_history']} metrics snapshots, {report['notifications']} notifications, "
+        f"{report['personal_records']} personal records and {report['rewards']} rewards "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    print("Demo logins: admin / admin123, john_doe / password123 (every other user: user<id> / password123)")
+
 
 if __name__ == "__main__":
-    try:
-        main()
-    except requests.exceptions.ConnectionError:
-        print("\n❌ Error: Cannot connect to the backend server.")
-        print("Make sure the backend is running at http://localhost:8080")
-        print("Start it with: uvicorn main:app --reload\n")
-    except Exception as e:
-        print(f"\n❌ Error occurred: {str(e)}\n")
\ No newline at end of file
+    main()
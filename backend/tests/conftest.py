@@ -1,15 +1,33 @@
 
+import os
+from contextlib import contextmanager
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.database import Base, get_db
-from app.main import app
-from app.models import User
-from app.auth import get_password_hash
+from sqlalchemy.pool import NullPool
+
+# Answer AI prompts locally instead of calling the Gemini API
+os.environ.setdefault("GEMINI_BACKEND", "fake")
 
-# Use in-memory SQLite for testing
+# Point the app at the test database before it is imported; app.main creates
+# tables and runs migrations at import time, which would otherwise touch
+# the development database
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+os.environ["DATABASE_URL"] = SQLALCHEMY_DATABASE_URL
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+from app.database import Base, get_db, get_async_db, to_async_url
+from app.main import app
+from app.models import User
+from app.auth import get_password_hash, principal_cache
+from app.services.ai_cache import ai_response_cache
+from app.services.ai_jobs import ai_job_queue
+from app.services.broadcasts import broadcast_sender
+from app.services.data_versions import data_version_cache
+from app.services.progress import progress_cache
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
@@ -17,6 +35,73 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async sessions read the same database file. Connections are not pooled
+# because each TestClient runs its own event loop.
+async_engine = create_async_engine(to_async_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# AI job workers, broadcasts and streamed AI responses open their own
+# sessions outside of request dependencies
+ai_job_queue.session_factory = TestingAsyncSessionLocal
+ai_response_cache.session_factory = TestingAsyncSessionLocal
+broadcast_sender.session_factory = TestingAsyncSessionLocal
+
+
+class QueryRecorder:
+    """SQL statements executed on the sync and async test engines while recording"""
+
+    def __init__(self):
+        self.statements = []
+
+    def __len__(self):
+        return len(self.statements)
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+    def clear(self):
+        self.statements.clear()
+
+    def selects(self):
+        return [(s, p) for s, p in self.statements if s.lstrip().upper().startswith("SELECT")]
+
+    @contextmanager
+    def budget(self, limit, label="block"):
+        """Fail if the statements executed inside the block exceed limit"""
+        self.clear()
+        yield self
+        listing = "\n".join(f"  {statement}" for statement, _ in self.statements)
+        assert len(self.statements) <= limit, (
+            f"{label} issued {len(self.statements)} SQL statements, budget is {limit}:\n{listing}"
+        )
+
+
+@pytest.fixture
+def sql_queries():
+    """Record every SQL statement the app and the tests execute"""
+    recorder = QueryRecorder()
+    targets = (engine, async_engine.sync_engine)
+    for target in targets:
+        event.listen(target, "before_cursor_execute", recorder.record)
+    yield recorder
+    for target in targets:
+        event.remove(target, "before_cursor_execute", recorder.record)
+
+
+@pytest.fixture
+def assert_query_budget(client, sql_queries):
+    """Call an endpoint and fail if it issues more than budget SQL statements
+
+    The principal cache stays warm, so budgets count what a logged-in user's
+    repeat request costs.
+    """
+    def call(method, url, budget, **kwargs):
+        with sql_queries.budget(budget, f"{method} {url}"):
+            response = client.request(method, url, **kwargs)
+        assert response.status_code < 400, response.text
+        return response
+    return call
+
 
 @pytest.fixture(scope="function")
 def db_session():
@@ -28,6 +113,10 @@ def db_session():
     finally:
         db.close()
         Base.metadata.drop_all(bind=engine)
+        principal_cache.clear()
+        ai_response_cache.clear()
+        progress_cache.clear()
+        data_version_cache.clear()
 
 
 @pytest.fixture(scope="function")
@@ -39,7 +128,12 @@ def client(db_session):
         finally:
             pass
     
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+    
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
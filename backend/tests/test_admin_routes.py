@@ -2,6 +2,9 @@
 import pytest
 from fastapi import status
 
+from app.models import UserMetrics
+from app.services import body_composition
+
 
 class TestAdminUsers:
     
@@ -86,4 +89,36 @@ class TestAdminAnalytics:
         data = response.json()
         assert data["user_id"] == test_user.id
         assert data["username"] == test_user.username
-        assert "total_workouts" in data
\ No newline at end of file
+        assert "total_workouts" in data
+
+
+class TestAdminMetricsRecompute:
+    
+    def test_recompute_fixes_stale_metrics(self, client, db_session, admin_headers, test_user, monkeypatch):
+        """Test the batch recompute rewrites stale derived metrics in chunks"""
+        monkeypatch.setattr(body_composition, "RECOMPUTE_CHUNK_SIZE", 1)
+        db_session.add(UserMetrics(
+            user_id=test_user.id, height=175.0, weight=70.0, age=25, gender="male",
+            activity_level="moderate", bmi=1.0, body_fat_percentage=None, skeletal_muscle_mass=None
+        ))
+        db_session.commit()
+        
+        response = client.post("/admin/metrics/recompute", headers=admin_headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["rows"] == 1
+        assert response.json()["updated"] == 1
+        assert response.json()["rows_per_second"] > 0
+        db_session.expire_all()
+        stored = db_session.query(UserMetrics).filter(UserMetrics.user_id == test_user.id).one()
+        assert stored.bmi == 22.86
+        assert stored.body_fat_percentage == 16.98
+        
+        # Nothing is stale the second time
+        assert client.post("/admin/metrics/recompute", headers=admin_headers).json()["updated"] == 0
+    
+    def test_recompute_is_admin_only(self, client, auth_headers):
+        """Test regular users cannot trigger a recompute"""
+        response = client.post("/admin/metrics/recompute", headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_403_FORBIDDEN
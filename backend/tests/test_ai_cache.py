@@ -0,0 +1,82 @@
+import pytest
+from fastapi import status
+from unittest.mock import patch
+
+from app.services.ai_cache import ai_response_cache, cache_key
+
+
+AUTO_REQUEST = {"prompt": "", "context": None}
+
+WORKOUT = {
+    "workout_type": "Running",
+    "duration": 30,
+    "intensity": "moderate",
+    "calories_burned": 300
+}
+
+
+class TestCacheKey:
+    
+    def test_whitespace_and_case_share_a_key(self):
+        """Test cosmetic prompt differences map to the same key"""
+        assert cache_key("Plan  my\nWeek", "fp") == cache_key("plan my week", "fp")
+    
+    def test_fingerprint_changes_key(self):
+        """Test different user data produces a different key"""
+        assert cache_key("plan", "a") != cache_key("plan", "b")
+
+
+class TestAIResponseCache:
+    
+    @patch('app.routers.ai_routes.generate_text')
+    def test_repeat_request_is_served_from_cache(self, mock_generate, client, auth_headers):
+        """Test an unchanged profile reuses the previous recommendation"""
+        mock_generate.return_value = "Plan A"
+        
+        first = client.post("/ai/recommendations", json=AUTO_REQUEST, headers=auth_headers)
+        second = client.post("/ai/recommendations", json=AUTO_REQUEST, headers=auth_headers)
+        
+        assert first.json()["cached"] is False
+        assert second.json()["cached"] is True
+        assert second.json()["ai_response"] == "Plan A"
+        mock_generate.assert_called_once()
+    
+    @patch('app.routers.ai_routes.generate_text')
+    def test_new_workout_misses_cache(self, mock_generate, client, auth_headers):
+        """Test logging a workout changes the fingerprint"""
+        mock_generate.return_value = "Plan A"
+        client.post("/ai/recommendations", json=AUTO_REQUEST, headers=auth_headers)
+        
+        client.post("/workouts", json=WORKOUT, headers=auth_headers)
+        response = client.post("/ai/recommendations", json=AUTO_REQUEST, headers=auth_headers)
+        
+        assert response.json()["cached"] is False
+        assert mock_generate.call_count == 2
+    
+    @patch('app.routers.ai_routes.generate_text')
+    def test_database_tier_survives_memory_loss(self, mock_generate, client, auth_headers):
+        """Test responses persisted in SQLite are found after a restart"""
+        mock_generate.return_value = "Plan A"
+        client.post("/ai/recommendations", json=AUTO_REQUEST, headers=auth_headers)
+        
+        ai_response_cache.clear()
+        response = client.post("/ai/recommendations", json=AUTO_REQUEST, headers=auth_headers)
+        
+        assert response.json()["cached"] is True
+        assert ai_response_cache.stats()["db_hits"] == 1
+        mock_generate.assert_called_once()
+    
+    @patch('app.routers.ai_routes.generate_text')
+    def test_cache_stats_endpoint(self, mock_generate, client, auth_headers, admin_headers):
+        """Test admins can read the AI cache counters"""
+        mock_generate.return_value = "Plan A"
+        client.post("/ai/recommendations", json=AUTO_REQUEST, headers=auth_headers)
+        client.post("/ai/recommendations", json=AUTO_REQUEST, headers=auth_headers)
+        
+        response = client.get("/admin/ai-cache", headers=admin_headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["memory_hits"] == 1
+        assert data["misses"] == 1
+        assert data["hit_rate"] == 0.5
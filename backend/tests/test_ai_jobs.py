@@ -0,0 +1,204 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+from sqlalchemy.exc import IntegrityError
+
+from app.models import AIJob
+from app.services import gemini_client
+from app.services.ai_jobs import AIJobQueue
+from app.services.gemini_client import FakeBackend
+from tests.conftest import TestingAsyncSessionLocal
+
+
+def wait_for_job(client, job_id, headers, timeout=5):
+    """Poll a job until it leaves the pending/running states"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        data = client.get(f"/ai/jobs/{job_id}", headers=headers).json()
+        if data["status"] not in ("pending", "running"):
+            return data
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+@pytest.fixture
+def slow_backend():
+    """Make generations slow enough to observe pending jobs"""
+    previous = gemini_client.get_backend()
+    gemini_client.set_backend(FakeBackend(latency=0.3))
+    yield
+    gemini_client.set_backend(previous)
+
+
+class TestAIJobs:
+    
+    def test_submit_returns_job_id_immediately(self, client, auth_headers):
+        """Test submitting queues a job that later completes"""
+        response = client.post("/ai/jobs", json={"prompt": "How do I deadlift?"}, headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        job = response.json()
+        assert job["status"] == "pending"
+        assert job["mode"] == "ask_anything"
+        
+        done = wait_for_job(client, job["job_id"], auth_headers)
+        assert done["status"] == "done"
+        assert done["ai_response"].startswith("[fake-gemini")
+    
+    def test_identical_pending_jobs_are_deduplicated(self, client, auth_headers, slow_backend):
+        """Test the same request while a job is active returns that job"""
+        first = client.post("/ai/jobs", json={"prompt": ""}, headers=auth_headers).json()
+        second = client.post("/ai/jobs", json={"prompt": ""}, headers=auth_headers).json()
+        
+        assert second["job_id"] == first["job_id"]
+        assert second["deduplicated"] is True
+        
+        wait_for_job(client, first["job_id"], auth_headers)
+        third = client.post("/ai/jobs", json={"prompt": ""}, headers=auth_headers).json()
+        assert third["job_id"] != first["job_id"]
+    
+    def test_completed_auto_job_fills_response_cache(self, client, auth_headers):
+        """Test an auto recommendation job result is reused by the sync endpoint"""
+        job = client.post("/ai/jobs", json={"prompt": ""}, headers=auth_headers).json()
+        done = wait_for_job(client, job["job_id"], auth_headers)
+        
+        response = client.post("/ai/recommendations", json={"prompt": ""}, headers=auth_headers).json()
+        
+        assert response["cached"] is True
+        assert response["ai_response"] == done["ai_response"]
+    
+    def test_other_users_job_is_not_visible(self, client, auth_headers, admin_headers):
+        """Test a job can only be read by the user who submitted it"""
+        job = client.post("/ai/jobs", json={"prompt": "Hi"}, headers=auth_headers).json()
+        
+        response = client.get(f"/ai/jobs/{job['job_id']}", headers=admin_headers)
+        
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestAIJobQueue:
+    
+    def test_start_requeues_unfinished_jobs(self, db_session, test_user):
+        """Test jobs left pending, or running without a heartbeat, are run on start"""
+        for job_id, job_status in (("a", "pending"), ("b", "running")):
+            db_session.add(AIJob(
+                id=job_id, user_id=test_user.id, mode="ask_anything",
+                prompt="Hi", dedupe_key=job_id, status=job_status
+            ))
+        db_session.commit()
+        
+        async def run():
+            queue = AIJobQueue(workers=1, session_factory=TestingAsyncSessionLocal)
+            await queue.start()
+            await queue.join()
+            await queue.stop()
+        
+        asyncio.run(run())
+        
+        db_session.expire_all()
+        assert {job.status for job in db_session.query(AIJob).all()} == {"done"}
+    
+    def test_start_only_reclaims_stale_running_jobs(self, db_session, test_user):
+        """Test a running job with a fresh heartbeat is left to the worker that owns it"""
+        now = datetime.utcnow()
+        for job_id, heartbeat_at in (("live", now), ("dead", now - timedelta(minutes=10))):
+            db_session.add(AIJob(
+                id=job_id, user_id=test_user.id, mode="ask_anything", prompt="Hi",
+                dedupe_key=job_id, status="running", worker_id="other", heartbeat_at=heartbeat_at
+            ))
+        db_session.commit()
+        
+        async def run():
+            queue = AIJobQueue(workers=1, session_factory=TestingAsyncSessionLocal, stale_seconds=60)
+            await queue.start()
+            await queue.join()
+            await queue.stop()
+        
+        asyncio.run(run())
+        
+        db_session.expire_all()
+        jobs = {job.id: job for job in db_session.query(AIJob).all()}
+        assert (jobs["live"].status, jobs["live"].worker_id) == ("running", "other")
+        assert jobs["dead"].status == "done"
+        assert jobs["dead"].worker_id not in (None, "other")
+    
+    def test_concurrent_submits_create_one_job(self, db_session, test_user):
+        """Test racing identical submits all return the same job"""
+        async def submit():
+            async with TestingAsyncSessionLocal() as db:
+                job, created = await queue.submit(db, test_user.id, "ask_anything", "Hi", "same")
+                return job.id, created
+        
+        async def run():
+            return await asyncio.gather(*(submit() for _ in range(5)))
+        
+        queue = AIJobQueue(workers=1, session_factory=TestingAsyncSessionLocal)
+        results = asyncio.run(run())
+        
+        assert len({job_id for job_id, _ in results}) == 1
+        assert [created for _, created in results].count(True) == 1
+        assert db_session.query(AIJob).count() == 1
+    
+    def test_second_active_job_for_a_key_is_rejected(self, db_session, test_user):
+        """Test the unique index allows one active job per key, and new ones once it finishes"""
+        def job(job_id, job_status):
+            return AIJob(
+                id=job_id, user_id=test_user.id, mode="ask_anything",
+                prompt="Hi", dedupe_key="same", status=job_status
+            )
+        db_session.add_all([job("a", "pending"), job("b", "done")])
+        db_session.commit()
+        
+        db_session.add(job("c", "running"))
+        with pytest.raises(IntegrityError):
+            db_session.commit()
+        db_session.rollback()
+        
+        db_session.query(AIJob).filter(AIJob.id == "a").update({"status": "failed"})
+        db_session.add(job("c", "pending"))
+        db_session.commit()
+    
+    def test_prune_deletes_old_finished_jobs(self, db_session, test_user):
+        """Test finished jobs are kept for the retention period, active jobs always"""
+        now = datetime.utcnow()
+        for job_id, job_status, finished_at in (
+            ("old-done", "done", now - timedelta(hours=30)),
+            ("old-failed", "failed", now - timedelta(hours=30)),
+            ("recent", "done", now - timedelta(hours=1)),
+            ("pending", "pending", None),
+        ):
+            db_session.add(AIJob(
+                id=job_id, user_id=test_user.id, mode="ask_anything", prompt="Hi",
+                dedupe_key=job_id, status=job_status, finished_at=finished_at
+            ))
+        db_session.commit()
+        
+        queue = AIJobQueue(workers=1, session_factory=TestingAsyncSessionLocal, retention_hours=24)
+        
+        assert asyncio.run(queue.prune()) == 2
+        db_session.expire_all()
+        assert {job.id for job in db_session.query(AIJob).all()} == {"recent", "pending"}
+    
+    def test_heartbeat_keeps_long_jobs_owned(self, db_session, test_user, slow_backend):
+        """Test a job running longer than stale_seconds is not reclaimed from its live worker"""
+        async def run():
+            queue = AIJobQueue(
+                workers=1, session_factory=TestingAsyncSessionLocal,
+                heartbeat_seconds=0.05, stale_seconds=0.2
+            )
+            await queue.start()
+            async with TestingAsyncSessionLocal() as db:
+                job, _ = await queue.submit(db, test_user.id, "ask_anything", "Hi", "slow")
+            await asyncio.sleep(0.25)
+            assert await queue.reclaim_stale() == []
+            await queue.join()
+            await queue.stop()
+            return job.id
+        
+        job_id = asyncio.run(run())
+        
+        db_session.expire_all()
+        assert db_session.get(AIJob, job_id).status == "done"
@@ -3,6 +3,10 @@ import pytest
 from fastapi import status
 from unittest.mock import patch
 
+from app.services.gemini_client import GeminiTimeoutError
+from app.models import Workout
+from app.services.progress import progress_cache, progress_summary
+
 
 class TestAIRecommendations:
     
@@ -56,4 +60,75 @@ class TestAIRecommendations:
         assert response.status_code == status.HTTP_200_OK
         data = response.json()
         assert "No workout data available" in data["message"]
-
+    
+    def test_analyze_progress_buckets(self, client, auth_headers):
+        """Test progress totals with per-day, per-week and per-type breakdowns"""
+        for workout_type, intensity, duration in (("Running", "high", 30), ("Running", "low", 20), ("Yoga", "low", 60)):
+            client.post("/workouts", json={
+                "workout_type": workout_type, "duration": duration,
+                "intensity": intensity, "calories_burned": duration * 10
+            }, headers=auth_headers)
+        
+        data = client.get("/ai/progress-analysis?days=7", headers=auth_headers).json()
+        
+        assert data["total_workouts"] == 3
+        assert data["total_minutes"] == 110
+        assert data["total_calories_burned"] == 1100
+        assert data["by_type"]["Running"] == {"workouts": 2, "minutes": 50, "calories": 500}
+        assert data["by_intensity"]["low"]["minutes"] == 80
+        assert len(data["daily"]) == 1
+        assert data["daily"][0]["by_type"]["Yoga"]["workouts"] == 1
+        assert data["weekly"][0]["workouts"] == 3
+    
+    def test_analyze_progress_cache_invalidated_by_writes(self, client, auth_headers):
+        """Test cached summaries are dropped when the user's workouts change"""
+        workout = {"workout_type": "Running", "duration": 30, "intensity": "high", "calories_burned": 300}
+        workout_id = client.post("/workouts", json=workout, headers=auth_headers).json()["id"]
+        assert client.get("/ai/progress-analysis", headers=auth_headers).json()["total_workouts"] == 1
+        
+        client.post("/workouts", json=workout, headers=auth_headers)
+        assert client.get("/ai/progress-analysis", headers=auth_headers).json()["total_workouts"] == 2
+        
+        client.put(f"/workouts/{workout_id}", json={**workout, "duration": 45}, headers=auth_headers)
+        assert client.get("/ai/progress-analysis", headers=auth_headers).json()["total_minutes"] == 75
+        
+        client.delete(f"/workouts/{workout_id}", headers=auth_headers)
+        assert client.get("/ai/progress-analysis", headers=auth_headers).json()["total_workouts"] == 1
+    
+    def test_analyze_progress_served_from_cache(self, client, auth_headers):
+        """Test repeated requests for the same window skip the aggregation query"""
+        client.post("/workouts", json={
+            "workout_type": "Running", "duration": 30, "intensity": "high", "calories_burned": 300
+        }, headers=auth_headers)
+        
+        with patch('app.routers.ai_routes.progress_summary', wraps=progress_summary) as summary:
+            for _ in range(3):
+                client.get("/ai/progress-analysis?days=30", headers=auth_headers)
+            client.get("/ai/progress-analysis?days=90", headers=auth_headers)
+        
+        assert summary.call_count == 2
+    
+    def test_progress_cache_invalidated_on_commit_not_flush(self, db_session, test_user):
+        """Test a flushed but uncommitted workout leaves the cache alone until commit"""
+        progress_cache.set(test_user.id, 30, {"total_workouts": 0})
+        db_session.add(Workout(user_id=test_user.id, workout_type="Running", duration=30,
+                               intensity="high", calories_burned=300))
+        db_session.flush()
+        assert progress_cache.get(test_user.id, 30) is not None
+        
+        db_session.rollback()
+        assert progress_cache.get(test_user.id, 30) is not None
+        
+        db_session.add(Workout(user_id=test_user.id, workout_type="Running", duration=30,
+                               intensity="high", calories_burned=300))
+        db_session.commit()
+        assert progress_cache.get(test_user.id, 30) is None
+    
+    @patch('app.routers.ai_routes.generate_text')
+    def test_ai_recommendations_timeout(self, mock_generate, client, auth_headers):
+        """Test a timed out AI call returns 504"""
+        mock_generate.side_effect = GeminiTimeoutError("deadline exceeded")
+        
+        response = client.post("/ai/recommendations", json={"prompt": "Hi"}, headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_504_GATEWAY_TIMEOUT
@@ -0,0 +1,65 @@
+import json
+import pytest
+from fastapi import status
+
+from app.models import AIResponseCacheEntry
+
+
+def parse_events(body):
+    """Split an SSE body into (event, data) pairs"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestAIStreaming:
+    
+    def test_stream_ask_anything(self, client, auth_headers):
+        """Test a custom prompt streams chunks followed by a done event"""
+        response = client.post(
+            "/ai/recommendations/stream",
+            json={"prompt": "How do I squat?"},
+            headers=auth_headers
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = parse_events(response.text)
+        assert [e for e, _ in events[:-1]] == ["chunk"] * (len(events) - 1)
+        assert len(events) > 2
+        assert events[-1] == ("done", {"mode": "ask_anything", "cached": False})
+        assert "".join(d["text"] for e, d in events if e == "chunk").startswith("[fake-gemini")
+    
+    def test_stream_auto_recommendation_fills_cache(self, client, auth_headers):
+        """Test a completed auto-mode stream is cached for the next request"""
+        first = parse_events(client.post(
+            "/ai/recommendations/stream", json={"prompt": ""}, headers=auth_headers
+        ).text)
+        second = parse_events(client.post(
+            "/ai/recommendations/stream", json={"prompt": ""}, headers=auth_headers
+        ).text)
+        
+        streamed = "".join(d["text"] for e, d in first if e == "chunk")
+        assert second[0] == ("chunk", {"text": streamed})
+        assert second[-1] == ("done", {"mode": "auto_recommendation", "cached": True})
+        
+        # The non-streaming endpoint shares the cache
+        response = client.post("/ai/recommendations", json={"prompt": ""}, headers=auth_headers)
+        assert response.json()["ai_response"] == streamed
+    
+    def test_stream_stores_response_with_its_own_session(self, client, db_session, auth_headers):
+        """Test the streamed response reaches the cache table after the request's session closed"""
+        events = parse_events(client.post(
+            "/ai/recommendations/stream", json={"prompt": ""}, headers=auth_headers
+        ).text)
+        
+        rows = db_session.query(AIResponseCacheEntry).all()
+        assert [row.response for row in rows] == ["".join(d["text"] for e, d in events if e == "chunk")]
+    
+    def test_stream_requires_auth(self, client):
+        """Test streaming is only available to authenticated users"""
+        response = client.post("/ai/recommendations/stream", json={"prompt": "Hi"})
+        
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
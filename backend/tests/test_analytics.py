@@ -0,0 +1,149 @@
+from datetime import date, datetime
+
+import pytest
+from fastapi import status
+
+from app.models import DailyStats, User, Workout
+
+
+WORKOUT = {
+    "workout_type": "Running",
+    "duration": 30,
+    "intensity": "moderate",
+    "calories_burned": 300
+}
+
+
+def snapshot(client, headers):
+    """Current analytics overview and daily rollups"""
+    overview = client.get("/admin/analytics", headers=headers).json()
+    daily = client.get("/admin/analytics/daily", headers=headers).json()
+    return overview, daily
+
+
+def assert_matches_rebuild(client, headers):
+    """Incrementally maintained rollups must equal a rebuild from scratch"""
+    incremental = snapshot(client, headers)
+    client.post("/admin/analytics/rebuild", headers=headers)
+    assert snapshot(client, headers) == incremental
+    return incremental
+
+
+class TestAnalyticsRollups:
+    
+    def test_workout_writes_update_rollups(self, client, auth_headers, admin_headers):
+        """Test logging, editing and deleting workouts keeps the rollups exact"""
+        client.post("/admin/analytics/rebuild", headers=admin_headers)
+        
+        ids = [client.post("/workouts", json=WORKOUT, headers=auth_headers).json()["id"] for _ in range(3)]
+        client.put(f"/workouts/{ids[0]}", json={**WORKOUT, "duration": 45}, headers=auth_headers)
+        client.delete(f"/workouts/{ids[1]}", headers=auth_headers)
+        
+        overview, daily = assert_matches_rebuild(client, admin_headers)
+        assert overview["total_workouts"] == 2
+        assert overview["total_workout_minutes"] == 75
+        assert overview["active_users"] == 1
+        assert daily[-1]["workouts"] == 2
+        assert daily[-1]["active_users"] == 1
+    
+    def test_user_writes_update_rollups(self, client, auth_headers, admin_headers, test_user):
+        """Test registering and deleting users keeps the rollups exact"""
+        client.post("/admin/analytics/rebuild", headers=admin_headers)
+        client.post("/auth/register", json={
+            "email": "new@example.com",
+            "username": "newuser",
+            "password": "password123"
+        })
+        client.post("/workouts", json=WORKOUT, headers=auth_headers)
+        
+        overview, _ = assert_matches_rebuild(client, admin_headers)
+        assert overview["total_users"] == 2
+        assert overview["active_users"] == 1
+        
+        client.delete(f"/admin/users/{test_user.id}", headers=admin_headers)
+        
+        overview, daily = assert_matches_rebuild(client, admin_headers)
+        assert overview["total_users"] == 1
+        assert overview["total_workouts"] == 0
+        assert overview["active_users"] == 0
+        assert daily[-1]["new_users"] == 1
+    
+    def test_deleting_user_with_several_workouts(self, client, auth_headers, admin_headers, test_user):
+        """Test a cascade deleting several same-day workouts ends the user's activity once"""
+        client.post("/admin/analytics/rebuild", headers=admin_headers)
+        client.post("/auth/register", json={
+            "email": "new@example.com",
+            "username": "newuser",
+            "password": "password123"
+        })
+        for _ in range(3):
+            client.post("/workouts", json=WORKOUT, headers=auth_headers)
+        
+        client.delete(f"/admin/users/{test_user.id}", headers=admin_headers)
+        
+        overview, daily = assert_matches_rebuild(client, admin_headers)
+        assert overview["active_users"] == 0
+        assert (daily[-1]["active_users"], daily[-1]["workouts"]) == (0, 0)
+    
+    def test_several_workouts_in_one_flush(self, client, db_session, admin_headers):
+        """Test a user whose first workouts are added together becomes active once"""
+        client.post("/admin/analytics/rebuild", headers=admin_headers)
+        user = User(email="batch@example.com", username="batch", hashed_password="x")
+        db_session.add(user)
+        db_session.commit()
+        
+        db_session.add_all([
+            Workout(user_id=user.id, workout_type="Running", duration=30, intensity="moderate",
+                    calories_burned=300, date=datetime.utcnow())
+            for _ in range(3)
+        ])
+        db_session.commit()
+        
+        overview, daily = assert_matches_rebuild(client, admin_headers)
+        assert overview["active_users"] == 1
+        assert (daily[-1]["active_users"], daily[-1]["workouts"]) == (1, 3)
+    
+    def test_import_updates_rollups(self, client, auth_headers, admin_headers):
+        """Test a batch of same-day imported workouts makes the user active once"""
+        client.post("/admin/analytics/rebuild", headers=admin_headers)
+        
+        client.post(
+            "/workouts/import",
+            content="workout_type,duration,intensity,calories_burned,date\n"
+                    + f"Running,30,moderate,300,{date.today().isoformat()}T07:00:00\n" * 3,
+            headers={**auth_headers, "Content-Type": "text/csv"}
+        )
+        
+        overview, daily = assert_matches_rebuild(client, admin_headers)
+        assert overview["active_users"] == 1
+        assert (daily[-1]["active_users"], daily[-1]["workouts"]) == (1, 3)
+    
+    def test_admin_flag_change_updates_rollups(self, client, db_session, auth_headers, admin_headers, test_user):
+        """Test promoting a user removes them from the user counts"""
+        client.post("/workouts", json=WORKOUT, headers=auth_headers)
+        client.post("/admin/analytics/rebuild", headers=admin_headers)
+        
+        user = db_session.query(User).filter(User.id == test_user.id).first()
+        user.is_admin = True
+        db_session.commit()
+        
+        overview, daily = assert_matches_rebuild(client, admin_headers)
+        assert overview["total_users"] == 0
+        assert overview["active_users"] == 0
+        assert daily[-1]["active_users"] == 0
+    
+    def test_first_read_builds_rollups(self, client, db_session, auth_headers, admin_headers):
+        """Test a database without rollups is rebuilt on the first read"""
+        client.post("/workouts", json=WORKOUT, headers=auth_headers)
+        
+        response = client.get("/admin/analytics", headers=admin_headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["total_workouts"] == 1
+        assert db_session.query(DailyStats).count() == 1
+    
+    def test_rebuild_requires_admin(self, client, auth_headers):
+        """Test regular users cannot rebuild analytics"""
+        response = client.post("/admin/analytics/rebuild", headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+
+from app.models import Notification, User, UserMetrics, Workout
+from app.services.broadcasts import broadcast_sender
+
+
+@pytest.fixture
+def members(db_session):
+    """Twelve users: even ids active this week, every third one 'high' activity"""
+    now = datetime.utcnow()
+    db_session.execute(User.__table__.insert(), [{
+        "email": f"member{i}@example.com", "username": f"member{i}",
+        "hashed_password": "x", "is_admin": False, "created_at": now
+    } for i in range(12)])
+    users = db_session.query(User).filter(User.username.like("member%")).order_by(User.id).all()
+    for i, user in enumerate(users):
+        db_session.add(UserMetrics(user_id=user.id, activity_level="high" if i % 3 == 0 else "low"))
+        when = now - timedelta(days=1 if i % 2 == 0 else 30)
+        db_session.add(Workout(user_id=user.id, workout_type="Running", duration=30,
+                               intensity="moderate", calories_burned=300, date=when))
+    db_session.commit()
+    return users
+
+
+def recipients(db_session, message):
+    return {n.user_id for n in db_session.query(Notification).filter(Notification.message == message)}
+
+
+class TestBroadcasts:
+    
+    def test_broadcast_to_everyone(self, client, db_session, admin_headers, admin_user, members, monkeypatch):
+        """Test a broadcast without filters reaches every non-admin user in chunks"""
+        monkeypatch.setattr(broadcast_sender, "chunk_size", 5)
+        
+        response = client.post("/admin/notifications/broadcast", json={"message": "Hello all"}, headers=admin_headers)
+        
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        broadcast_id = response.json()["broadcast_id"]
+        progress = client.get(f"/admin/notifications/broadcasts/{broadcast_id}", headers=admin_headers).json()
+        assert progress["status"] == "done"
+        assert progress["total_recipients"] == progress["sent"] == 12
+        assert recipients(db_session, "Hello all") == {u.id for u in members}
+    
+    def test_broadcast_to_segment(self, client, db_session, admin_headers, members):
+        """Test inactive_days and activity_level narrow the recipients"""
+        response = client.post("/admin/notifications/broadcast", json={
+            "message": "We miss you", "inactive_days": 7, "activity_level": "high"
+        }, headers=admin_headers)
+        
+        progress = client.get(
+            f"/admin/notifications/broadcasts/{response.json()['broadcast_id']}", headers=admin_headers
+        ).json()
+        expected = {u.id for i, u in enumerate(members) if i % 2 == 1 and i % 3 == 0}
+        assert progress["sent"] == len(expected)
+        assert recipients(db_session, "We miss you") == expected
+    
+    def test_broadcast_is_admin_only(self, client, auth_headers):
+        """Test regular users cannot broadcast"""
+        response = client.post("/admin/notifications/broadcast", json={"message": "Hi"}, headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+    
+    def test_unknown_broadcast(self, client, admin_headers):
+        """Test polling a broadcast that does not exist"""
+        response = client.get("/admin/notifications/broadcasts/999", headers=admin_headers)
+        
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,180 @@
+from datetime import date
+
+import pytest
+from fastapi import status
+
+from app.auth import create_access_token
+from app.conditional import etag_matches
+from app.models import User
+from app.services.data_versions import DataVersionCache
+
+
+WORKOUT = {
+    "workout_type": "Running",
+    "duration": 30,
+    "intensity": "moderate",
+    "calories_burned": 300
+}
+METRICS = {
+    "height": 175.0,
+    "weight": 70.0,
+    "age": 25,
+    "gender": "male",
+    "activity_level": "moderate"
+}
+DASHBOARD = ["/workouts?skip=0&limit=30", "/users/metrics", "/streaks", "/rewards", "/users/notifications"]
+
+
+@pytest.fixture
+def dashboard(client, auth_headers):
+    """A user with a workout, metrics and a reward"""
+    client.post("/workouts", json=WORKOUT, headers=auth_headers)
+    client.post("/users/metrics", json=METRICS, headers=auth_headers)
+    return auth_headers
+
+
+class TestConditionalGet:
+
+    @pytest.mark.parametrize("url", DASHBOARD)
+    def test_unchanged_reload_is_not_modified(self, client, sql_queries, dashboard, url):
+        """Test a matching If-None-Match is answered 304 without any SQL"""
+        etag = client.get(url, headers=dashboard).headers["ETag"]
+
+        sql_queries.clear()
+        response = client.get(url, headers={**dashboard, "If-None-Match": etag})
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+        assert response.headers["Cache-Control"] == "private, no-cache"
+        assert len(sql_queries) == 0
+
+    def test_version_is_read_once_after_a_write(self, client, sql_queries, dashboard):
+        """Test the first read after a write costs one version lookup, the next none"""
+        etag = client.get("/workouts", headers=dashboard).headers["ETag"]
+        client.post("/users/metrics", json={**METRICS, "weight": 71.0}, headers=dashboard)
+
+        sql_queries.clear()
+        response = client.get("/workouts", headers={**dashboard, "If-None-Match": etag})
+        assert response.status_code == status.HTTP_200_OK
+        assert len(sql_queries) == 2  # the version and the workouts
+
+        sql_queries.clear()
+        response = client.get("/workouts", headers={**dashboard, "If-None-Match": response.headers["ETag"]})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert len(sql_queries) == 0
+
+    def test_workout_write_changes_etag(self, client, dashboard):
+        """Test logging a workout invalidates every dashboard ETag"""
+        etags = {url: client.get(url, headers=dashboard).headers["ETag"] for url in DASHBOARD}
+
+        client.post("/workouts", json=WORKOUT, headers=dashboard)
+
+        for url, etag in etags.items():
+            response = client.get(url, headers={**dashboard, "If-None-Match": etag})
+            assert response.status_code == status.HTTP_200_OK, url
+            assert response.headers["ETag"] != etag
+        assert len(client.get("/workouts", headers=dashboard).json()) == 2
+
+    def test_metrics_write_changes_etag(self, client, dashboard):
+        """Test updating metrics serves the new metrics instead of a 304"""
+        etag = client.get("/users/metrics", headers=dashboard).headers["ETag"]
+
+        client.post("/users/metrics", json={**METRICS, "weight": 72.0}, headers=dashboard)
+        response = client.get("/users/metrics", headers={**dashboard, "If-None-Match": etag})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["weight"] == 72.0
+
+    def test_notification_writes_change_etag(self, client, admin_headers, test_user, dashboard):
+        """Test sending and reading notifications both change the ETag"""
+        etag = client.get("/users/notifications", headers=dashboard).headers["ETag"]
+
+        client.post("/admin/notifications", json={"user_id": test_user.id, "message": "Hi"}, headers=admin_headers)
+        response = client.get("/users/notifications", headers={**dashboard, "If-None-Match": etag})
+        assert response.status_code == status.HTTP_200_OK
+        assert [n["message"] for n in response.json()] == ["Hi"]
+
+        etag = response.headers["ETag"]
+        client.put("/users/notifications/read", json={}, headers=dashboard)
+        response = client.get("/users/notifications", headers={**dashboard, "If-None-Match": etag})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()[0]["is_read"] is True
+
+    def test_broadcast_changes_etag(self, client, admin_headers, dashboard):
+        """Test broadcast notifications bump every recipient's version"""
+        etag = client.get("/users/notifications", headers=dashboard).headers["ETag"]
+
+        client.post("/admin/notifications/broadcast", json={"message": "Hello all"}, headers=admin_headers)
+
+        response = client.get("/users/notifications", headers={**dashboard, "If-None-Match": etag})
+        assert response.status_code == status.HTTP_200_OK
+        assert [n["message"] for n in response.json()] == ["Hello all"]
+
+    def test_import_changes_etag(self, client, dashboard):
+        """Test workouts imported with Core inserts bump the version too"""
+        etag = client.get("/workouts", headers=dashboard).headers["ETag"]
+
+        client.post(
+            "/workouts/import",
+            content="workout_type,duration,intensity,calories_burned,notes,date\n"
+                    "Cycling,45,high,400,,2024-01-02T18:30:00\n",
+            headers={**dashboard, "Content-Type": "text/csv"}
+        )
+
+        response = client.get("/workouts", headers={**dashboard, "If-None-Match": etag})
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()) == 2
+
+    def test_etag_is_per_user(self, client, db_session, dashboard):
+        """Test another user's ETag never matches"""
+        etag = client.get("/workouts", headers=dashboard).headers["ETag"]
+        other = User(email="other@example.com", username="other", hashed_password="x")
+        db_session.add(other)
+        db_session.commit()
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': 'other'})}"}
+
+        response = client.get("/workouts", headers={**headers, "If-None-Match": etag})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == []
+
+    def test_streak_etag_includes_the_day(self, client, db_session, test_user, dashboard):
+        """Test the streak ETag changes with the date as well as the data"""
+        etag = client.get("/streaks", headers=dashboard).headers["ETag"]
+
+        db_session.refresh(test_user)
+        assert etag == f'"{test_user.id}.{test_user.data_version}.{date.today().isoformat()}"'
+        response = client.get("/streaks", headers={**dashboard, "If-None-Match": etag})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+class TestDataVersionCache:
+
+    def test_set_after_invalidation_is_ignored(self):
+        """Test a version read before a concurrent write's invalidation is not cached"""
+        cache = DataVersionCache()
+        version, invalidations = cache.get(1)
+        assert version is None
+
+        cache.invalidate_user(1)
+        cache.set(1, 3, invalidations)
+
+        assert cache.get(1)[0] is None
+        cache.set(1, 4, cache.get(1)[1])
+        assert cache.get(1)[0] == 4
+
+    def test_entries_expire(self):
+        """Test versions are re-read after the TTL"""
+        cache = DataVersionCache(ttl=0)
+        cache.set(1, 3, cache.get(1)[1])
+
+        assert cache.get(1)[0] is None
+
+    def test_if_none_match_parsing(self):
+        """Test lists, weak validators and * are matched"""
+        assert etag_matches('"1.2"', '"1.2"')
+        assert etag_matches('"0.1", W/"1.2"', '"1.2"')
+        assert etag_matches("*", '"1.2"')
+        assert not etag_matches('"1.3"', '"1.2"')
+        assert not etag_matches(None, '"1.2"')
@@ -0,0 +1,199 @@
+import threading
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+from fastapi import status
+
+from app.models import ActivityBitmap, User, Workout
+from app.services.engagement import (
+    CHUNK_BITS, engagement_series, popcount, rebuild_activity, record_bulk_workouts,
+    retention_cohorts, window_or
+)
+from tests.conftest import engine
+
+
+TODAY = date(2024, 3, 20)  # a Wednesday
+
+
+def add_users(db, count):
+    users = [
+        User(email=f"u{i}@example.com", username=f"u{i}", hashed_password="x", is_admin=False)
+        for i in range(count)
+    ]
+    db.add_all(users)
+    db.commit()
+    return users
+
+
+def log(db, user, day, hour=12):
+    workout = Workout(
+        user_id=user.id, workout_type="Running", duration=30, intensity="moderate",
+        calories_burned=300, date=datetime.combine(day, datetime.min.time()) + timedelta(hours=hour)
+    )
+    db.add(workout)
+    db.commit()
+    return workout
+
+
+def stored_bitmaps(db):
+    return {(row.day, row.chunk): row.bits for row in db.query(ActivityBitmap)}
+
+
+class TestWindowOr:
+
+    def test_matches_naive_window(self):
+        """Test the doubling window OR equals ORing each window directly"""
+        rng = np.random.default_rng(7)
+        matrix = rng.integers(0, 256, size=(60, 16), dtype=np.uint8)
+
+        for width in (1, 2, 7, 30):
+            expected = [np.bitwise_or.reduce(matrix[i:i + width], axis=0) for i in range(60 - width + 1)]
+            assert np.array_equal(window_or(matrix, width), np.array(expected))
+
+    def test_popcount_counts_bits_per_row(self):
+        """Test popcount counts set bits along the last axis"""
+        matrix = np.array([[0b1011, 0xFF], [0, 1]], dtype=np.uint8)
+
+        assert popcount(matrix).tolist() == [11, 1]
+
+
+class TestActivityBitmaps:
+
+    def test_incremental_writes_match_rebuild(self, db_session):
+        """Test inserts, moves and deletes keep the bitmaps equal to a rebuild"""
+        alice, bob = add_users(db_session, 2)
+        first = log(db_session, alice, TODAY)
+        log(db_session, alice, TODAY, hour=18)
+        moved = log(db_session, bob, TODAY)
+        lone = log(db_session, bob, TODAY - timedelta(days=1))
+
+        db_session.delete(first)
+        moved.date = moved.date - timedelta(days=2)
+        db_session.delete(lone)
+        db_session.commit()
+        incremental = stored_bitmaps(db_session)
+
+        rebuild_activity(db_session.connection(), batch_size=2)
+        db_session.commit()
+
+        assert stored_bitmaps(db_session) == incremental
+        assert set(incremental) == {(TODAY, 0), (TODAY - timedelta(days=2), 0)}
+
+    def test_large_user_ids_use_separate_chunks(self, db_session):
+        """Test user ids beyond one chunk land in their own bitmap row"""
+        user = User(id=CHUNK_BITS + 5, email="far@example.com", username="far", hashed_password="x")
+        db_session.add(user)
+        db_session.commit()
+        log(db_session, user, TODAY)
+
+        bitmaps = stored_bitmaps(db_session)
+        assert list(bitmaps) == [(TODAY, 1)]
+        assert bitmaps[(TODAY, 1)] == bytes([1 << 5])
+        assert engagement_series(db_session, 1, as_of=TODAY)[0]["dau"] == 1
+
+    def test_import_marks_days_active(self, client, auth_headers, db_session, test_user):
+        """Test bulk-imported workouts set the bits of their days"""
+        body = "workout_type,duration,intensity,calories_burned,date\n" \
+               "Running,30,moderate,300,2024-03-18T07:00:00\n" \
+               "Running,30,moderate,300,2024-03-20T07:00:00\n"
+        client.post("/workouts/import", content=body, headers={**auth_headers, "Content-Type": "text/csv"})
+
+        series = engagement_series(db_session, 3, as_of=TODAY)
+        assert [d["dau"] for d in series] == [1, 0, 1]
+
+
+    def test_concurrent_first_writes_keep_every_bit(self, db_session):
+        """Test transactions racing to create a day's bitmap row all keep their bit"""
+        users = add_users(db_session, 8)
+        barrier = threading.Barrier(len(users))
+        errors = []
+
+        def mark(user_id):
+            try:
+                with engine.begin() as conn:
+                    barrier.wait()
+                    record_bulk_workouts(conn, user_id, [{"date": datetime.combine(TODAY, datetime.min.time())}])
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=mark, args=(user.id,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert engagement_series(db_session, 1, as_of=TODAY)[0]["dau"] == len(users)
+
+
+class TestEngagementMetrics:
+
+    def test_dau_wau_mau_and_stickiness(self, db_session):
+        """Test daily, weekly and monthly actives over overlapping windows"""
+        a, b, c = add_users(db_session, 3)
+        log(db_session, a, TODAY)
+        log(db_session, a, TODAY - timedelta(days=1))
+        log(db_session, b, TODAY - timedelta(days=3))
+        log(db_session, c, TODAY - timedelta(days=20))
+        log(db_session, c, TODAY - timedelta(days=40))
+
+        today = engagement_series(db_session, 7, as_of=TODAY)[-1]
+
+        assert today == {"day": TODAY, "dau": 1, "wau": 2, "mau": 3, "stickiness": 0.3333}
+
+    def test_admins_are_excluded(self, db_session, admin_user):
+        """Test admin activity is masked out of the counts"""
+        log(db_session, admin_user, TODAY)
+
+        assert engagement_series(db_session, 1, as_of=TODAY)[0]["dau"] == 0
+
+    def test_retention_cohorts_by_first_week(self, db_session):
+        """Test users are grouped by the week of their first workout"""
+        a, b, c = add_users(db_session, 3)
+        monday = TODAY - timedelta(days=TODAY.weekday())
+        log(db_session, a, monday - timedelta(weeks=2))
+        log(db_session, a, monday - timedelta(weeks=1))
+        log(db_session, b, monday - timedelta(weeks=2, days=-1))
+        log(db_session, b, monday)
+        log(db_session, c, monday - timedelta(weeks=5))
+        log(db_session, c, monday - timedelta(weeks=1))
+
+        cohorts = retention_cohorts(db_session, 3, as_of=TODAY)
+
+        assert [c["week"] for c in cohorts] == [monday - timedelta(weeks=w) for w in (2, 1, 0)]
+        assert cohorts[0]["users"] == 2
+        assert cohorts[0]["retention"] == [1.0, 0.5, 0.5]
+        # c was first seen before the window, so it joins no cohort
+        assert cohorts[1]["users"] == 0
+        assert cohorts[2] == {"week": monday, "users": 0, "retention": [0.0]}
+
+
+class TestEngagementRoutes:
+
+    def test_engagement_endpoint(self, client, auth_headers, admin_headers):
+        """Test admins get one entry per requested day"""
+        client.post("/workouts", json={
+            "workout_type": "Running", "duration": 30, "intensity": "moderate", "calories_burned": 300
+        }, headers=auth_headers)
+
+        response = client.get("/admin/analytics/engagement?days=5", headers=admin_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert len(data) == 5
+        assert data[-1]["dau"] == 1
+        assert data[-1]["stickiness"] == 1.0
+
+    def test_retention_endpoint(self, client, admin_headers):
+        """Test admins get one cohort per requested week"""
+        response = client.get("/admin/analytics/retention?weeks=4", headers=admin_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()) == 4
+
+    def test_requires_admin(self, client, auth_headers):
+        """Test regular users cannot read engagement metrics"""
+        response = client.get("/admin/analytics/engagement", headers=auth_headers)
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
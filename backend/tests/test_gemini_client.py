@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+
+from app.services import gemini_client
+from app.services.gemini_client import FakeBackend, GeminiTimeoutError, generate_text, stream_text
+
+
+class SlowBackend:
+    """Backend that records how many calls overlap"""
+    
+    def __init__(self, latency):
+        self.latency = latency
+        self.in_flight = 0
+        self.peak = 0
+        self.cancelled = 0
+    
+    async def generate(self, prompt):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        return prompt
+    
+    async def stream(self, prompt):
+        self.in_flight += 1
+        try:
+            for word in prompt.split():
+                await asyncio.sleep(self.latency)
+                yield word
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture
+def backend():
+    """Swap in a test backend and restore the shared one afterwards"""
+    previous = gemini_client.get_backend()
+    yield lambda b: gemini_client.set_backend(b)
+    gemini_client.set_backend(previous)
+
+
+class TestGeminiClient:
+    
+    def test_fake_backend_is_deterministic(self, backend):
+        """Test the fake backend answers the same prompt the same way"""
+        backend(FakeBackend(latency=0))
+        
+        first = asyncio.run(generate_text("plan my week"))
+        second = asyncio.run(generate_text("plan my week"))
+        
+        assert first == second
+        assert first.startswith("[fake-gemini")
+    
+    def test_concurrent_calls_are_capped(self, backend, monkeypatch):
+        """Test in-flight upstream calls never exceed the concurrency limit"""
+        monkeypatch.setattr(gemini_client, "GEMINI_MAX_CONCURRENCY", 2)
+        slow = SlowBackend(latency=0.01)
+        backend(slow)
+        
+        async def burst():
+            return await asyncio.gather(*(generate_text(str(i)) for i in range(6)))
+        
+        assert asyncio.run(burst()) == [str(i) for i in range(6)]
+        assert slow.peak == 2
+    
+    def test_deadline_cancels_upstream_call(self, backend):
+        """Test an expired call raises GeminiTimeoutError and is cancelled"""
+        slow = SlowBackend(latency=1)
+        backend(slow)
+        
+        with pytest.raises(GeminiTimeoutError):
+            asyncio.run(generate_text("slow", timeout=0.01))
+        
+        assert slow.cancelled == 1
+    
+    def test_stream_yields_chunks(self, backend):
+        """Test streamed chunks arrive in order"""
+        backend(SlowBackend(latency=0))
+        
+        async def collect():
+            return [chunk async for chunk in stream_text("one two three")]
+        
+        assert asyncio.run(collect()) == ["one", "two", "three"]
+    
+    def test_closing_stream_stops_upstream(self, backend, monkeypatch):
+        """Test closing a stream early ends the upstream call and frees its slot"""
+        monkeypatch.setattr(gemini_client, "GEMINI_MAX_CONCURRENCY", 1)
+        slow = SlowBackend(latency=0)
+        backend(slow)
+        
+        async def read_one_then_close():
+            stream = stream_text("one two three")
+            first = await stream.__anext__()
+            await stream.aclose()
+            # The slot is free again, so a second stream can start
+            second = [chunk async for chunk in stream_text("four")]
+            return first, second
+        
+        assert asyncio.run(read_one_then_close()) == ("one", ["four"])
+        assert slow.in_flight == 0
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from fastapi import status
+
+from app.models import MetricsEntry
+from app.services import metrics_trends
+from app.services.metrics_trends import SECONDS_PER_DAY
+
+
+def days(*values):
+    return np.array(values, dtype=np.float64) * SECONDS_PER_DAY
+
+
+class TestTrendMath:
+    
+    def test_rolling_mean_uses_time_window(self):
+        """Test the rolling mean covers the window in time, not in points"""
+        times = days(0, 1, 2, 10)
+        values = np.array([80.0, 82.0, 84.0, 90.0])
+        
+        averages = metrics_trends.rolling_mean(times, values, 2)
+        
+        assert averages.tolist() == [80.0, 81.0, 82.0, 90.0]
+    
+    def test_slope_over_trailing_window(self):
+        """Test the rate of change is fitted to recent points only"""
+        times = days(0, 50, 60, 70)
+        values = np.array([100.0, 80.0, 79.0, 78.0])
+        
+        assert metrics_trends.slope_per_day(times, values, 30) == pytest.approx(-0.1)
+        assert metrics_trends.slope_per_day(days(5), np.array([80.0]), 30) is None
+    
+    def test_project_goal(self):
+        """Test goal dates are projected along the trend and only toward the goal"""
+        latest = (datetime(2024, 1, 1) - metrics_trends.EPOCH).total_seconds()
+        
+        assert metrics_trends.project_goal(latest, 80.0, -0.1, 75.0) == datetime(2024, 2, 20)
+        assert metrics_trends.project_goal(latest, 80.0, 0.1, 75.0) is None
+        assert metrics_trends.project_goal(latest, 80.0, None, 75.0) is None
+    
+    def test_downsample_caps_points(self):
+        """Test long series are averaged into at most max_points buckets"""
+        times = np.arange(10, dtype=np.float64)
+        values = np.arange(10, dtype=np.float64) * 2
+        
+        times, values = metrics_trends.downsample(4, times, values)
+        
+        assert len(times) == 4
+        assert values.tolist() == [2.0, 7.0, 12.0, 17.0]
+
+
+class TestMetricsHistory:
+    
+    def test_updates_are_recorded(self, client, auth_headers):
+        """Test every metrics update appends to the history"""
+        for weight in (80.0, 79.0):
+            client.post("/users/metrics", json={
+                "height": 180.0, "weight": weight, "age": 30,
+                "gender": "male", "activity_level": "moderate"
+            }, headers=auth_headers)
+        
+        response = client.get("/users/metrics/history", headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["count"] == 2
+        assert [p["value"] for p in data["points"]] == [80.0, 79.0]
+        assert data["latest"] == 79.0
+    
+    def test_trend_and_downsampling(self, client, db_session, auth_headers, test_user):
+        """Test the trend, goal projection and max_points of a long history"""
+        start = datetime.utcnow() - timedelta(days=99)
+        db_session.add_all([
+            MetricsEntry(user_id=test_user.id, recorded_at=start + timedelta(days=i), weight=90.0 - 0.1 * i)
+            for i in range(100)
+        ])
+        db_session.commit()
+        
+        response = client.get(
+            "/users/metrics/history?metric=weight&goal=75&max_points=10", headers=auth_headers
+        )
+        
+        data = response.json()
+        assert data["count"] == 100
+        assert len(data["points"]) == 10
+        assert data["rate_per_week"] == pytest.approx(-0.7)
+        assert data["projected_goal_date"] is not None
+    
+    def test_empty_history(self, client, auth_headers):
+        """Test a user without metrics gets an empty series"""
+        response = client.get("/users/metrics/history?metric=bmi", headers=auth_headers)
+        
+        assert response.json()["points"] == []
+        assert response.json()["rate_per_week"] is None
+    
+    def test_unknown_metric(self, client, auth_headers):
+        """Test only the recorded metrics can be requested"""
+        response = client.get("/users/metrics/history?metric=height", headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
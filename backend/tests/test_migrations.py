@@ -0,0 +1,107 @@
+import pytest
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.migrations import MIGRATIONS, current_version, run_migrations
+
+
+@pytest.fixture
+def legacy_engine():
+    """An in-memory database with the tables but none of the migrated indexes"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_workouts_user_id_date")
+        conn.exec_driver_sql("DROP INDEX ix_notifications_user_id_created_at")
+        conn.exec_driver_sql("DROP INDEX ix_rewards_user_id_earned_at")
+        conn.exec_driver_sql("DROP INDEX ix_notifications_user_id_unread")
+        for column in ("sets", "reps", "load_kg"):
+            conn.exec_driver_sql(f"ALTER TABLE workouts DROP COLUMN {column}")
+        conn.exec_driver_sql("DROP INDEX ux_rewards_user_id_code")
+        conn.exec_driver_sql("ALTER TABLE rewards DROP COLUMN code")
+        conn.exec_driver_sql("ALTER TABLE users DROP COLUMN data_version")
+        conn.exec_driver_sql("DROP INDEX ux_ai_jobs_user_id_dedupe_key_active")
+        for column in ("worker_id", "heartbeat_at"):
+            conn.exec_driver_sql(f"ALTER TABLE ai_jobs DROP COLUMN {column}")
+    yield engine
+    engine.dispose()
+
+
+def index_names(engine, table):
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+class TestMigrations:
+    
+    def test_versions_are_unique_and_ordered(self):
+        """Test registered migrations have strictly increasing versions"""
+        versions = [m.version for m in MIGRATIONS]
+        assert versions == sorted(set(versions))
+    
+    def test_run_migrations_adds_indexes(self, legacy_engine):
+        """Test pending migrations create the composite indexes"""
+        applied = run_migrations(legacy_engine)
+        
+        assert applied == [m.version for m in MIGRATIONS]
+        assert current_version(legacy_engine) == MIGRATIONS[-1].version
+        assert "ix_workouts_user_id_date" in index_names(legacy_engine, "workouts")
+        assert "ix_notifications_user_id_created_at" in index_names(legacy_engine, "notifications")
+        assert "ix_rewards_user_id_earned_at" in index_names(legacy_engine, "rewards")
+        assert "ix_notifications_user_id_unread" in index_names(legacy_engine, "notifications")
+        assert "ux_rewards_user_id_code" in index_names(legacy_engine, "rewards")
+        assert "ux_ai_jobs_user_id_dedupe_key_active" in index_names(legacy_engine, "ai_jobs")
+    
+    def test_run_migrations_is_idempotent(self, legacy_engine):
+        """Test applied migrations are not run again"""
+        run_migrations(legacy_engine)
+        
+        assert run_migrations(legacy_engine) == []
+    
+    def test_strength_columns_are_added_and_backfilled(self, legacy_engine):
+        """Test existing workouts get parsed set columns and personal records"""
+        with legacy_engine.begin() as conn:
+            conn.exec_driver_sql("INSERT INTO users (id, username, is_admin) VALUES (1, 'lifter', 0)")
+            conn.exec_driver_sql(
+                "INSERT INTO workouts (user_id, workout_type, notes, date) "
+                "VALUES (1, 'Squat', '5x5 @ 100kg', '2024-01-01 10:00:00')"
+            )
+        
+        run_migrations(legacy_engine)
+        
+        with legacy_engine.connect() as conn:
+            assert conn.exec_driver_sql("SELECT sets, reps, load_kg FROM workouts").one() == (5, 5, 100.0)
+            assert conn.exec_driver_sql(
+                "SELECT exercise, weight, reps FROM personal_records WHERE user_id = 1"
+            ).one() == ("Squat", 100.0, 5)
+    
+    def test_data_version_column_is_added(self, legacy_engine):
+        """Test existing users start at data version 0"""
+        with legacy_engine.begin() as conn:
+            conn.exec_driver_sql("INSERT INTO users (id, username, is_admin) VALUES (1, 'lifter', 0)")
+        
+        run_migrations(legacy_engine)
+        
+        with legacy_engine.connect() as conn:
+            assert conn.exec_driver_sql("SELECT data_version FROM users").scalar() == 0
+    
+    def test_duplicate_active_ai_jobs_are_failed(self, legacy_engine):
+        """Test only the oldest of duplicate active jobs stays active"""
+        with legacy_engine.begin() as conn:
+            conn.exec_driver_sql("INSERT INTO users (id, username, is_admin) VALUES (1, 'lifter', 0)")
+            for job_id, created_at in (("a", "2024-01-01 10:00:00"), ("b", "2024-01-01 10:00:01")):
+                conn.exec_driver_sql(
+                    "INSERT INTO ai_jobs (id, user_id, dedupe_key, status, created_at) "
+                    f"VALUES ('{job_id}', 1, 'same', 'pending', '{created_at}')"
+                )
+        
+        run_migrations(legacy_engine)
+        
+        with legacy_engine.connect() as conn:
+            assert conn.exec_driver_sql("SELECT id, status FROM ai_jobs ORDER BY id").all() == [
+                ("a", "pending"), ("b", "failed")
+            ]
@@ -0,0 +1,117 @@
+import pytest
+from fastapi import status
+from unittest.mock import patch
+
+from app.auth import principal_cache
+from app.models import User
+from app.services.principal_cache import PrincipalCache
+
+
+def principal(username="alice"):
+    return {"id": 1, "username": username, "is_admin": False}
+
+
+class TestPrincipalCache:
+
+    def test_hit_and_miss_counters(self):
+        """Test lookups are counted as hits and misses"""
+        cache = PrincipalCache(maxsize=4, ttl=60)
+
+        assert cache.get("token") is None
+        cache.set("token", principal())
+        assert cache.get("token")["username"] == "alice"
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test the cache stays within maxsize by evicting the oldest entry"""
+        cache = PrincipalCache(maxsize=2, ttl=60)
+        cache.set("a", principal("a"))
+        cache.set("b", principal("b"))
+        cache.get("a")
+        cache.set("c", principal("c"))
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_entry_expires_with_token(self):
+        """Test an entry is not served past the token's own expiry"""
+        cache = PrincipalCache(maxsize=4, ttl=60)
+        cache.set("token", principal(), token_exp=0)
+
+        assert cache.get("token") is None
+
+    def test_invalidate_user_drops_all_tokens(self):
+        """Test invalidating a user removes every token cached for them"""
+        cache = PrincipalCache(maxsize=4, ttl=60)
+        cache.set("t1", principal("alice"))
+        cache.set("t2", principal("alice"))
+        cache.set("t3", principal("bob"))
+
+        cache.invalidate_user("alice")
+
+        assert cache.get("t1") is None
+        assert cache.get("t2") is None
+        assert cache.get("t3") is not None
+
+
+class TestCurrentUserCaching:
+
+    def test_repeated_requests_skip_decode(self, client, auth_headers):
+        """Test a cached token is not decoded again"""
+        client.get("/auth/me", headers=auth_headers)
+
+        with patch("app.auth.jwt.decode") as mock_decode:
+            response = client.get("/auth/me", headers=auth_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["username"] == "testuser"
+        mock_decode.assert_not_called()
+
+    def test_deleted_user_is_rejected(self, client, auth_headers, admin_headers, test_user):
+        """Test deleting a user invalidates their cached principal"""
+        assert client.get("/auth/me", headers=auth_headers).status_code == status.HTTP_200_OK
+
+        client.delete(f"/admin/users/{test_user.id}", headers=admin_headers)
+        response = client.get("/auth/me", headers=auth_headers)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_admin_flag_change_is_picked_up(self, client, db_session, auth_headers, test_user):
+        """Test changing the admin flag invalidates the cached principal"""
+        assert client.get("/admin/users", headers=auth_headers).status_code == status.HTTP_403_FORBIDDEN
+
+        user = db_session.query(User).filter(User.id == test_user.id).first()
+        user.is_admin = True
+        db_session.commit()
+
+        assert client.get("/admin/users", headers=auth_headers).status_code == status.HTTP_200_OK
+
+    def test_invalidation_waits_for_commit(self, db_session, test_user):
+        """Test a flushed change keeps the principal cached until it commits"""
+        principal_cache.set("token", principal(test_user.username))
+        user = db_session.query(User).filter(User.id == test_user.id).first()
+        user.is_admin = True
+        db_session.flush()
+        assert principal_cache.get("token") is not None
+
+        db_session.rollback()
+        assert principal_cache.get("token") is not None
+
+        user.is_admin = True
+        db_session.commit()
+        assert principal_cache.get("token") is None
+
+    def test_cache_stats_endpoint(self, client, admin_headers):
+        """Test admins can read the principal cache counters"""
+        client.get("/auth/me", headers=admin_headers)
+        response = client.get("/admin/auth-cache", headers=admin_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["hits"] >= 1
+        assert "hit_rate" in data
@@ -0,0 +1,133 @@
+"""
+Query budget suite
+
+Each endpoint is called with a logged-in user and may issue at most the
+listed number of SQL statements. Listing endpoints are checked again with
+many rows, so a relationship loaded per row (an N+1) fails here instead of
+in production. Lower a budget when an endpoint gets cheaper.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.auth import get_password_hash
+from app.models import User, Workout
+
+WORKOUT = {
+    "workout_type": "Bench Press",
+    "duration": 45,
+    "intensity": "high",
+    "calories_burned": 250,
+    "notes": "3x10 @ 60kg"
+}
+METRICS = {
+    "height": 175.0,
+    "weight": 70.0,
+    "age": 25,
+    "gender": "male",
+    "activity_level": "moderate"
+}
+
+
+@pytest.fixture
+def seeded(client, auth_headers, admin_headers, test_user):
+    """A user with workouts, metrics and a notification"""
+    for _ in range(3):
+        client.post("/workouts", json=WORKOUT, headers=auth_headers)
+    client.post("/users/metrics", json=METRICS, headers=auth_headers)
+    client.post("/admin/notifications", json={
+        "user_id": test_user.id,
+        "message": "Hello"
+    }, headers=admin_headers)
+    return test_user
+
+
+def add_history(db, user, workouts):
+    db.add_all(
+        Workout(user_id=user.id, workout_type="Running", duration=30, intensity="moderate",
+                calories_burned=200, date=datetime.utcnow() - timedelta(hours=i))
+        for i in range(workouts)
+    )
+    db.commit()
+
+
+class TestUserQueryBudgets:
+    
+    # Endpoints with an ETag also look up the user's data version, which
+    # the writes in `seeded` have just dropped from the cache
+    @pytest.mark.parametrize("url, budget", [
+        ("/auth/me", 0),
+        ("/users/metrics", 2),
+        ("/users/metrics/history?days=30", 1),
+        ("/users/notifications", 2),
+        ("/users/notifications/unread-count", 1),
+        ("/workouts", 2),
+        ("/workouts/today", 1),
+        ("/streaks", 2),
+        ("/prs", 1),
+        ("/rewards", 2),
+        ("/ai/progress-analysis?days=30", 1),
+    ])
+    def test_reads(self, assert_query_budget, auth_headers, seeded, url, budget):
+        """Test user read endpoints stay within their query budgets"""
+        assert_query_budget("GET", url, budget, headers=auth_headers)
+    
+    def test_writes(self, assert_query_budget, auth_headers, seeded):
+        """Test user write endpoints stay within their query budgets"""
+        # Insert, derived tables (records, rollups, activity upsert and update,
+        # streak, rewards), the data version bump and the refresh
+        assert_query_budget("POST", "/workouts", 13, json=WORKOUT, headers=auth_headers)
+        assert_query_budget("POST", "/users/metrics", 5, json={**METRICS, "weight": 71.0}, headers=auth_headers)
+        assert_query_budget("PUT", "/users/notifications/read", 3, json={}, headers=auth_headers)
+    
+    @pytest.mark.parametrize("url, budget", [
+        ("/workouts", 2), ("/workouts?limit=100", 2), ("/prs", 1), ("/rewards", 2), ("/workouts/today", 1)
+    ])
+    def test_listings_do_not_grow_with_rows(self, assert_query_budget, db_session, auth_headers, seeded, url, budget):
+        """Test listing endpoints issue one row query however many rows they return"""
+        add_history(db_session, seeded, 50)
+        
+        assert_query_budget("GET", url, budget, headers=auth_headers)
+
+
+class TestAdminQueryBudgets:
+    
+    def test_user_stats(self, assert_query_budget, admin_headers, seeded):
+        """Test user stats reads the user and one aggregate over their workouts"""
+        assert_query_budget("GET", f"/admin/users/{seeded.id}/stats", 2, headers=admin_headers)
+    
+    @pytest.mark.parametrize("url, budget", [
+        ("/admin/users/{user_id}/workouts", 1),
+        ("/admin/analytics/engagement", 3),
+        ("/admin/analytics/retention", 4),
+    ])
+    def test_reads(self, assert_query_budget, admin_headers, seeded, url, budget):
+        """Test admin read endpoints stay within their query budgets"""
+        assert_query_budget("GET", url.format(user_id=seeded.id), budget, headers=admin_headers)
+    
+    def test_analytics_after_rebuild(self, client, assert_query_budget, admin_headers, seeded):
+        """Test analytics read the rollups once they have been built"""
+        client.post("/admin/analytics/rebuild", headers=admin_headers)
+        
+        assert_query_budget("GET", "/admin/analytics", 1, headers=admin_headers)
+        assert_query_budget("GET", "/admin/analytics/daily", 2, headers=admin_headers)
+    
+    def test_user_listing_does_not_grow_with_rows(self, assert_query_budget, db_session, admin_headers, seeded):
+        """Test listing users does not load each user's relationships"""
+        hashed = get_password_hash("password123")
+        db_session.add_all(
+            User(email=f"user{i}@example.com", username=f"user{i}", hashed_password=hashed)
+            for i in range(30)
+        )
+        db_session.commit()
+        add_history(db_session, seeded, 20)
+        
+        assert_query_budget("GET", "/admin/users", 1, headers=admin_headers)
+        assert_query_budget("GET", f"/admin/users/{seeded.id}/workouts", 1, headers=admin_headers)
+    
+    def test_notification(self, assert_query_budget, admin_headers, seeded):
+        """Test sending a notification checks the recipient, inserts once and bumps their version"""
+        assert_query_budget(
+            "POST", "/admin/notifications", 3,
+            json={"user_id": seeded.id, "message": "Hi"}, headers=admin_headers
+        )
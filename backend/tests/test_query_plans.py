@@ -0,0 +1,145 @@
+"""
+Query plan regression suite
+
+Every SELECT issued while serving a request is captured and run through
+EXPLAIN QUERY PLAN. A plan step that scans a whole table fails the test
+unless the endpoint is listed as needing that scan.
+"""
+import pytest
+from unittest.mock import patch
+
+from app.auth import principal_cache
+from app.database import Base
+from tests.conftest import engine
+
+
+def full_scans(statement, parameters):
+    """Return the tables a statement reads with a full table scan"""
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+
+    scans = []
+    for row in plan:
+        detail = row[-1]
+        # Scans of subqueries and constant rows are not table scans
+        if detail.startswith("SCAN ") and detail.split()[1] in Base.metadata.tables:
+            scans.append(detail.split()[1])
+    return scans
+
+
+def assert_indexed(sql_queries, client, method, url, allowed_scans=(), **kwargs):
+    """Call an endpoint and fail if any of its queries scans a table outside allowed_scans"""
+    # Plan the principal lookup too instead of serving it from the cache
+    principal_cache.clear()
+    sql_queries.clear()
+    response = client.request(method, url, **kwargs)
+    assert response.status_code < 500, response.text
+    assert sql_queries.selects(), f"{method} {url} issued no queries"
+
+    for statement, parameters in sql_queries.selects():
+        unexpected = [t for t in full_scans(statement, parameters) if t not in allowed_scans]
+        assert not unexpected, f"{method} {url} scans {unexpected}:\n{statement}"
+
+
+WORKOUT = {
+    "workout_type": "Running",
+    "duration": 30,
+    "intensity": "moderate",
+    "calories_burned": 300,
+    "notes": "3x10 @ 60kg"
+}
+
+
+@pytest.fixture
+def seeded(client, auth_headers, admin_headers, test_user):
+    """A user with workouts, metrics and a notification"""
+    for _ in range(3):
+        client.post("/workouts", json=WORKOUT, headers=auth_headers)
+    client.post("/users/metrics", json={
+        "height": 175.0,
+        "weight": 70.0,
+        "age": 25,
+        "gender": "male",
+        "activity_level": "moderate"
+    }, headers=auth_headers)
+    client.post("/admin/notifications", json={
+        "user_id": test_user.id,
+        "message": "Hello"
+    }, headers=admin_headers)
+    return test_user
+
+
+class TestUserQueryPlans:
+    
+    def test_workout_routes(self, sql_queries, client, auth_headers, seeded):
+        """Test workout endpoints use indexed access paths"""
+        workout_id = client.get("/workouts", headers=auth_headers).json()[0]["id"]
+        
+        assert_indexed(sql_queries, client, "GET", "/workouts", headers=auth_headers)
+        cursor = client.get("/workouts?limit=1", headers=auth_headers).headers["X-Next-Cursor"]
+        assert_indexed(sql_queries, client, "GET", f"/workouts?limit=1&cursor={cursor}", headers=auth_headers)
+        assert_indexed(sql_queries, client, "GET", "/workouts/today", headers=auth_headers)
+        assert_indexed(sql_queries, client, "GET", "/streaks", headers=auth_headers)
+        assert_indexed(sql_queries, client, "GET", "/rewards", headers=auth_headers)
+        assert_indexed(sql_queries, client, "GET", "/prs", headers=auth_headers)
+        assert_indexed(sql_queries, client, "POST", "/workouts", json=WORKOUT, headers=auth_headers)
+        assert_indexed(sql_queries, client, "POST", "/workouts", json={**WORKOUT, "notes": "3x10 @ 60kg"}, headers=auth_headers)
+        assert_indexed(sql_queries, client, "PUT", f"/workouts/{workout_id}", json=WORKOUT, headers=auth_headers)
+        assert_indexed(sql_queries, client, "DELETE", f"/workouts/{workout_id}", headers=auth_headers)
+        record_id = client.get("/prs", headers=auth_headers).json()[0]["workout_id"]
+        assert_indexed(sql_queries, client, "DELETE", f"/workouts/{record_id}", headers=auth_headers)
+    
+    def test_user_routes(self, sql_queries, client, auth_headers, seeded):
+        """Test metrics and notification endpoints use indexed access paths"""
+        notification_id = client.get("/users/notifications", headers=auth_headers).json()[0]["id"]
+        
+        assert_indexed(sql_queries, client, "GET", "/users/metrics", headers=auth_headers)
+        assert_indexed(sql_queries, client, "GET", "/users/metrics/history?days=30", headers=auth_headers)
+        assert_indexed(sql_queries, client, "GET", "/users/notifications", headers=auth_headers)
+        assert_indexed(sql_queries, client, "GET", "/users/notifications?unread_only=true", headers=auth_headers)
+        assert_indexed(sql_queries, client, "GET", "/users/notifications/unread-count", headers=auth_headers)
+        assert_indexed(
+            sql_queries, client, "PUT", "/users/notifications/read", json={}, headers=auth_headers
+        )
+        assert_indexed(
+            sql_queries, client, "PUT", f"/users/notifications/{notification_id}/read",
+            headers=auth_headers
+        )
+        assert_indexed(sql_queries, client, "GET", "/auth/me", headers=auth_headers)
+    
+    @patch('app.routers.ai_routes.generate_text')
+    def test_ai_routes(self, mock_generate, sql_queries, client, auth_headers, seeded):
+        """Test AI endpoints use indexed access paths"""
+        mock_generate.return_value = "Plan"
+        
+        assert_indexed(
+            sql_queries, client, "POST", "/ai/recommendations",
+            json={"prompt": ""}, headers=auth_headers
+        )
+        assert_indexed(sql_queries, client, "GET", "/ai/progress-analysis?days=30", headers=auth_headers)
+        
+        job_id = client.post("/ai/jobs", json={"prompt": "Hi"}, headers=auth_headers).json()["job_id"]
+        assert_indexed(sql_queries, client, "POST", "/ai/jobs", json={"prompt": "Hi"}, headers=auth_headers)
+        assert_indexed(sql_queries, client, "GET", f"/ai/jobs/{job_id}", headers=auth_headers)
+
+
+class TestAdminQueryPlans:
+    
+    def test_admin_user_routes(self, sql_queries, client, admin_headers, seeded):
+        """Test admin per-user endpoints use indexed access paths"""
+        assert_indexed(sql_queries, client, "GET", f"/admin/users/{seeded.id}/workouts", headers=admin_headers)
+        assert_indexed(sql_queries, client, "GET", f"/admin/users/{seeded.id}/stats", headers=admin_headers)
+        assert_indexed(
+            sql_queries, client, "POST", "/admin/notifications",
+            json={"user_id": seeded.id, "message": "Hi"}, headers=admin_headers
+        )
+        assert_indexed(sql_queries, client, "DELETE", f"/admin/users/{seeded.id}", headers=admin_headers)
+    
+    def test_admin_listing_routes(self, sql_queries, client, admin_headers, seeded):
+        """Test platform-wide admin endpoints only scan the tables they list"""
+        # Listing every user is inherently a scan of users
+        assert_indexed(sql_queries, client, "GET", "/admin/users", allowed_scans=("users",), headers=admin_headers)
+        # Analytics reads the rollups once they have been built
+        client.post("/admin/analytics/rebuild", headers=admin_headers)
+        assert_indexed(sql_queries, client, "GET", "/admin/analytics", headers=admin_headers)
+        assert_indexed(sql_queries, client, "GET", "/admin/analytics/daily", headers=admin_headers)
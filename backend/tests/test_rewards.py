@@ -0,0 +1,156 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi import status
+
+from app.models import Reward, RewardProgress, Workout
+from app.services import rewards
+from app.services.rewards import WorkoutEvent, advance, empty_counters, evaluate, replay_rewards
+from app.services.strength import parse_sets
+
+
+MONDAY = date(2024, 3, 4)
+
+
+def event(day, minutes=30, volume=0.0, is_pr=False):
+    return WorkoutEvent(day=day, minutes=minutes, volume=volume, is_pr=is_pr,
+                        when=datetime.combine(day, datetime.min.time()))
+
+
+def fold(events):
+    counters, codes = empty_counters(), []
+    for e in events:
+        after = advance(counters, e)
+        codes.extend(r["code"] for r in evaluate(counters, after, e))
+        counters = after
+    return counters, codes
+
+
+def log(db, user, day, duration=30, notes=None, workout_type="Running"):
+    db.add(Workout(
+        user_id=user.id, workout_type=workout_type, duration=duration, intensity="moderate",
+        calories_burned=200, notes=notes, date=datetime.combine(day, datetime.min.time()),
+        **parse_sets(notes)
+    ))
+    db.commit()
+
+
+def reward_codes(db, user):
+    db.expire_all()
+    return sorted(r.code for r in db.query(Reward).filter(Reward.user_id == user.id))
+
+
+class TestRules:
+
+    def test_workout_and_streak_milestones(self):
+        """Test count and consecutive-day milestones fire once when reached"""
+        counters, codes = fold(event(MONDAY + timedelta(days=i)) for i in range(3))
+
+        assert codes == ["workouts:1", "streak:3"]
+        assert (counters["workouts"], counters["day_run"]) == (3, 3)
+
+    def test_second_workout_same_day_keeps_run(self):
+        """Test extra workouts on one day do not extend the streak"""
+        counters, codes = fold([event(MONDAY), event(MONDAY), event(MONDAY + timedelta(days=2))])
+
+        assert counters["day_run"] == 1
+        assert codes == ["workouts:1"]
+
+    def test_weekly_minutes_reset_each_week(self):
+        """Test the weekly goal is awarded once per week and the total restarts on Monday"""
+        counters, codes = fold([
+            event(MONDAY, minutes=100), event(MONDAY + timedelta(days=1), minutes=60),
+            event(MONDAY + timedelta(days=2), minutes=60),
+            event(MONDAY + timedelta(days=7), minutes=100),
+        ])
+
+        assert [c for c in codes if c.startswith("weekly")] == ["weekly_minutes:2024-03-04"]
+        assert counters["week_start"] == MONDAY + timedelta(days=7)
+        assert counters["week_minutes"] == 100
+
+    def test_weekly_volume_and_prs(self):
+        """Test lifted volume and personal records count towards their rules"""
+        _, codes = fold([event(MONDAY, volume=6000.0, is_pr=True), event(MONDAY, volume=4000.0)])
+
+        assert "weekly_volume:2024-03-04" in codes
+        assert "prs:1" in codes
+
+    def test_duplicate_rule_names_are_rejected(self):
+        """Test the registry refuses two rules with the same name"""
+        with pytest.raises(ValueError):
+            rewards.reward_rule(rewards.RULES[0].check)
+
+
+class TestRewardsEngine:
+
+    def test_logging_a_workout_awards_first_reward(self, client, auth_headers):
+        """Test create_workout feeds the engine and /rewards lists the result"""
+        client.post("/workouts", json={
+            "workout_type": "Bench Press", "duration": 45, "intensity": "high",
+            "calories_burned": 250, "notes": "3x10 @ 60kg"
+        }, headers=auth_headers)
+
+        response = client.get("/rewards", headers=auth_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert sorted(r["title"] for r in response.json()) == ["🏆 1 Personal Record", "🏋️ 1 Workout"]
+
+    def test_live_events_match_replay(self, client, db_session, auth_headers, test_user):
+        """Test counters and rewards built event by event equal a replay from history"""
+        for notes in ("3x10 @ 60kg", "3x10 @ 60kg", "3x8 @ 80kg", None):
+            client.post("/workouts", json={
+                "workout_type": "Bench Press", "duration": 80, "intensity": "high",
+                "calories_burned": 250, "notes": notes
+            }, headers=auth_headers)
+        live_codes = reward_codes(db_session, test_user)
+        live = db_session.get(RewardProgress, test_user.id)
+        live_counters = (live.workouts, live.prs, live.day_run, live.week_minutes, live.week_volume)
+
+        db_session.query(Reward).delete()
+        db_session.query(RewardProgress).delete()
+        db_session.commit()
+        replay_rewards(db_session.connection())
+        db_session.commit()
+
+        replayed = db_session.get(RewardProgress, test_user.id)
+        assert reward_codes(db_session, test_user) == live_codes
+        assert (replayed.workouts, replayed.prs, replayed.day_run,
+                replayed.week_minutes, replayed.week_volume) == live_counters
+        assert live_counters == (4, 2, 1, 320, 5520.0)
+
+    def test_replay_is_idempotent(self, db_session, test_user):
+        """Test replaying history twice awards nothing new"""
+        for i in range(7):
+            log(db_session, test_user, MONDAY + timedelta(days=i))
+
+        first = replay_rewards(db_session.connection(), batch_size=1)
+        second = replay_rewards(db_session.connection())
+        db_session.commit()
+
+        assert first["rewards"] == 4
+        assert second["rewards"] == 0
+        assert reward_codes(db_session, test_user) == [
+            "streak:3", "streak:7", "weekly_minutes:2024-03-04", "workouts:1"
+        ]
+
+    def test_repeated_milestone_is_awarded_once(self, db_session, test_user):
+        """Test reaching a streak milestone again after a break does not duplicate it"""
+        for day in (0, 1, 2, 5, 6, 7):
+            log(db_session, test_user, MONDAY + timedelta(days=day))
+
+        replay_rewards(db_session.connection())
+        db_session.commit()
+
+        assert reward_codes(db_session, test_user).count("streak:3") == 1
+
+    def test_first_live_event_replays_existing_history(self, client, db_session, auth_headers, test_user):
+        """Test a user with history but no counters is replayed on their next workout"""
+        for i in range(9):
+            log(db_session, test_user, MONDAY + timedelta(days=i))
+
+        client.post("/workouts", json={
+            "workout_type": "Running", "duration": 30, "intensity": "moderate", "calories_burned": 200
+        }, headers=auth_headers)
+
+        assert "workouts:10" in reward_codes(db_session, test_user)
+        assert db_session.get(RewardProgress, test_user.id).workouts == 10
@@ -0,0 +1,97 @@
+import pytest
+import random
+from datetime import date, datetime, timedelta
+
+from app.models import Workout
+from app.services import streaks
+
+
+def add_workout(db, user_id, day):
+    """Insert a workout on the given day and feed it to the streak state"""
+    workout = Workout(
+        user_id=user_id,
+        workout_type="Running",
+        duration=30,
+        intensity="moderate",
+        calories_burned=300,
+        date=datetime.combine(day, datetime.min.time()) + timedelta(hours=7)
+    )
+    db.add(workout)
+    db.flush()
+    streaks.record_workout_day(db, user_id, day)
+    db.commit()
+    return workout
+
+
+def delete_workout(db, workout):
+    """Delete a workout and update the streak state"""
+    user_id = workout.user_id
+    workout_day = workout.date.date()
+    db.delete(workout)
+    db.flush()
+    streaks.remove_workout_day(db, user_id, workout_day)
+    db.commit()
+
+
+class TestComputeStreaks:
+
+    def test_no_workouts(self):
+        """Test streaks with no workout days"""
+        assert streaks.compute_streaks([]) == {"current_streak": 0, "longest_streak": 0}
+
+    def test_current_streak_requires_today(self):
+        """Test current streak is zero when the last workout was not today"""
+        today = date(2024, 5, 10)
+        days = [today - timedelta(days=i) for i in range(1, 4)]
+
+        result = streaks.compute_streaks(days, today)
+
+        assert result == {"current_streak": 0, "longest_streak": 3}
+
+
+class TestStreakState:
+
+    def test_incremental_matches_scan(self, db_session, test_user):
+        """Test incremental updates agree with the full-history scan"""
+        today = date.today()
+        rng = random.Random(7)
+        days = sorted(today - timedelta(days=rng.randint(0, 40)) for _ in range(60))
+
+        workouts = [add_workout(db_session, test_user.id, day) for day in days]
+        assert streaks.check_streak_consistency(db_session, test_user.id)["consistent"]
+
+        rng.shuffle(workouts)
+        for workout in workouts[:45]:
+            delete_workout(db_session, workout)
+            result = streaks.check_streak_consistency(db_session, test_user.id)
+            assert result["consistent"], result
+
+    def test_out_of_order_day_rebuilds(self, db_session, test_user):
+        """Test a workout before the last active day joins earlier runs"""
+        today = date.today()
+        add_workout(db_session, test_user.id, today - timedelta(days=2))
+        add_workout(db_session, test_user.id, today)
+        add_workout(db_session, test_user.id, today - timedelta(days=1))
+
+        state = streaks.get_streak_state(db_session, test_user.id)
+
+        assert streaks.streak_response(state) == {"current_streak": 3, "longest_streak": 3}
+
+    def test_state_built_for_existing_history(self, db_session, test_user):
+        """Test the state is rebuilt lazily for users without one"""
+        today = date.today()
+        for offset in range(3):
+            db_session.add(Workout(
+                user_id=test_user.id,
+                workout_type="Yoga",
+                duration=20,
+                intensity="low",
+                calories_burned=80,
+                date=datetime.combine(today - timedelta(days=offset), datetime.min.time())
+            ))
+        db_session.commit()
+
+        result = streaks.check_streak_consistency(db_session, test_user.id)
+
+        assert result["consistent"]
+        assert result["stored"] == {"current_streak": 3, "longest_streak": 3}
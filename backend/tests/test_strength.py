@@ -0,0 +1,113 @@
+import pytest
+from fastapi import status
+
+from app.models import PersonalRecord, Workout
+from app.services.strength import backfill_strength, parse_sets
+
+
+def lift(notes, workout_type="Bench Press"):
+    return {
+        "workout_type": workout_type,
+        "duration": 45,
+        "intensity": "high",
+        "calories_burned": 250,
+        "notes": notes
+    }
+
+
+def records(db):
+    db.expire_all()
+    return {
+        r.exercise: (r.weight, r.reps, r.volume, r.max_weight, r.workout_id)
+        for r in db.query(PersonalRecord)
+    }
+
+
+class TestParseSets:
+
+    @pytest.mark.parametrize("notes, expected", [
+        ("3x10 @ 60kg", (3, 10, 60.0)),
+        ("Felt strong: 5 × 5 @ 102,5 kgs", (5, 5, 102.5)),
+        ("4X8@135lbs", (4, 8, 61.23)),
+        ("3x12 bodyweight", (3, 12, None)),
+        ("easy 5k run", (None, None, None)),
+        (None, (None, None, None)),
+    ])
+    def test_formats(self, notes, expected):
+        """Test set descriptions are parsed with kg defaults and pound conversion"""
+        parsed = parse_sets(notes)
+
+        assert (parsed["sets"], parsed["reps"], parsed["load_kg"]) == expected
+
+
+class TestPersonalRecords:
+
+    def test_create_workout_stores_parsed_sets(self, client, auth_headers):
+        """Test logging a workout fills the structured set columns"""
+        response = client.post("/workouts", json=lift("3x10 @ 60kg"), headers=auth_headers)
+
+        data = response.json()
+        assert (data["sets"], data["reps"], data["load_kg"]) == (3, 10, 60.0)
+
+    def test_prs_endpoint_reads_best_set_per_exercise(self, client, auth_headers):
+        """Test /prs returns the highest reps x load set and the heaviest load"""
+        client.post("/workouts", json=lift("3x10 @ 60kg"), headers=auth_headers)
+        best = client.post("/workouts", json=lift("3x8 @ 80kg"), headers=auth_headers).json()
+        client.post("/workouts", json=lift("1x1 @ 100kg"), headers=auth_headers)
+        client.post("/workouts", json=lift("3x12", "Pull Up"), headers=auth_headers)
+        client.post("/workouts", json=lift(None, "Running"), headers=auth_headers)
+
+        response = client.get("/prs", headers=auth_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        prs = {p["exercise"]: p for p in response.json()}
+        assert list(prs) == ["Bench Press", "Pull Up"]
+        assert prs["Bench Press"]["volume"] == 640.0
+        assert prs["Bench Press"]["workout_id"] == best["id"]
+        assert prs["Bench Press"]["max_weight"] == 100.0
+        assert (prs["Pull Up"]["reps"], prs["Pull Up"]["weight"]) == (12, 0.0)
+
+    def test_edits_and_deletes_keep_records_exact(self, client, db_session, auth_headers, test_user):
+        """Test editing and deleting record-holding workouts matches a full rebuild"""
+        ids = [
+            client.post("/workouts", json=lift(notes), headers=auth_headers).json()["id"]
+            for notes in ("3x10 @ 60kg", "3x8 @ 80kg", "1x1 @ 100kg")
+        ]
+        client.put(f"/workouts/{ids[1]}", json=lift("3x8 @ 50kg"), headers=auth_headers)
+        client.delete(f"/workouts/{ids[2]}", headers=auth_headers)
+        client.put(f"/workouts/{ids[0]}", json=lift("3x10 @ 60kg", "Incline Press"), headers=auth_headers)
+
+        incremental = records(db_session)
+        backfill_strength(db_session.connection())
+        db_session.commit()
+
+        assert records(db_session) == incremental
+        assert incremental == {
+            "Bench Press": (50.0, 8, 400.0, 50.0, ids[1]),
+            "Incline Press": (60.0, 10, 600.0, 60.0, ids[0]),
+        }
+
+    def test_import_updates_records(self, client, auth_headers):
+        """Test bulk-imported workouts are parsed and counted towards records"""
+        body = "workout_type,duration,intensity,calories_burned,notes\n" \
+               "Squat,40,high,300,5x5 @ 100kg\n" \
+               "Squat,40,high,300,3x3 @ 120kg\n"
+        client.post("/workouts/import", content=body, headers={**auth_headers, "Content-Type": "text/csv"})
+
+        prs = client.get("/prs", headers=auth_headers).json()
+
+        assert [(p["exercise"], p["weight"], p["max_weight"]) for p in prs] == [("Squat", 100.0, 120.0)]
+
+    def test_backfill_parses_existing_rows(self, db_session, test_user):
+        """Test the backfill job fills set columns of rows written before parsing existed"""
+        db_session.execute(Workout.__table__.insert(), [
+            {"user_id": test_user.id, "workout_type": "Deadlift", "notes": "2x5 @ 140kg"},
+            {"user_id": test_user.id, "workout_type": "Deadlift", "notes": "recovery walk"},
+        ])
+        db_session.commit()
+
+        report = backfill_strength(db_session.connection(), chunk_size=1)
+        db_session.commit()
+
+        assert (report["workouts"], report["parsed"], report["updated"], report["records"]) == (2, 1, 1, 1)
+        assert records(db_session)["Deadlift"][:2] == (140.0, 5)
@@ -0,0 +1,104 @@
+import asyncio
+
+from fastapi import status
+
+from app.services import gemini_client
+from app.services.gemini_client import FakeBackend, GeminiTimeoutError, generate_text
+from app.telemetry import (
+    Histogram, gemini_latency, http_latency, http_requests, registry, request_statements
+)
+
+
+def workout():
+    return {"workout_type": "Running", "duration": 30, "intensity": "moderate", "calories_burned": 300}
+
+
+class TestHistogram:
+
+    def test_buckets_render_cumulatively(self):
+        """Test observations land in the first bucket they fit and render cumulatively"""
+        histogram = Histogram("test_seconds", "Test", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(("/x",), value)
+
+        lines = list(histogram.samples())
+
+        assert lines == [
+            'test_seconds_bucket{route="/x",le="0.1"} 2',
+            'test_seconds_bucket{route="/x",le="1.0"} 3',
+            'test_seconds_bucket{route="/x",le="+Inf"} 4',
+            'test_seconds_sum{route="/x"} 3.65',
+            'test_seconds_count{route="/x"} 4',
+        ]
+
+
+class TestTelemetryMiddleware:
+
+    def test_requests_are_labelled_by_route_template(self, client, auth_headers):
+        """Test paths with ids share their route's series and status codes are counted"""
+        registry.clear()
+        ids = [client.post("/workouts", json=workout(), headers=auth_headers).json()["id"] for _ in range(2)]
+        for workout_id in ids:
+            client.delete(f"/workouts/{workout_id}", headers=auth_headers)
+        client.delete(f"/workouts/{ids[0]}", headers=auth_headers)
+
+        assert http_latency.count(("DELETE", "/workouts/{workout_id}")) == 3
+        assert http_requests.value(("DELETE", "/workouts/{workout_id}", "200")) == 2
+        assert http_requests.value(("DELETE", "/workouts/{workout_id}", "404")) == 1
+
+    def test_unknown_paths_share_one_series(self, client):
+        """Test 404s for unrouted paths do not create a series per path"""
+        registry.clear()
+        client.get("/nope/1")
+        client.get("/nope/2")
+
+        assert http_requests.value(("GET", "unmatched", "404")) == 2
+
+    def test_sql_statements_are_attributed_to_requests(self, client, auth_headers):
+        """Test statements run by sync and async routes count towards their request"""
+        client.post("/workouts", json=workout(), headers=auth_headers)
+        registry.clear()
+
+        client.get("/workouts", headers=auth_headers)
+        client.get("/ai/progress-analysis", headers=auth_headers)
+
+        assert request_statements.count(("GET", "/workouts")) == 1
+        assert request_statements.total(("GET", "/workouts")) >= 1
+        assert request_statements.total(("GET", "/ai/progress-analysis")) >= 1
+
+    def test_metrics_endpoint_renders_prometheus_text(self, client, auth_headers):
+        """Test /metrics serves every metric family in the text exposition format"""
+        client.get("/workouts", headers=auth_headers)
+
+        response = client.get("/metrics")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        body = response.text
+        for family in ("http_requests_total", "http_request_duration_seconds", "http_requests_in_flight",
+                       "http_request_db_statements", "db_statements_total", "gemini_request_duration_seconds"):
+            assert f"# TYPE {family} " in body
+        assert 'http_request_duration_seconds_count{method="GET",route="/workouts"}' in body
+        # The scrape itself is in flight while the page renders
+        assert 'http_requests_in_flight{method="GET",route="/metrics"} 1' in body
+
+
+class TestGeminiLatency:
+
+    def test_calls_are_timed_by_outcome(self):
+        """Test successful and timed-out generate_text calls are recorded separately"""
+        previous = gemini_client.get_backend()
+        gemini_latency.clear()
+        try:
+            gemini_client.set_backend(FakeBackend(latency=0))
+            asyncio.run(generate_text("plan my week"))
+            gemini_client.set_backend(FakeBackend(latency=1))
+            try:
+                asyncio.run(generate_text("plan my week", timeout=0.01))
+            except GeminiTimeoutError:
+                pass
+        finally:
+            gemini_client.set_backend(previous)
+
+        assert gemini_latency.count(("ok",)) == 1
+        assert gemini_latency.count(("timeout",)) == 1
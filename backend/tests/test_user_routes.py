@@ -114,4 +114,46 @@ class TestUserNotifications:
         """Test marking non-existent notification as read"""
         response = client.put("/users/notifications/999/read", headers=auth_headers)
         
-        assert response.status_code == status.HTTP_404_NOT_FOUND
\ No newline at end of file
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+    
+    def test_notifications_pagination(self, client, auth_headers, admin_headers, test_user):
+        """Test notifications are paged newest first with a cursor"""
+        for i in range(5):
+            client.post("/admin/notifications", json={"user_id": test_user.id, "message": f"N{i}"}, headers=admin_headers)
+        
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/users/notifications", params=params, headers=auth_headers)
+            seen += [n["message"] for n in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        
+        assert seen == ["N4", "N3", "N2", "N1", "N0"]
+    
+    def test_unread_count_and_bulk_mark_read(self, client, auth_headers, admin_headers, test_user):
+        """Test the unread counter follows bulk mark-read by ids and for all"""
+        for i in range(4):
+            client.post("/admin/notifications", json={"user_id": test_user.id, "message": f"N{i}"}, headers=admin_headers)
+        ids = [n["id"] for n in client.get("/users/notifications", headers=auth_headers).json()]
+        assert client.get("/users/notifications/unread-count", headers=auth_headers).json() == {"unread": 4}
+        
+        response = client.put("/users/notifications/read", json={"ids": ids[:2]}, headers=auth_headers)
+        assert response.json() == {"updated": 2, "unread": 2}
+        unread = client.get("/users/notifications?unread_only=true", headers=auth_headers).json()
+        assert [n["id"] for n in unread] == ids[2:]
+        
+        response = client.put("/users/notifications/read", json={}, headers=auth_headers)
+        assert response.json() == {"updated": 2, "unread": 0}
+    
+    def test_bulk_mark_read_ignores_other_users(self, client, auth_headers, admin_headers, admin_user):
+        """Test ids of another user's notifications are not touched"""
+        client.post("/admin/notifications", json={"user_id": admin_user.id, "message": "Admin only"}, headers=admin_headers)
+        other_id = client.get("/users/notifications", headers=admin_headers).json()[0]["id"]
+        
+        response = client.put("/users/notifications/read", json={"ids": [other_id]}, headers=auth_headers)
+        
+        assert response.json()["updated"] == 0
+        assert client.get("/users/notifications/unread-count", headers=admin_headers).json() == {"unread": 1}
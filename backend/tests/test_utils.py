@@ -1,6 +1,10 @@
 
+import numpy as np
 import pytest
-from app.utils import calculate_bmi, calculate_body_fat, calculate_skeletal_muscle
+from app.utils import (
+    calculate_bmi, calculate_body_fat, calculate_skeletal_muscle,
+    calculate_bmi_array, calculate_body_fat_array, calculate_skeletal_muscle_array
+)
 
 
 class TestUtils:
@@ -36,4 +40,34 @@ class TestUtils:
             weight=60, height=165, age=25, gender="female"
         )
         assert isinstance(muscle, float)
-        assert muscle > 0
\ No newline at end of file
+        assert muscle > 0
+
+
+class TestVectorizedUtils:
+    
+    def test_arrays_match_scalar_functions(self):
+        """Test the vectorized formulas return exactly the scalar results"""
+        rng = np.random.default_rng(42)
+        n = 20000
+        weights = np.round(rng.uniform(35, 180, n), 1).tolist()
+        heights = np.round(rng.uniform(130, 215, n), 1).tolist()
+        ages = rng.integers(14, 90, n).tolist()
+        genders = rng.choice(["male", "female", "Male", "other"], n).tolist()
+        
+        bmi = calculate_bmi_array(weights, heights)
+        expected_bmi = [calculate_bmi(w, h) for w, h in zip(weights, heights)]
+        assert bmi.tolist() == expected_bmi
+        assert calculate_body_fat_array(bmi, ages, genders).tolist() == [
+            calculate_body_fat(b, a, g) for b, a, g in zip(expected_bmi, ages, genders)
+        ]
+        assert calculate_skeletal_muscle_array(weights, heights, ages, genders).tolist() == [
+            calculate_skeletal_muscle(w, h, a, g) for w, h, a, g in zip(weights, heights, ages, genders)
+        ]
+    
+    def test_rounding_ties_match_round(self):
+        """Test values on a .xx5 boundary round like the built-in round()"""
+        # np.round alone rounds these differently from round()
+        values = [0.015, 0.065, 0.155, 2.675]
+        assert np.round(values, 2).tolist() != [round(v, 2) for v in values]
+        
+        assert calculate_bmi_array(values, [100.0] * len(values)).tolist() == [round(v, 2) for v in values]
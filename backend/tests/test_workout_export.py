@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+
+import pytest
+from fastapi import status
+
+from app.services import workout_export
+
+
+WORKOUT = {
+    "workout_type": "Running",
+    "duration": 30,
+    "intensity": "moderate",
+    "calories_burned": 300,
+    "notes": 'Easy, then "fast"'
+}
+
+
+class TestWorkoutExport:
+    
+    def test_export_csv(self, client, auth_headers):
+        """Test exporting the user's workouts as CSV, oldest first"""
+        for duration in (10, 20, 30):
+            client.post("/workouts", json={**WORKOUT, "duration": duration}, headers=auth_headers)
+        
+        response = client.get("/workouts/export", headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/csv")
+        assert "attachment" in response.headers["content-disposition"]
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [r["duration"] for r in rows] == ["10", "20", "30"]
+        assert rows[0]["notes"] == WORKOUT["notes"]
+        assert "user_id" not in rows[0]
+    
+    def test_export_ndjson_in_batches(self, client, auth_headers, monkeypatch):
+        """Test NDJSON export streams every row across several batches"""
+        monkeypatch.setattr(workout_export, "EXPORT_BATCH_SIZE", 2)
+        for duration in range(1, 6):
+            client.post("/workouts", json={**WORKOUT, "duration": duration}, headers=auth_headers)
+        
+        response = client.get("/workouts/export?format=ndjson", headers=auth_headers)
+        
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [r["duration"] for r in rows] == [1, 2, 3, 4, 5]
+        assert set(rows[0]) == set(workout_export.EXPORT_COLUMNS)
+    
+    def test_export_round_trips_through_import(self, client, auth_headers):
+        """Test an exported CSV can be imported back unchanged"""
+        client.post("/workouts", json=WORKOUT, headers=auth_headers)
+        exported = client.get("/workouts/export", headers=auth_headers).text
+        
+        response = client.post("/workouts/import?format=csv", content=exported, headers=auth_headers)
+        
+        assert response.json()["imported"] == 1
+        rows = list(csv.DictReader(io.StringIO(client.get("/workouts/export", headers=auth_headers).text)))
+        assert rows[0]["date"] == rows[1]["date"]
+        assert rows[0]["notes"] == rows[1]["notes"]
+    
+    def test_admin_export_all_users(self, client, auth_headers, admin_headers, test_user):
+        """Test the admin export covers every user and is admin only"""
+        client.post("/workouts", json=WORKOUT, headers=auth_headers)
+        client.post("/workouts", json=WORKOUT, headers=admin_headers)
+        
+        response = client.get("/admin/workouts/export?format=ndjson", headers=admin_headers)
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert len(rows) == 2
+        assert test_user.id in {r["user_id"] for r in rows}
+        
+        response = client.get(f"/admin/users/{test_user.id}/workouts/export", headers=admin_headers)
+        assert len(list(csv.DictReader(io.StringIO(response.text)))) == 1
+        
+        response = client.get("/admin/workouts/export", headers=auth_headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,99 @@
+import json
+
+import pytest
+from fastapi import status
+
+from app.services import workout_import
+
+
+CSV_HEADER = "workout_type,duration,intensity,calories_burned,notes,date\n"
+
+
+def ndjson(rows):
+    return "".join(json.dumps(row) + "\n" for row in rows)
+
+
+class TestWorkoutImport:
+    
+    def test_import_csv(self, client, auth_headers):
+        """Test importing workouts from CSV, including quoted multi-line notes"""
+        body = CSV_HEADER + (
+            "Running,30,moderate,300,,2024-01-01T07:00:00\n"
+            'Cycling,45,high,400,"Hill repeats, then\n""easy"" spin",2024-01-02T18:30:00Z\n'
+        )
+        response = client.post(
+            "/workouts/import", content=body,
+            headers={**auth_headers, "Content-Type": "text/csv"}
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"imported": 2, "failed": 0, "errors": [], "errors_truncated": False}
+        
+        workouts = client.get("/workouts", headers=auth_headers).json()
+        assert [w["workout_type"] for w in workouts] == ["Cycling", "Running"]
+        assert workouts[0]["notes"] == 'Hill repeats, then\n"easy" spin'
+        assert workouts[1]["notes"] is None
+    
+    def test_import_ndjson_reports_bad_rows(self, client, auth_headers):
+        """Test invalid NDJSON rows are reported while valid rows are imported"""
+        body = ndjson([
+            {"workout_type": "Swimming", "duration": 40, "intensity": "low", "calories_burned": 250},
+            {"workout_type": "Yoga", "duration": "long", "intensity": "low", "calories_burned": 100},
+        ]) + "not json\n" + ndjson([
+            {"workout_type": "Rowing", "duration": 20, "intensity": "moderate", "calories_burned": 200},
+        ])
+        response = client.post("/workouts/import?format=ndjson", content=body, headers=auth_headers)
+        
+        data = response.json()
+        assert data["imported"] == 2
+        assert data["failed"] == 2
+        assert [e["row"] for e in data["errors"]] == [2, 3]
+        assert data["errors"][0]["errors"][0].startswith("duration:")
+    
+    def test_import_ndjson_keeps_unicode_line_separators(self, client, auth_headers):
+        """Test U+2028 and similar characters inside a value do not split an NDJSON row"""
+        notes = "Intervals\u2028cool down\x0cstretch\x1c\u0085done"
+        body = json.dumps({
+            "workout_type": "Running", "duration": 30, "intensity": "high",
+            "calories_burned": 350, "notes": notes,
+        }, ensure_ascii=False) + "\r\n"
+        response = client.post("/workouts/import?format=ndjson", content=body.encode(), headers=auth_headers)
+        
+        assert response.json() == {"imported": 1, "failed": 0, "errors": [], "errors_truncated": False}
+        workouts = client.get("/workouts", headers=auth_headers).json()
+        assert workouts[0]["notes"] == notes
+    
+    def test_import_requires_format(self, client, auth_headers):
+        """Test a body of unknown type is rejected"""
+        response = client.post(
+            "/workouts/import", content="x",
+            headers={**auth_headers, "Content-Type": "text/plain"}
+        )
+        
+        assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    
+    def test_import_in_batches_keeps_rollups_and_streaks(self, client, auth_headers, admin_headers, monkeypatch):
+        """Test batched imports keep analytics rollups and streak state exact"""
+        monkeypatch.setattr(workout_import, "IMPORT_BATCH_SIZE", 2)
+        client.post("/admin/analytics/rebuild", headers=admin_headers)
+        client.post("/workouts", json={
+            "workout_type": "Running", "duration": 30, "intensity": "moderate", "calories_burned": 300
+        }, headers=auth_headers)
+        
+        rows = [
+            {"workout_type": "Running", "duration": 10 + day, "intensity": "low",
+             "calories_burned": 100, "date": f"2024-03-{day:02d}T08:00:00"}
+            for day in (1, 1, 2, 3, 5)
+        ]
+        response = client.post("/workouts/import?format=ndjson", content=ndjson(rows), headers=auth_headers)
+        assert response.json()["imported"] == 5
+        
+        overview = client.get("/admin/analytics", headers=admin_headers).json()
+        daily = client.get("/admin/analytics/daily", headers=admin_headers).json()
+        client.post("/admin/analytics/rebuild", headers=admin_headers)
+        assert client.get("/admin/analytics", headers=admin_headers).json() == overview
+        assert client.get("/admin/analytics/daily", headers=admin_headers).json() == daily
+        assert overview["total_workouts"] == 6
+        assert overview["active_users"] == 1
+        
+        assert client.get("/streaks", headers=auth_headers).json()["longest_streak"] == 3
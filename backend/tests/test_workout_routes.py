@@ -37,4 +37,92 @@ class TestWorkouts:
         response = client.get("/workouts", headers=auth_headers)
         
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.json()) > 0
\ No newline at end of file
+        assert len(response.json()) > 0
+    
+    def test_get_streaks_empty(self, client, auth_headers):
+        """Test streaks when no workouts are logged"""
+        response = client.get("/streaks", headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"current_streak": 0, "longest_streak": 0}
+    
+    def test_streaks_follow_create_and_delete(self, client, auth_headers):
+        """Test streak state is maintained by workout writes"""
+        workout_data = {
+            "workout_type": "Rowing",
+            "duration": 20,
+            "intensity": "moderate",
+            "calories_burned": 200
+        }
+        first = client.post("/workouts", json=workout_data, headers=auth_headers).json()
+        second = client.post("/workouts", json=workout_data, headers=auth_headers).json()
+        
+        response = client.get("/streaks", headers=auth_headers)
+        assert response.json()["longest_streak"] == 1
+        
+        client.delete(f"/workouts/{first['id']}", headers=auth_headers)
+        assert client.get("/streaks", headers=auth_headers).json()["longest_streak"] == 1
+        
+        client.delete(f"/workouts/{second['id']}", headers=auth_headers)
+        assert client.get("/streaks", headers=auth_headers).json() == {
+            "current_streak": 0,
+            "longest_streak": 0
+        }
+
+
+class TestWorkoutPagination:
+    
+    WORKOUT = {
+        "workout_type": "Running",
+        "duration": 30,
+        "intensity": "moderate",
+        "calories_burned": 300
+    }
+    
+    def log_workouts(self, client, headers, count):
+        return [client.post("/workouts", json=self.WORKOUT, headers=headers).json()["id"] for _ in range(count)]
+    
+    def test_cursor_walks_every_workout_once(self, client, auth_headers):
+        """Test following X-Next-Cursor returns each workout exactly once, newest first"""
+        ids = self.log_workouts(client, auth_headers, 5)
+        
+        seen = []
+        url = "/workouts?limit=2"
+        while True:
+            response = client.get(url, headers=auth_headers)
+            seen.extend(w["id"] for w in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+            url = f"/workouts?limit=2&cursor={cursor}"
+        
+        assert seen == list(reversed(ids))
+    
+    def test_new_workouts_do_not_shift_later_pages(self, client, auth_headers):
+        """Test inserts between page requests neither duplicate nor skip rows"""
+        ids = self.log_workouts(client, auth_headers, 4)
+        
+        first = client.get("/workouts?limit=2", headers=auth_headers)
+        self.log_workouts(client, auth_headers, 3)
+        cursor = first.headers["X-Next-Cursor"]
+        second = client.get(f"/workouts?limit=2&cursor={cursor}", headers=auth_headers)
+        
+        assert [w["id"] for w in second.json()] == [ids[1], ids[0]]
+    
+    def test_invalid_cursor(self, client, auth_headers):
+        """Test a malformed cursor is rejected"""
+        response = client.get("/workouts?cursor=not-a-cursor", headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    def test_admin_user_workouts_are_paginated(self, client, auth_headers, admin_headers, test_user):
+        """Test the admin history view is limited and returns a cursor"""
+        self.log_workouts(client, auth_headers, 3)
+        
+        response = client.get(f"/admin/users/{test_user.id}/workouts?limit=2", headers=admin_headers)
+        
+        assert len(response.json()) == 2
+        cursor = response.headers["X-Next-Cursor"]
+        rest = client.get(f"/admin/users/{test_user.id}/workouts?limit=2&cursor={cursor}", headers=admin_headers)
+        assert len(rest.json()) == 1
+        assert "X-Next-Cursor" not in rest.headers
@@ -1,4 +1,4 @@
-import { useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { Sparkles, TrendingUp, MessageCircle } from "lucide-react";
 import { aiAPI } from "@/services/api";
 import toast from "react-hot-toast";
@@ -13,19 +13,40 @@ export default function AIAssistant() {
   const [userPrompt, setUserPrompt] = useState("");
   const [aiAnswer, setAiAnswer] = useState<string | null>(null);
 
-  // ✅ Auto recommendation (no prompt)
+  // The recommendation stream in flight, cancelled on unmount or when a new one starts
+  const streamController = useRef<AbortController | null>(null);
+  useEffect(() => () => streamController.current?.abort(), []);
+
+  // ✅ Auto recommendation (no prompt), rendered as it streams in
   const getRecommendations = async () => {
+    streamController.current?.abort();
+    const controller = new AbortController();
+    streamController.current = controller;
+
     setLoading(true);
+    setRecommendations(null);
+    let text = "";
     try {
-      const { data } = await aiAPI.getRecommendations(
-        "Generate personalized workout and diet recommendations"
+      await aiAPI.streamRecommendations(
+        "Generate personalized workout and diet recommendations",
+        (chunk) => {
+          text += chunk;
+          setRecommendations({ ai_response: text });
+          setLoading(false);
+        },
+        controller.signal
       );
-      setRecommendations(data);
       toast.success("AI recommendations generated!");
     } catch {
-      toast.error("Failed to get AI recommendations");
+      // A superseded or unmounted stream is not a failure
+      if (!controller.signal.aborted) {
+        toast.error("Failed to get AI recommendations");
+      }
     } finally {
-      setLoading(false);
+      if (streamController.current === controller) {
+        streamController.current = null;
+        setLoading(false);
+      }
     }
   };
 
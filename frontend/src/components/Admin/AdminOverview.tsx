@@ -1,10 +1,11 @@
 import { useEffect, useState } from 'react';
 import { Users, Dumbbell, TrendingUp, Activity } from 'lucide-react';
 import { adminAPI } from '@/services/api';
-import type { Analytics } from '@/types';
+import type { Analytics, EngagementDay } from '@/types';
 
 export default function AdminOverview() {
   const [analytics, setAnalytics] = useState<Analytics | null>(null);
+  const [engagement, setEngagement] = useState<EngagementDay | null>(null);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
@@ -13,8 +14,12 @@ export default function AdminOverview() {
 
   const loadAnalytics = async () => {
     try {
-      const { data } = await adminAPI.getAnalytics();
-      setAnalytics(data);
+      const [overview, series] = await Promise.all([
+        adminAPI.getAnalytics(),
+        adminAPI.getEngagement(1),
+      ]);
+      setAnalytics(overview.data);
+      setEngagement(series.data[series.data.length - 1] ?? null);
     } catch (error) {
       console.error('Failed to load analytics:', error);
     } finally {
@@ -95,6 +100,21 @@ export default function AdminOverview() {
               />
             </div>
           </div>
+          {engagement && (
+            <div className="grid grid-cols-4 gap-4 pt-2 text-center">
+              {[
+                ['Daily Active', engagement.dau],
+                ['Weekly Active', engagement.wau],
+                ['Monthly Active', engagement.mau],
+                ['Stickiness', `${(engagement.stickiness * 100).toFixed(1)}%`],
+              ].map(([label, value]) => (
+                <div key={label}>
+                  <p className="text-sm text-gray-600">{label}</p>
+                  <p className="text-xl font-semibold">{value}</p>
+                </div>
+              ))}
+            </div>
+          )}
         </div>
       </div>
     </div>
@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react";
-import { Trash2, Send, BarChart3, Dumbbell } from "lucide-react";
+import { Trash2, Send, BarChart3, Dumbbell, Megaphone } from "lucide-react";
 import { adminAPI } from "@/services/api";
 import toast from "react-hot-toast";
 import type { User } from "@/types";
@@ -10,10 +10,13 @@ export default function UserManagement() {
   const [selectedUser, setSelectedUser] = useState<User | null>(null);
 
   const [showNotificationModal, setShowNotificationModal] = useState(false);
+  const [showBroadcastModal, setShowBroadcastModal] = useState(false);
   const [showStatsModal, setShowStatsModal] = useState(false);
   const [showWorkoutsModal, setShowWorkoutsModal] = useState(false);
 
   const [notification, setNotification] = useState("");
+  const [inactiveDays, setInactiveDays] = useState("");
+  const [activityLevel, setActivityLevel] = useState("");
   const [userStats, setUserStats] = useState<any>(null);
   const [loading, setLoading] = useState(true);
 
@@ -58,6 +61,36 @@ export default function UserManagement() {
     }
   };
 
+  const broadcastNotification = async () => {
+    if (!notification.trim()) return;
+
+    try {
+      const { data } = await adminAPI.broadcastNotification(notification, {
+        inactive_days: inactiveDays ? Number(inactiveDays) : undefined,
+        activity_level: activityLevel || undefined,
+      });
+      setShowBroadcastModal(false);
+      setNotification("");
+      setInactiveDays("");
+      setActivityLevel("");
+
+      // The fan-out runs in the background; report once it has finished
+      const poll = async () => {
+        const { data: progress } = await adminAPI.getBroadcast(data.broadcast_id);
+        if (progress.status === "done") {
+          toast.success(`Broadcast sent to ${progress.sent} users`);
+        } else if (progress.status === "failed") {
+          toast.error("Broadcast failed");
+        } else {
+          setTimeout(poll, 1000);
+        }
+      };
+      poll();
+    } catch {
+      toast.error("Failed to send broadcast");
+    }
+  };
+
   const viewUserStats = async (user: User) => {
     setSelectedUser(user);
     setShowStatsModal(true);
@@ -76,7 +109,16 @@ export default function UserManagement() {
 
   return (
     <div className="space-y-6">
-      <h1 className="text-3xl font-bold text-gray-900">User Management</h1>
+      <div className="flex items-center justify-between">
+        <h1 className="text-3xl font-bold text-gray-900">User Management</h1>
+        <button
+          onClick={() => setShowBroadcastModal(true)}
+          className="flex items-center gap-2 bg-indigo-600 text-white rounded-lg px-4 py-2"
+        >
+          <Megaphone size={18} />
+          Broadcast
+        </button>
+      </div>
 
       {/* USERS TABLE */}
       <div className="bg-white rounded-xl shadow-sm border border-gray-100 overflow-hidden">
@@ -191,6 +233,63 @@ export default function UserManagement() {
         </div>
       )}
 
+      {/* BROADCAST MODAL */}
+      {showBroadcastModal && (
+        <div className="fixed inset-0 bg-black/50 flex items-center justify-center z-50">
+          <div className="bg-white rounded-xl p-6 w-full max-w-md">
+            <h2 className="text-xl font-bold mb-4">Broadcast Notification</h2>
+
+            <textarea
+              value={notification}
+              onChange={(e) => setNotification(e.target.value)}
+              className="w-full border rounded-lg p-3 mb-4"
+              rows={4}
+            />
+
+            <div className="grid grid-cols-2 gap-3 mb-4">
+              <input
+                type="number"
+                min={1}
+                value={inactiveDays}
+                onChange={(e) => setInactiveDays(e.target.value)}
+                placeholder="Inactive for N days"
+                className="border rounded-lg p-2"
+              />
+              <select
+                value={activityLevel}
+                onChange={(e) => setActivityLevel(e.target.value)}
+                className="border rounded-lg p-2"
+              >
+                <option value="">Any activity level</option>
+                <option value="sedentary">Sedentary</option>
+                <option value="light">Light</option>
+                <option value="moderate">Moderate</option>
+                <option value="active">Active</option>
+                <option value="very_active">Very active</option>
+              </select>
+            </div>
+
+            <div className="flex gap-3">
+              <button
+                onClick={() => {
+                  setShowBroadcastModal(false);
+                  setNotification("");
+                }}
+                className="flex-1 border rounded-lg py-2"
+              >
+                Cancel
+              </button>
+              <button
+                onClick={broadcastNotification}
+                className="flex-1 bg-blue-600 text-white rounded-lg py-2"
+              >
+                Send to all matching users
+              </button>
+            </div>
+          </div>
+        </div>
+      )}
+
       {/* STATS MODAL */}
       {showStatsModal && selectedUser && (
         <div className="fixed inset-0 bg-black/50 flex items-center justify-center z-50">
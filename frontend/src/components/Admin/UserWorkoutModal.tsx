@@ -9,11 +9,18 @@ interface Props {
 export default function UserWorkoutsModal({ user, onClose }: Props) {
   const [workouts, setWorkouts] = useState<any[]>([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
 
-  useEffect(() => {
-    adminAPI.getUserWorkouts(user.id)
-      .then(res => setWorkouts(res.data))
+  const loadWorkouts = (cursor?: string) =>
+    adminAPI.getUserWorkouts(user.id, cursor)
+      .then(res => {
+        setWorkouts(prev => (cursor ? [...prev, ...res.data] : res.data));
+        setNextCursor(res.headers['x-next-cursor'] ?? null);
+      })
       .finally(() => setLoading(false));
+
+  useEffect(() => {
+    loadWorkouts();
   }, [user.id]);
 
   return (
@@ -50,6 +57,15 @@ export default function UserWorkoutsModal({ user, onClose }: Props) {
           </table>
         )}
 
+        {!loading && nextCursor && (
+          <button
+            onClick={() => loadWorkouts(nextCursor)}
+            className="w-full py-2 mt-2 text-blue-600 hover:text-blue-700 font-medium"
+          >
+            Load more
+          </button>
+        )}
+
         <div className="flex justify-end mt-4">
           <button
             onClick={onClose}
@@ -8,15 +8,22 @@ import { format } from 'date-fns';
 
 export default function Notifications() {
   const [notifications, setNotifications] = useState<Notification[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [unread, setUnread] = useState(0);
 
   useEffect(() => {
     loadNotifications();
   }, []);
 
-  const loadNotifications = async () => {
+  const loadNotifications = async (cursor?: string) => {
     try {
-      const { data } = await notificationsAPI.getAll();
-      setNotifications(data);
+      const [{ data, headers }, { data: count }] = await Promise.all([
+        notificationsAPI.getPage(cursor),
+        notificationsAPI.getUnreadCount(),
+      ]);
+      setNotifications(prev => (cursor ? [...prev, ...data] : data));
+      setNextCursor(headers['x-next-cursor'] ?? null);
+      setUnread(count.unread);
     } catch (error) {
       toast.error('Failed to load notifications');
     }
@@ -26,15 +33,38 @@ export default function Notifications() {
     try {
       await notificationsAPI.markAsRead(id);
       setNotifications(prev => prev.map(n => n.id === id ? { ...n, is_read: true } : n));
+      setUnread(prev => Math.max(prev - 1, 0));
       toast.success('Marked as read');
     } catch (error) {
       toast.error('Failed to update notification');
     }
   };
 
+  const markAllAsRead = async () => {
+    try {
+      await notificationsAPI.markManyAsRead();
+      setNotifications(prev => prev.map(n => ({ ...n, is_read: true })));
+      setUnread(0);
+    } catch (error) {
+      toast.error('Failed to update notifications');
+    }
+  };
+
   return (
     <div className="max-w-3xl space-y-6">
-      <h1 className="text-3xl font-bold text-gray-900">Notifications</h1>
+      <div className="flex items-center justify-between">
+        <h1 className="text-3xl font-bold text-gray-900">
+          Notifications{unread > 0 && ` (${unread})`}
+        </h1>
+        {unread > 0 && (
+          <button
+            onClick={markAllAsRead}
+            className="text-blue-600 hover:text-blue-700 font-medium"
+          >
+            Mark all as read
+          </button>
+        )}
+      </div>
 
       <div className="space-y-3">
         {notifications.map(notification => (
@@ -71,6 +101,15 @@ export default function Notifications() {
           </div>
         ))}
 
+        {nextCursor && (
+          <button
+            onClick={() => loadNotifications(nextCursor)}
+            className="w-full py-3 text-blue-600 hover:text-blue-700 font-medium"
+          >
+            Load more
+          </button>
+        )}
+
         {notifications.length === 0 && (
           <div className="text-center py-12 text-gray-500">
             No notifications yet
@@ -32,9 +32,8 @@ export default function Dashboard({ user, onLogout }: DashboardProps) {
   useEffect(() => {
     const loadNotifications = async () => {
       try {
-        const { data } = await notificationsAPI.getAll();
-        const unread = data.filter((n: any) => !n.is_read).length;
-        setUnreadCount(unread);
+        const { data } = await notificationsAPI.getUnreadCount();
+        setUnreadCount(data.unread);
       } catch (err) {
         console.error('Failed to load notifications');
       }
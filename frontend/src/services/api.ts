@@ -9,6 +9,8 @@ import type {
   AIRecommendations,
   StreakData,
   Analytics,
+  EngagementDay,
+  PersonalRecord,
 } from "@/types";
 
 const API_URL = import.meta.env.VITE_API_URL || "http://localhost:8080";
@@ -50,6 +52,14 @@ export const metricsAPI = {
     api.post<UserMetrics>("/users/metrics", data),
 
   get: () => api.get<UserMetrics>("/users/metrics"),
+
+  getHistory: (params: {
+    metric?: "weight" | "bmi" | "body_fat_percentage" | "skeletal_muscle_mass";
+    days?: number;
+    window_days?: number;
+    goal?: number;
+    max_points?: number;
+  } = {}) => api.get("/users/metrics/history", { params }),
 };
 
 /* ================= WORKOUTS ================= */
@@ -74,12 +84,55 @@ export const workoutsAPI = {
   
   getRewards: () =>
     api.get<Reward[]>("/rewards"),
+
+  getPersonalRecords: () =>
+    api.get<PersonalRecord[]>("/prs"),
 };
 /* ================= AI ================= */
 export const aiAPI = {
   getRecommendations: (prompt: string) =>
     api.post<AIRecommendations>("/ai/recommendations", { prompt }),
 
+  // Server-sent events: onChunk receives text as it is generated.
+  // Abort the signal to stop generation server-side.
+  streamRecommendations: async (
+    prompt: string,
+    onChunk: (text: string) => void,
+    signal?: AbortSignal
+  ) => {
+    const response = await fetch(`${API_URL}/ai/recommendations/stream`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        Authorization: `Bearer ${localStorage.getItem("token")}`,
+      },
+      body: JSON.stringify({ prompt }),
+      signal,
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`Streaming failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary;
+      while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+        const block = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        const event = block.match(/^event: (.*)$/m)?.[1];
+        const data = JSON.parse(block.match(/^data: (.*)$/m)?.[1] ?? "{}");
+        if (event === "chunk") onChunk(data.text);
+        if (event === "error") throw new Error(data.detail);
+      }
+    }
+  },
+
   analyzeProgress: (days = 30) =>
     api.get(`/ai/progress-analysis?days=${days}`),
 };
@@ -87,8 +140,16 @@ export const aiAPI = {
 /* ================= NOTIFICATIONS ================= */
 export const notificationsAPI = {
   getAll: () => api.get<Notification[]>("/users/notifications"),
+  // Pass the X-Next-Cursor header of the previous page to get the next one
+  getPage: (cursor?: string, limit = 50) =>
+    api.get<Notification[]>("/users/notifications", { params: { cursor, limit } }),
+  getUnreadCount: () =>
+    api.get<{ unread: number }>("/users/notifications/unread-count"),
   markAsRead: (id: number) =>
     api.put(`/users/notifications/${id}/read`),
+  // Without ids every notification is marked read
+  markManyAsRead: (ids?: number[]) =>
+    api.put<{ updated: number; unread: number }>("/users/notifications/read", { ids }),
 };
 
 /* ================= ADMIN ================= */
@@ -99,12 +160,20 @@ export const adminAPI = {
   sendNotification: (user_id: number, message: string) =>
     api.post("/admin/notifications", { user_id, message }),
 
+  broadcastNotification: (
+    message: string,
+    segment: { inactive_days?: number; activity_level?: string } = {}
+  ) => api.post("/admin/notifications/broadcast", { message, ...segment }),
+  getBroadcast: (id: number) => api.get(`/admin/notifications/broadcasts/${id}`),
+
   getAnalytics: () => api.get<Analytics>("/admin/analytics"),
+  getEngagement: (days = 30) =>
+    api.get<EngagementDay[]>("/admin/analytics/engagement", { params: { days } }),
   getUserStats: (id: number) => api.get(`/admin/users/${id}/stats`),
 
   // ✅ THIS is the new feature you added
-  getUserWorkouts: (id: number) =>
-    api.get(`/admin/users/${id}/workouts`),
+  getUserWorkouts: (id: number, cursor?: string, limit = 100) =>
+    api.get(`/admin/users/${id}/workouts`, { params: { cursor, limit } }),
 };
 
 export default api;
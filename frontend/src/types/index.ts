@@ -25,6 +25,19 @@ export interface Workout {
   calories_burned: number;
   notes?: string;
   date: string;
+  sets?: number | null;
+  reps?: number | null;
+  load_kg?: number | null;
+}
+
+export interface PersonalRecord {
+  exercise: string;
+  weight: number;
+  reps: number;
+  volume: number;
+  max_weight: number;
+  workout_id: number;
+  achieved_at: string;
 }
 
 export interface Notification {
@@ -63,6 +76,14 @@ export interface Analytics {
   average_workouts_per_user: number;
 }
 
+export interface EngagementDay {
+  day: string;
+  dau: number;
+  wau: number;
+  mau: number;
+  stickiness: number;
+}
+
 
 
 // export interface User {